@@ -0,0 +1,371 @@
+"""
+Persona query workload over the generated datasets.
+
+Implements a representative question for each analysis persona in
+PERSONA_SCENARIOS.md twice, once with the typed pandas loader
+(nova_data.load over the CSV/JSON outputs) and once as SQL against the
+SQLite sink, and times every query per storage format and scale factor.
+The two implementations of a query must return the same rows.
+
+Usage:
+    python benchmarks/persona_queries.py
+    python benchmarks/persona_queries.py --scales 0.5 1 2 --output results/persona_queries.json
+    python benchmarks/persona_queries.py --data-dir data
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import nova_data
+from benchmarks.run_benchmarks import Inputs, build_config
+from generators.campaign_generator import CampaignGenerator
+from main import clustering_options
+from output.csv_writer import write_csv
+from output.json_writer import write_json
+from output.sqlite_writer import write_sqlite
+from utils.random_utils import RandomGenerator
+from utils.state_utils import load_run_state
+
+DEFAULT_SCALES = [0.5, 1.0, 2.0]
+FORMATS = ['pandas', 'sqlite']
+
+# Days covered by the windowed (trend) queries, ending at the last generated day
+WINDOW_DAYS = 90
+
+
+class PersonaQuery:
+    """A persona question implemented against the pandas loader and in SQL."""
+
+    def __init__(self, name: str, persona: str, question: str,
+                 pandas: Callable[[str, Dict], pd.DataFrame], sql: str):
+        """
+        Initialize query.
+
+        Args:
+            name: Query identifier
+            persona: Persona from PERSONA_SCENARIOS.md
+            question: The question the query answers
+            pandas: Function of (data_dir, params) returning the result
+            sql: SQLite query with :start/:end parameters where windowed
+        """
+        self.name = name
+        self.persona = persona
+        self.question = question
+        self.pandas = pandas
+        self.sql = sql
+
+
+def _roi_by_channel(data_dir: str, params: Dict) -> pd.DataFrame:
+    df = nova_data.load('fact_campaign_performance', columns=['channel', 'budget_usd', 'revenue_usd'],
+                        data_dir=data_dir)
+    result = df.groupby('channel', observed=True)[['budget_usd', 'revenue_usd']].sum().reset_index()
+    result['roi'] = (result['revenue_usd'] - result['budget_usd']) / result['budget_usd']
+    return result.sort_values(['roi', 'channel'], ascending=[False, True])
+
+
+def _regional_trend(data_dir: str, params: Dict) -> pd.DataFrame:
+    df = nova_data.load('fact_daily_sales', columns=['date', 'region', 'units_sold', 'revenue_usd'],
+                        date_range=(params['start'], params['end']), data_dir=data_dir)
+    df['month'] = df['date'].dt.strftime('%Y-%m')
+    result = df.groupby(['month', 'region'], observed=True)[['units_sold', 'revenue_usd']].sum().reset_index()
+    return result.sort_values(['month', 'region'])
+
+
+def _return_rate_by_line(data_dir: str, params: Dict) -> pd.DataFrame:
+    sales = nova_data.load('fact_daily_sales', columns=['product_id', 'units_sold', 'units_returned'],
+                           data_dir=data_dir)
+    lines = nova_data.load('dim_products', columns=['product_id', 'product_line'], data_dir=data_dir)
+    totals = sales.groupby('product_id', observed=True)[['units_sold', 'units_returned']].sum().reset_index()
+    totals['product_id'] = totals['product_id'].astype(str)
+    lines['product_id'] = lines['product_id'].astype(str)
+    result = totals.merge(lines, on='product_id').groupby('product_line', observed=True)[
+        ['units_sold', 'units_returned']].sum().reset_index()
+    result['return_rate'] = result['units_returned'] / result['units_sold']
+    return result.sort_values(['return_rate', 'product_line'], ascending=[False, True])
+
+
+def _sentiment_by_week(data_dir: str, params: Dict) -> pd.DataFrame:
+    df = nova_data.load('social_media_posts', columns=['timestamp', 'sentiment', 'sentiment_score'],
+                        date_range=(params['start'], params['end']), data_dir=data_dir)
+    day = df['timestamp'].dt.tz_localize(None).dt.normalize()
+    df['week'] = (day - pd.to_timedelta(day.dt.weekday, unit='D')).dt.strftime('%Y-%m-%d')
+    result = df.groupby(['week', 'sentiment'], observed=True).agg(
+        posts=('sentiment_score', 'size'), avg_sentiment_score=('sentiment_score', 'mean')
+    ).reset_index()
+    return result.sort_values(['week', 'sentiment'])
+
+
+def _upgrade_paths(data_dir: str, params: Dict) -> pd.DataFrame:
+    df = nova_data.load('fact_transactions', columns=['product_id', 'previous_product_id'],
+                        filters={'is_repeat_customer': True}, data_dir=data_dir)
+    lines = nova_data.load('dim_products', columns=['product_id', 'product_line'], data_dir=data_dir)
+    line_of = dict(zip(lines['product_id'].astype(str), lines['product_line'].astype(str)))
+    df = df[df['previous_product_id'].notna()]
+    paths = pd.DataFrame({
+        'from_line': df['previous_product_id'].astype(str).map(line_of),
+        'to_line': df['product_id'].astype(str).map(line_of)
+    }).dropna()
+    result = paths.groupby(['from_line', 'to_line']).size().reset_index(name='customers')
+    return result.sort_values(['customers', 'from_line', 'to_line'], ascending=[False, True, True])
+
+
+QUERIES = [
+    PersonaQuery(
+        'marketing.roi_by_channel', 'Marketing Manager', 'Which marketing channel has the highest ROI?',
+        _roi_by_channel,
+        """
+        SELECT channel, SUM(budget_usd) AS budget_usd, SUM(revenue_usd) AS revenue_usd,
+               (SUM(revenue_usd) - SUM(budget_usd)) * 1.0 / SUM(budget_usd) AS roi
+        FROM fact_campaign_performance
+        GROUP BY channel
+        ORDER BY roi DESC, channel
+        """
+    ),
+    PersonaQuery(
+        'sales.regional_trend', 'Sales Analyst', 'How did units and revenue trend by region over the last quarter?',
+        _regional_trend,
+        """
+        SELECT substr(date, 1, 7) AS month, region, SUM(units_sold) AS units_sold, SUM(revenue_usd) AS revenue_usd
+        FROM fact_daily_sales
+        WHERE date BETWEEN :start AND :end
+        GROUP BY month, region
+        ORDER BY month, region
+        """
+    ),
+    PersonaQuery(
+        'product.return_rate_by_line', 'Product Manager', 'Which product line has the highest return rate?',
+        _return_rate_by_line,
+        """
+        SELECT p.product_line, SUM(s.units_sold) AS units_sold, SUM(s.units_returned) AS units_returned,
+               SUM(s.units_returned) * 1.0 / SUM(s.units_sold) AS return_rate
+        FROM fact_daily_sales s JOIN dim_products p ON p.product_id = s.product_id
+        GROUP BY p.product_line
+        ORDER BY return_rate DESC, p.product_line
+        """
+    ),
+    PersonaQuery(
+        'brand.sentiment_by_week', 'Brand Manager', 'How is sentiment moving week by week over the last quarter?',
+        _sentiment_by_week,
+        """
+        SELECT date(substr(timestamp, 1, 10), 'weekday 0', '-6 days') AS week, sentiment,
+               COUNT(*) AS posts, AVG(sentiment_score) AS avg_sentiment_score
+        FROM social_media_posts
+        WHERE timestamp BETWEEN :start AND :end || '~'
+        GROUP BY week, sentiment
+        ORDER BY week, sentiment
+        """
+    ),
+    PersonaQuery(
+        'customer.upgrade_paths', 'Customer Insights Analyst', 'Which product lines do repeat customers upgrade from and to?',
+        _upgrade_paths,
+        """
+        SELECT prev.product_line AS from_line, cur.product_line AS to_line, COUNT(*) AS customers
+        FROM fact_transactions t
+        JOIN dim_products cur ON cur.product_id = t.product_id
+        JOIN dim_products prev ON prev.product_id = t.previous_product_id
+        WHERE t.is_repeat_customer = 1
+        GROUP BY from_line, to_line
+        ORDER BY customers DESC, from_line, to_line
+        """
+    ),
+]
+
+
+def query_params(data_dir: str) -> Dict:
+    """Window of the trend queries: the last WINDOW_DAYS days of the generated data."""
+    state = load_run_state(data_dir)
+    if state is None:
+        sales = pd.read_csv(os.path.join(data_dir, 'fact_daily_sales.csv'), usecols=['date'])
+        end = datetime.strptime(sales['date'].max(), '%Y-%m-%d')
+    else:
+        end = datetime.strptime(state['end_date'], '%Y-%m-%d')
+    start = end - timedelta(days=WINDOW_DAYS - 1)
+    return {'start': start.strftime('%Y-%m-%d'), 'end': end.strftime('%Y-%m-%d')}
+
+
+def run_sql(data_dir: str, query: PersonaQuery, params: Dict, filename: str = 'nova.db') -> pd.DataFrame:
+    """Run a query's SQL against the SQLite sink."""
+    conn = sqlite3.connect(os.path.join(data_dir, filename))
+    try:
+        return pd.read_sql_query(query.sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def same_result(left: pd.DataFrame, right: pd.DataFrame) -> bool:
+    """Whether two results hold the same rows in the same order (floats compared to 6 decimals)."""
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+    for col in left.columns:
+        a, b = left[col].reset_index(drop=True), right[col].reset_index(drop=True)
+        if pd.api.types.is_float_dtype(a) or pd.api.types.is_float_dtype(b):
+            if not ((a.astype(float) - b.astype(float)).abs() < 1e-6).all():
+                return False
+        elif a.astype(str).tolist() != b.astype(str).tolist():
+            return False
+    return True
+
+
+def generate_dataset(scale: float, data_dir: str) -> Dict:
+    """
+    Generate the datasets the queries read at a scale factor.
+
+    Fact tables are written with the configured clustering and zone maps,
+    and every table is also loaded into the SQLite sink.
+
+    Returns:
+        Query parameters for the generated date range
+    """
+    config = build_config(scale)
+    inputs = Inputs(config)
+    campaigns = CampaignGenerator(inputs.products, config, RandomGenerator(seed=config['random_seed'])).generate_campaigns()
+    sqlite_config = config.get('sqlite', {})
+
+    write_csv(inputs.products, 'dim_products.csv', data_dir)
+    for df, filename in [(inputs.sales, 'fact_daily_sales.csv'), (inputs.transactions, 'fact_transactions.csv'),
+                         (campaigns, 'fact_campaign_performance.csv')]:
+        write_csv(df, filename, data_dir, **clustering_options(config, filename))
+    write_json(inputs.posts, 'social_media_posts.json', data_dir, **clustering_options(config, 'social_media_posts.json'))
+
+    tables = {
+        'dim_products': inputs.products,
+        'fact_daily_sales': inputs.sales,
+        'fact_transactions': inputs.transactions,
+        'fact_campaign_performance': campaigns,
+        'social_media_posts': inputs.posts
+    }
+    write_sqlite(
+        tables, {name: nova_data.schema(name) for name in tables}, 'nova.db', data_dir,
+        indexes=sqlite_config.get('indexes', {}), unique_keys=sqlite_config.get('unique_keys', {}),
+        batch_size=sqlite_config.get('batch_size', 50000)
+    )
+    end = datetime.strptime(config['date_range']['end_date'], '%Y-%m-%d')
+    return {'start': (end - timedelta(days=WINDOW_DAYS - 1)).strftime('%Y-%m-%d'), 'end': config['date_range']['end_date']}
+
+
+def time_query(func: Callable[[], pd.DataFrame], repeat: int) -> Dict:
+    """Run a query repeat times; returns its result and timings."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'result': result,
+        'seconds_median': round(statistics.median(timings), 4),
+        'seconds_min': round(min(timings), 4)
+    }
+
+
+def run_workload(data_dir: str, params: Dict, scale, repeat: int = 3, only: List[str] = None) -> List[Dict]:
+    """
+    Time every persona query in every format against one data directory.
+
+    Args:
+        data_dir: Directory with generated outputs and nova.db
+        params: Query parameters (start/end of the trend window)
+        scale: Scale factor label recorded with the results
+        repeat: Timed runs per query and format
+        only: Optional list of query name prefixes to run
+
+    Returns:
+        List of result dictionaries
+    """
+    results = []
+    for query in QUERIES:
+        if only and not any(query.name.startswith(prefix) for prefix in only):
+            continue
+        runs = {
+            'pandas': time_query(lambda: query.pandas(data_dir, params), repeat),
+            'sqlite': time_query(lambda: run_sql(data_dir, query, params), repeat)
+        }
+        matches = same_result(runs['pandas']['result'].reset_index(drop=True), runs['sqlite']['result'])
+        for fmt in FORMATS:
+            run = runs[fmt]
+            results.append({
+                'query': query.name,
+                'persona': query.persona,
+                'format': fmt,
+                'scale': scale,
+                'rows': len(run['result']),
+                'seconds_median': run['seconds_median'],
+                'seconds_min': run['seconds_min'],
+                'results_match': matches
+            })
+        fastest = min(FORMATS, key=lambda fmt: runs[fmt]['seconds_median'])
+        print(f"  {query.name:<30} scale={scale!s:<5} "
+              + '  '.join(f"{fmt}={runs[fmt]['seconds_median']:>8.4f}s" for fmt in FORMATS)
+              + f"  fastest={fastest:<6} {'✓' if matches else '✗ results differ'}")
+    return results
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Nova persona query benchmarks')
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES,
+                        help='Scale factors to generate and query')
+    parser.add_argument('--data-dir', help='Query an existing output directory (with nova.db) instead of generating')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per query and format')
+    parser.add_argument('--only', nargs='+', help='Run only queries with these name prefixes')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the persona query workload."""
+    args = parse_args(argv)
+    results = []
+
+    if args.data_dir:
+        print(f"Running persona queries against {args.data_dir} (repeat={args.repeat})")
+        results.extend(run_workload(args.data_dir, query_params(args.data_dir), 'existing', args.repeat, args.only))
+    else:
+        print(f"Running persona queries at scales {args.scales} (repeat={args.repeat})")
+        for scale in args.scales:
+            data_dir = tempfile.mkdtemp(prefix='nova-queries-')
+            try:
+                # Writers print one line per file; keep the workload output readable
+                stdout = sys.stdout
+                sys.stdout = open(os.devnull, 'w')
+                try:
+                    params = generate_dataset(scale, data_dir)
+                finally:
+                    sys.stdout.close()
+                    sys.stdout = stdout
+                results.extend(run_workload(data_dir, params, scale, args.repeat, args.only))
+            finally:
+                shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'repeat': args.repeat,
+                'window_days': WINDOW_DAYS,
+                'results': results
+            }, f, indent=2)
+        print(f"✓ Wrote persona query results to {args.output}")
+
+    mismatches = sorted({result['query'] for result in results if not result['results_match']})
+    if mismatches:
+        print(f"\n✗ Formats disagree on: {', '.join(mismatches)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
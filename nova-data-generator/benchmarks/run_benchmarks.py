@@ -0,0 +1,373 @@
+"""
+Benchmark harness for generators, writers and validators.
+
+Runs each component in isolation at several scale factors, records
+throughput and peak memory, and optionally compares the results with a
+saved JSON baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scales 0.5 1 2 --save-baseline baselines/baseline.json
+    python benchmarks/run_benchmarks.py --compare baselines/baseline.json --threshold 0.2
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from utils.random_utils import RandomGenerator
+from generators.product_generator import ProductGenerator
+from generators.sales_generator import SalesGenerator
+from generators.transaction_generator import TransactionGenerator
+from generators.campaign_generator import CampaignGenerator
+from generators.social_generator import SocialGenerator
+from generators.review_generator import ReviewGenerator
+from output.csv_writer import write_csv
+from output.json_writer import write_json
+from utils import validation_utils
+from utils import integrity_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(os.path.dirname(BENCHMARK_DIR), 'config', 'config.yaml')
+
+# Scale factor 1.0 corresponds to this many days of history
+BASE_DAYS = 180
+DEFAULT_SCALES = [0.5, 1.0, 2.0]
+
+
+def build_config(scale: float) -> Dict:
+    """
+    Build a generation config for a scale factor.
+
+    The date range, post volume and review volume grow linearly with the
+    scale factor; the product catalog stays fixed.
+
+    Args:
+        scale: Scale factor (1.0 = BASE_DAYS days of history)
+
+    Returns:
+        Configuration dictionary
+    """
+    with open(CONFIG_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+
+    start_date = datetime.strptime(config['date_range']['start_date'], '%Y-%m-%d')
+    # Products launch in the first months of the range, so keep the first
+    # 60 days as warm-up and scale the remainder
+    days = 60 + int(BASE_DAYS * scale)
+    config['date_range']['end_date'] = (start_date + timedelta(days=days)).strftime('%Y-%m-%d')
+    config['social_posts']['posts_per_product_per_month'] = max(1, int(50 * scale))
+    config['reviews']['min_per_product'] = max(1, int(50 * scale))
+    config['reviews']['max_per_product'] = max(2, int(150 * scale))
+    return config
+
+
+class Inputs:
+    """Lazily generated upstream inputs for a scale factor (not timed)."""
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self._cache = {}
+
+    def _rng(self) -> RandomGenerator:
+        return RandomGenerator(seed=self.config['random_seed'])
+
+    @property
+    def products(self) -> pd.DataFrame:
+        if 'products' not in self._cache:
+            self._cache['products'] = ProductGenerator(self.config, self._rng()).generate_products()
+        return self._cache['products']
+
+    @property
+    def sales(self) -> pd.DataFrame:
+        if 'sales' not in self._cache:
+            self._cache['sales'] = SalesGenerator(self.products, self.config, self._rng()).generate_daily_sales()
+        return self._cache['sales']
+
+    @property
+    def transactions(self) -> pd.DataFrame:
+        if 'transactions' not in self._cache:
+            self._cache['transactions'] = TransactionGenerator(
+                self.products, self.sales, self.config, self._rng()
+            ).generate_transactions()
+        return self._cache['transactions']
+
+    @property
+    def posts(self) -> List[Dict]:
+        if 'posts' not in self._cache:
+            self._cache['posts'] = SocialGenerator(self.products, self.config, self._rng()).generate_posts()
+        return self._cache['posts']
+
+
+def _len(result) -> int:
+    return len(result) if result is not None and hasattr(result, '__len__') else 0
+
+
+def benchmark_definitions(inputs: Inputs, tmp_dir: str) -> Dict[str, Callable[[], int]]:
+    """
+    Build benchmark callables for one scale factor.
+
+    Each callable runs a single component in isolation and returns the
+    number of rows it processed.
+
+    Args:
+        inputs: Upstream inputs for the scale factor
+        tmp_dir: Scratch directory for writer output
+
+    Returns:
+        Dictionary mapping benchmark name to callable
+    """
+    config = inputs.config
+
+    def rng():
+        return RandomGenerator(seed=config['random_seed'])
+
+    def validate_sales():
+        df = inputs.sales.copy()
+        validation_utils.validate_no_nulls(df, ['date', 'product_id', 'units_sold', 'revenue_usd'])
+        validation_utils.validate_numeric_range(df, 'units_sold', min_val=0)
+        validation_utils.validate_numeric_range(df, 'return_rate', min_val=0, max_val=1)
+        validation_utils.validate_date_range(df, 'date', config['date_range']['start_date'],
+                                             config['date_range']['end_date'])
+        validation_utils.validate_foreign_keys(df, 'product_id', inputs.products, 'product_id')
+        return len(df)
+
+    def validate_transactions():
+        df = inputs.transactions
+        validation_utils.validate_no_nulls(df, ['transaction_id', 'customer_id', 'product_id'])
+        validation_utils.validate_foreign_keys(df, 'product_id', inputs.products, 'product_id')
+        validation_utils.validate_distribution(df, 'customer_segment', {
+            'Tech Enthusiast': 0.25, 'Budget Conscious': 0.30,
+            'Premium Seeker': 0.20, 'Casual User': 0.25
+        }, tolerance=1.0)
+        return len(df)
+
+    def check_integrity():
+        relationships = [
+            relationship for relationship in config['validation']['integrity']['relationships']
+            if relationship['child'] in ('fact_daily_sales', 'fact_transactions')
+        ]
+        results = integrity_utils.run_integrity_checks(relationships, integrity_utils.table_chunks({
+            'dim_products': inputs.products,
+            'fact_daily_sales': inputs.sales,
+            'fact_transactions': inputs.transactions
+        }))
+        return sum(result['rows_checked'] for result in results.values())
+
+    return {
+        'generator.products': lambda: _len(ProductGenerator(config, rng()).generate_products()),
+        'generator.sales': lambda: _len(SalesGenerator(inputs.products, config, rng()).generate_daily_sales()),
+        'generator.transactions': lambda: _len(TransactionGenerator(
+            inputs.products, inputs.sales, config, rng()).generate_transactions()),
+        'generator.campaigns': lambda: _len(CampaignGenerator(inputs.products, config, rng()).generate_campaigns()),
+        'generator.social_posts': lambda: _len(SocialGenerator(inputs.products, config, rng()).generate_posts()),
+        'generator.reviews': lambda: _len(ReviewGenerator(
+            inputs.products, inputs.transactions, config, rng()).generate_reviews()),
+        'writer.csv_sales': lambda: (write_csv(inputs.sales, 'fact_daily_sales.csv', tmp_dir), len(inputs.sales))[1],
+        'writer.json_posts': lambda: (write_json(inputs.posts, 'social_media_posts.json', tmp_dir), len(inputs.posts))[1],
+        'validator.sales': validate_sales,
+        'validator.transactions': validate_transactions,
+        'validator.integrity': check_integrity,
+    }
+
+
+def measure(func: Callable[[], int], repeat: int, trace_memory: bool) -> Dict:
+    """
+    Time a benchmark callable and measure its peak Python heap usage.
+
+    Timing runs are done without tracemalloc (which slows allocation-heavy
+    code); peak memory is measured in one extra traced run.
+
+    Args:
+        func: Benchmark callable returning the number of rows processed
+        repeat: Number of timed runs
+        trace_memory: Whether to run the extra tracemalloc pass
+
+    Returns:
+        Dictionary with rows, timings, throughput and peak memory
+    """
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        rows = func()
+        timings.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = round(peak / (1024 * 1024), 2)
+
+    median = statistics.median(timings)
+    return {
+        'rows': rows,
+        'seconds_median': round(median, 4),
+        'seconds_min': round(min(timings), 4),
+        'rows_per_sec': round(rows / median, 1) if median > 0 else 0.0,
+        'peak_mb': peak_mb
+    }
+
+
+def run_benchmarks(scales: List[float], repeat: int = 3, only: List[str] = None,
+                   trace_memory: bool = True) -> Dict:
+    """
+    Run all benchmarks at every scale factor.
+
+    Args:
+        scales: Scale factors to run
+        repeat: Number of timed runs per benchmark
+        only: Optional list of benchmark name prefixes to run
+        trace_memory: Whether to measure peak memory
+
+    Returns:
+        Results dictionary suitable for saving as a baseline
+    """
+    results = []
+    tmp_dir = tempfile.mkdtemp(prefix='nova-bench-')
+    # Writers print one line per call; keep benchmark output readable
+    devnull = open(os.devnull, 'w')
+    try:
+        for scale in scales:
+            inputs = Inputs(build_config(scale))
+            for name, func in benchmark_definitions(inputs, tmp_dir).items():
+                if only and not any(name.startswith(prefix) for prefix in only):
+                    continue
+                # Materialize upstream inputs outside the timed region
+                stdout = sys.stdout
+                sys.stdout = devnull
+                try:
+                    func()
+                    result = measure(func, repeat, trace_memory)
+                finally:
+                    sys.stdout = stdout
+                result.update({'benchmark': name, 'scale': scale})
+                results.append(result)
+                peak = f"{result['peak_mb']:.1f} MB" if result['peak_mb'] is not None else 'n/a'
+                print(f"  {name:<26} scale={scale:<5} rows={result['rows']:>9,} "
+                      f"time={result['seconds_median']:>8.3f}s "
+                      f"{result['rows_per_sec']:>12,.0f} rows/s  peak={peak}")
+    finally:
+        devnull.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__
+        },
+        'repeat': repeat,
+        'base_days': BASE_DAYS,
+        'results': results
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compare a benchmark run with a baseline.
+
+    A benchmark regresses when its throughput drops, or its peak memory
+    grows, by more than the threshold fraction.
+
+    Args:
+        current: Results of the current run
+        baseline: Saved baseline results
+        threshold: Allowed relative change (e.g. 0.2 = 20%)
+
+    Returns:
+        List of regression messages (empty if none)
+    """
+    baseline_index = {(r['benchmark'], r['scale']): r for r in baseline['results']}
+    regressions = []
+
+    print(f"\n{'benchmark':<26} {'scale':>6} {'baseline rows/s':>16} {'current rows/s':>16} {'change':>8}")
+    for result in current['results']:
+        key = (result['benchmark'], result['scale'])
+        base = baseline_index.get(key)
+        if base is None:
+            continue
+
+        change = (result['rows_per_sec'] / base['rows_per_sec'] - 1) if base['rows_per_sec'] else 0.0
+        print(f"{key[0]:<26} {key[1]:>6} {base['rows_per_sec']:>16,.0f} "
+              f"{result['rows_per_sec']:>16,.0f} {change:>+8.1%}")
+        if change < -threshold:
+            regressions.append(f"{key[0]} @ scale {key[1]}: throughput {change:+.1%}")
+
+        if result.get('peak_mb') and base.get('peak_mb'):
+            mem_change = result['peak_mb'] / base['peak_mb'] - 1
+            if mem_change > threshold:
+                regressions.append(f"{key[0]} @ scale {key[1]}: peak memory {mem_change:+.1%}")
+
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Nova Data Generator benchmarks')
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES,
+                        help='Scale factors to run (1.0 = %d days of history)' % BASE_DAYS)
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark')
+    parser.add_argument('--only', nargs='+', help='Run only benchmarks with these name prefixes')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    parser.add_argument('--save-baseline', help='Save results as a baseline at this path')
+    parser.add_argument('--compare', help='Compare results against this baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative regression before failing (default: 0.2)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run benchmarks and optionally save or compare baselines."""
+    args = parse_args(argv)
+
+    print(f"Running benchmarks at scales {args.scales} (repeat={args.repeat})")
+    results = run_benchmarks(args.scales, args.repeat, args.only, trace_memory=not args.no_memory)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Wrote benchmark results to {path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  - {message}")
+            return 1
+        print(f"\n✓ No regressions beyond {args.threshold:.0%}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Latency benchmark for the review/post search index.
+
+Builds indexes over corpora of increasing size and times term, hashtag,
+phrase and filtered lookups. Records come from the generators and are
+repeated with new ids (and the same text, products and dates) up to the
+requested document count, so millions of documents can be indexed
+without generating years of data.
+
+Usage:
+    python benchmarks/search_latency.py
+    python benchmarks/search_latency.py --docs 100000 1000000 3000000 --output search_latency.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.run_benchmarks import Inputs, build_config
+from generators.review_generator import ReviewGenerator
+from utils.random_utils import RandomGenerator
+from utils.search_utils import CORPORA, SearchIndex, build_segment
+
+DEFAULT_DOCS = [100000, 1000000]
+
+# Queries per corpus: (kind, query, filters)
+QUERIES = {
+    'product_reviews': [
+        ('term', 'battery', {}),
+        ('term.rare', 'disappointing', {}),
+        ('terms', 'camera excellent', {}),
+        ('phrase', '"all-day battery"', {}),
+        ('phrase.long', '"exactly what i needed"', {}),
+        ('term.filtered', 'battery', {'products': 'PRIME-24', 'date_range': ('2022-04-01', '2022-06-30')}),
+        ('phrase.filtered', '"photo quality"', {'products': 'PRIME-24'}),
+    ],
+    'social_media_posts': [
+        ('term', 'camera', {}),
+        ('hashtag', '#novaprime', {}),
+        ('phrase', '"is amazing"', {}),
+        ('phrase.hashtags', '"#tech #recommended"', {}),
+        ('term.filtered', 'camera', {'products': 'PRIME-24', 'date_range': ('2022-05-01', '2022-05-31')}),
+    ]
+}
+
+
+def base_records(scale: float) -> Dict[str, List[Dict]]:
+    """Generated reviews and posts to repeat into larger corpora."""
+    inputs = Inputs(build_config(scale))
+    reviews = ReviewGenerator(
+        inputs.products, inputs.transactions, inputs.config, RandomGenerator(seed=inputs.config['random_seed'])
+    ).generate_reviews()
+    return {'product_reviews': reviews, 'social_media_posts': inputs.posts}
+
+
+def expand(records: List[Dict], corpus: str, count: int) -> Iterator[Dict]:
+    """Repeat records with new sequential ids up to count records (streamed, for bounded memory)."""
+    id_field = CORPORA[corpus]['id_field']
+    prefix = records[0][id_field].rstrip('0123456789')
+    width = len(records[0][id_field]) - len(prefix)
+    for i in range(count):
+        record = dict(records[i % len(records)])
+        record[id_field] = f'{prefix}{i + 1:0{width}d}'
+        yield record
+
+
+def time_lookups(index: SearchIndex, query: str, filters: Dict, repeat: int) -> Dict:
+    """Time a query; latencies in milliseconds."""
+    timings = []
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = index.count(query, **filters)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'matches': count,
+        'ms_p50': round(statistics.median(timings), 3),
+        'ms_p95': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'ms_max': round(timings[-1], 3)
+    }
+
+
+def run(doc_counts: List[int], repeat: int, scale: float) -> List[Dict]:
+    """Build an index per corpus and size and time every query against it."""
+    results = []
+    records = base_records(scale)
+    tmp_dir = tempfile.mkdtemp(prefix='nova-search-')
+    try:
+        for corpus, queries in QUERIES.items():
+            for count in doc_counts:
+                start = time.perf_counter()
+                meta = build_segment(expand(records[corpus], corpus, count), corpus, os.path.join(tmp_dir, corpus, 'base'))
+                build_seconds = time.perf_counter() - start
+                print(f"  {corpus} docs={count:>9,} build={build_seconds:7.2f}s "
+                      f"({count / build_seconds:,.0f} docs/s) index={meta['index_bytes'] / 1048576:.1f} MB "
+                      f"({meta['index_bytes'] / count:.1f} B/doc)")
+
+                index = SearchIndex(tmp_dir, corpus)
+                for kind, query, filters in queries:
+                    result = time_lookups(index, query, filters, repeat)
+                    result.update({
+                        'corpus': corpus, 'docs': count, 'kind': kind, 'query': query,
+                        'build_seconds': round(build_seconds, 3), 'index_bytes': meta['index_bytes']
+                    })
+                    results.append(result)
+                    print(f"    {kind:<16} {query:<28} matches={result['matches']:>9,} "
+                          f"p50={result['ms_p50']:>9.3f}ms p95={result['ms_p95']:>9.3f}ms")
+                shutil.rmtree(os.path.join(tmp_dir, corpus))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Nova search index latency benchmark')
+    parser.add_argument('--docs', type=int, nargs='+', default=DEFAULT_DOCS, help='Corpus sizes to index')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+    parser.add_argument('--scale', type=float, default=1.0, help='Scale factor of the generated base records')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run the search latency benchmark."""
+    args = parse_args(argv)
+    print(f"Running search latency benchmark at {args.docs} docs (repeat={args.repeat})")
+    results = run(args.docs, args.repeat, args.scale)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'repeat': args.repeat,
+                'numpy': np.__version__,
+                'results': results
+            }, f, indent=2)
+        print(f"✓ Wrote search latency results to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,12 +2,13 @@
 Campaign performance data generator.
 """
 import pandas as pd
-from typing import Dict
+from typing import Dict, List
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.random_utils import RandomGenerator
+from utils.profiling_utils import phase
 from utils.date_utils import parse_date, add_days, format_date
 
 
@@ -55,6 +56,25 @@ class CampaignGenerator:
     
     REGIONS = ['North America', 'Europe', 'Asia Pacific', 'Latin America', 'Middle East']
     
+    # Output columns and their logical types (used by nova_data.load)
+    OUTPUT_SCHEMA = {
+        'campaign_id': 'string',
+        'campaign_name': 'string',
+        'start_date': 'date',
+        'end_date': 'date',
+        'product_id': 'category',
+        'channel': 'category',
+        'region': 'category',
+        'budget_usd': 'int',
+        'impressions': 'int',
+        'clicks': 'int',
+        'ctr': 'float',
+        'conversions': 'int',
+        'conversion_rate': 'float',
+        'revenue_usd': 'float',
+        'roi': 'float'
+    }
+    
     def __init__(self, products_df: pd.DataFrame, config: Dict, rng: RandomGenerator):
         self.products_df = products_df
         self.config = config
@@ -66,66 +86,85 @@ class CampaignGenerator:
         campaign_id = 1
         
         for _, product in self.products_df.iterrows():
-            launch_date = parse_date(product['launch_date'])
-            
             # Generate 2-3 campaigns per product around launch
             num_campaigns = self.rng.randint(2, 3)
+            self.generate_product_campaigns(product, num_campaigns, campaign_id)
+            campaign_id += num_campaigns
+        
+        with phase('build_frame'):
+            df = pd.DataFrame(self.campaigns)
+        return df
+    
+    def generate_product_campaigns(self, product: pd.Series, num_campaigns: int, start_id: int = 1) -> List[Dict]:
+        """
+        Generate the campaigns of one product.
+        
+        Args:
+            product: Product row
+            num_campaigns: Number of campaigns
+            start_id: Sequence number of the first campaign
+        
+        Returns:
+            List of the product's campaign dictionaries (also appended to self.campaigns)
+        """
+        launch_date = parse_date(product['launch_date'])
+        campaigns = []
+        
+        for campaign_id in range(start_id, start_id + num_campaigns):
+            # Campaign timing (before and after launch)
+            days_offset = self.rng.randint(-30, 60)
+            start_date = add_days(launch_date, days_offset)
+            end_date = add_days(start_date, self.rng.randint(14, 45))
             
-            for i in range(num_campaigns):
-                # Campaign timing (before and after launch)
-                days_offset = self.rng.randint(-30, 60)
-                start_date = add_days(launch_date, days_offset)
-                end_date = add_days(start_date, self.rng.randint(14, 45))
-                
-                # Select channel and region
-                channel = self.rng.choice(list(self.CHANNELS.keys()))
-                region = self.rng.choice(self.REGIONS)
-                
-                # Get channel specs
-                specs = self.CHANNELS[channel]
-                
-                # Generate metrics
-                budget = self.rng.randint(specs['budget'][0], specs['budget'][1])
-                impressions = self.rng.randint(specs['impressions'][0], specs['impressions'][1])
-                
-                if specs['ctr'][1] > 0:
-                    ctr = self.rng.uniform(specs['ctr'][0], specs['ctr'][1])
-                    clicks = int(impressions * ctr)
-                    
-                    conversion_rate = self.rng.uniform(specs['conversion'][0], specs['conversion'][1])
-                    conversions = int(clicks * conversion_rate)
-                    
-                    # Estimate revenue (conversions * product price)
-                    revenue = conversions * product['price_usd']
-                else:
-                    ctr = 0
-                    clicks = 0
-                    conversion_rate = 0
-                    conversions = 0
-                    revenue = budget * self.rng.uniform(0.5, 1.5)  # Indirect effect
-                
-                # Calculate ROI
-                roi = (revenue - budget) / budget if budget > 0 else 0
+            # Select channel and region
+            channel = self.rng.choice(list(self.CHANNELS.keys()))
+            region = self.rng.choice(self.REGIONS)
+            
+            # Get channel specs
+            specs = self.CHANNELS[channel]
+            
+            # Generate metrics
+            budget = self.rng.randint(specs['budget'][0], specs['budget'][1])
+            impressions = self.rng.randint(specs['impressions'][0], specs['impressions'][1])
+            
+            if specs['ctr'][1] > 0:
+                ctr = self.rng.uniform(specs['ctr'][0], specs['ctr'][1])
+                clicks = int(impressions * ctr)
                 
-                campaign = {
-                    'campaign_id': f'CMP-{campaign_id:05d}',
-                    'campaign_name': f'{product["product_name"]} {channel} Campaign',
-                    'start_date': format_date(start_date),
-                    'end_date': format_date(end_date),
-                    'product_id': product['product_id'],
-                    'channel': channel,
-                    'region': region,
-                    'budget_usd': budget,
-                    'impressions': impressions,
-                    'clicks': clicks,
-                    'ctr': round(ctr, 4),
-                    'conversions': conversions,
-                    'conversion_rate': round(conversion_rate, 4),
-                    'revenue_usd': round(revenue, 2),
-                    'roi': round(roi, 2)
-                }
+                conversion_rate = self.rng.uniform(specs['conversion'][0], specs['conversion'][1])
+                conversions = int(clicks * conversion_rate)
                 
-                self.campaigns.append(campaign)
-                campaign_id += 1
+                # Estimate revenue (conversions * product price)
+                revenue = conversions * product['price_usd']
+            else:
+                ctr = 0
+                clicks = 0
+                conversion_rate = 0
+                conversions = 0
+                revenue = budget * self.rng.uniform(0.5, 1.5)  # Indirect effect
+            
+            # Calculate ROI
+            roi = (revenue - budget) / budget if budget > 0 else 0
+            
+            campaign = {
+                'campaign_id': f'CMP-{campaign_id:05d}',
+                'campaign_name': f'{product["product_name"]} {channel} Campaign',
+                'start_date': format_date(start_date),
+                'end_date': format_date(end_date),
+                'product_id': product['product_id'],
+                'channel': channel,
+                'region': region,
+                'budget_usd': budget,
+                'impressions': impressions,
+                'clicks': clicks,
+                'ctr': round(ctr, 4),
+                'conversions': conversions,
+                'conversion_rate': round(conversion_rate, 4),
+                'revenue_usd': round(revenue, 2),
+                'roi': round(roi, 2)
+            }
+            
+            campaigns.append(campaign)
         
-        return pd.DataFrame(self.campaigns)
+        self.campaigns.extend(campaigns)
+        return campaigns
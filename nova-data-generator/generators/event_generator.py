@@ -0,0 +1,132 @@
+"""
+Real-time event generator.
+"""
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Tuple
+import sys
+import os
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.random_utils import RandomGenerator
+from generators.sales_generator import SalesGenerator
+from generators.transaction_generator import TransactionGenerator
+from generators.social_generator import SocialGenerator
+from generators.review_generator import ReviewGenerator
+
+
+class EventGenerator:
+    """
+    Generate an endless stream of transaction, social post and review events.
+
+    Records are built by the batch generators' per-record methods, so events
+    have the same fields and distributions as the generated files, but are
+    stamped with the time they are emitted. Reviews are written for recently
+    streamed transactions.
+    """
+
+    EVENT_TYPES = ['transaction', 'social_post', 'review']
+
+    # Default share of each event type
+    DEFAULT_MIX = {
+        'transaction': 0.80,
+        'social_post': 0.15,
+        'review': 0.05
+    }
+
+    def __init__(self, products_df: pd.DataFrame, config: Dict, rng: RandomGenerator,
+                 mix: Dict[str, float] = None, max_customers: int = 100000, review_pool: int = 10000):
+        """
+        Initialize event generator.
+
+        Args:
+            products_df: Product dimension
+            config: Generator configuration
+            rng: Random generator
+            mix: Share of each event type (normalized)
+            max_customers: Repeat customers remembered for is_repeat_customer/previous_product_id
+            review_pool: Recent transactions that reviews are drawn from
+        """
+        self.rng = rng
+        self.products = products_df.to_dict('records')
+        self.products_by_id = {product['product_id']: product for product in self.products}
+        self.transaction_gen = TransactionGenerator(products_df, None, config, rng)
+        self.social_gen = SocialGenerator(products_df, config, rng)
+        self.review_gen = ReviewGenerator(products_df, None, config, rng)
+        self.max_customers = max_customers
+        self.recent_transactions = deque(maxlen=review_pool)
+
+        mix = mix or self.DEFAULT_MIX
+        self.type_weights = [mix.get(event_type, 0.0) for event_type in self.EVENT_TYPES]
+        self.regions = list(SalesGenerator.REGIONS)
+        self.region_weights = list(SalesGenerator.REGIONS.values())
+        self.channels = list(SalesGenerator.CHANNELS)
+        self.channel_weights = [channel['weight'] for channel in SalesGenerator.CHANNELS.values()]
+        self.sequence = {event_type: 0 for event_type in self.EVENT_TYPES}
+
+    def _next_id(self, event_type: str) -> int:
+        """Next sequence number of an event type."""
+        self.sequence[event_type] += 1
+        return self.sequence[event_type]
+
+    def _transaction(self, timestamp: str, region: str, channel: str) -> Dict:
+        """A purchase of a random product in a region and channel."""
+        product = self.rng.choice(self.products)
+        sale = {
+            'product_id': product['product_id'],
+            'region': region,
+            'country': self.rng.choice(SalesGenerator.COUNTRIES[region]),
+            'channel': channel,
+            'channel_type': SalesGenerator.CHANNELS[channel]['type']
+        }
+        transaction = self.transaction_gen._build_transaction(
+            sale, product, self._next_id('transaction'), timestamp
+        )
+        self.recent_transactions.append(transaction)
+        return transaction
+
+    def _social_post(self, now: datetime, timestamp: str) -> Dict:
+        """A post mentioning a random product."""
+        post = self.social_gen._build_post(self.rng.choice(self.products), now, self._next_id('social_post'))
+        post['timestamp'] = f'{timestamp}Z'
+        return post
+
+    def _review(self, timestamp: str) -> Dict:
+        """A review of a recently streamed purchase."""
+        txn = self.rng.choice(self.recent_transactions)
+        review = self.review_gen._build_review(self.products_by_id[txn['product_id']], txn, self._next_id('review'))
+        review['review_datetime'] = timestamp
+        return review
+
+    def generate(self, count: int, now: datetime) -> List[Tuple[str, Dict]]:
+        """
+        Generate a batch of events.
+
+        Args:
+            count: Number of events
+            now: Event time (UTC)
+
+        Returns:
+            List of (event_type, record) tuples
+        """
+        # Draw per batch rather than per event; all events of a batch share its time
+        timestamp = now.strftime('%Y-%m-%dT%H:%M:%S')
+        regions = self.rng.choices(self.regions, self.region_weights, k=count)
+        channels = self.rng.choices(self.channels, self.channel_weights, k=count)
+
+        events = []
+        for i, event_type in enumerate(self.rng.choices(self.EVENT_TYPES, self.type_weights, k=count)):
+            if event_type == 'review' and not self.recent_transactions:
+                event_type = 'transaction'
+            if event_type == 'transaction':
+                events.append((event_type, self._transaction(timestamp, regions[i], channels[i])))
+            elif event_type == 'social_post':
+                events.append((event_type, self._social_post(now, timestamp)))
+            else:
+                events.append((event_type, self._review(timestamp)))
+
+        # Trim in large steps so the customer list is rebuilt rarely
+        if len(self.transaction_gen.customer_ids) > 2 * self.max_customers:
+            self.transaction_gen.forget_customers(self.max_customers)
+        return events
@@ -9,6 +9,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.random_utils import RandomGenerator
+from utils.profiling_utils import phase
 from utils.date_utils import format_date, parse_date, add_months
 
 
@@ -97,6 +98,25 @@ class ProductGenerator:
         'Phantom Black,Cream,Lavender'
     ]
     
+    # Output columns and their logical types (used by nova_data.load)
+    OUTPUT_SCHEMA = {
+        'product_id': 'string',
+        'product_name': 'string',
+        'product_line': 'category',
+        'series': 'int',
+        'launch_date': 'date',
+        'discontinue_date': 'date',
+        'price_usd': 'int',
+        'camera_mp': 'int',
+        'battery_mah': 'int',
+        'display_inch': 'float',
+        'storage_gb': 'int',
+        'ram_gb': 'int',
+        'processor': 'category',
+        'color_options': 'string',
+        'weight_g': 'int'
+    }
+    
     def __init__(self, config: Dict, rng: RandomGenerator):
         """
         Initialize product generator.
@@ -125,7 +145,8 @@ class ProductGenerator:
             
             self._generate_product_line(line_name, series_count, start_date)
         
-        df = pd.DataFrame(self.products)
+        with phase('build_frame'):
+            df = pd.DataFrame(self.products)
         return df
     
     def _generate_product_line(self, line_name: str, series_count: int, start_date: datetime):
@@ -17,6 +17,25 @@ class ReviewGenerator:
     
     RATING_DISTRIBUTION = {5: 0.40, 4: 0.30, 3: 0.15, 2: 0.10, 1: 0.05}
     
+    # Output fields and their logical types (used by nova_data.load)
+    OUTPUT_SCHEMA = {
+        'review_id': 'string',
+        'product_id': 'category',
+        'customer_id': 'string',
+        'review_datetime': 'datetime',
+        'purchase_datetime': 'datetime',
+        'verified_purchase': 'bool',
+        'rating': 'int',
+        'review_title': 'string',
+        'review_text': 'string',
+        'pros': 'list',
+        'cons': 'list',
+        'helpful_votes': 'int',
+        'total_votes': 'int',
+        'reviewer_profile': 'object',
+        'variant': 'object'
+    }
+    
     def __init__(self, products_df: pd.DataFrame, transactions_df: pd.DataFrame, 
                  config: Dict, rng: RandomGenerator):
         self.products_df = products_df
@@ -25,11 +44,27 @@ class ReviewGenerator:
         self.rng = rng
         self.reviews = []
     
-    def generate_reviews(self) -> List[Dict]:
-        """Generate product reviews."""
-        review_id = 1
+    def generate_reviews(self, checkpoint=None) -> List[Dict]:
+        """
+        Generate product reviews.
+        
+        Args:
+            checkpoint: Optional StepCheckpoint; each product is committed as one chunk
+        
+        Returns:
+            List of review dictionaries
+        """
+        # Resume after the last completed product
+        first_chunk = 0
+        if checkpoint:
+            self.reviews, first_chunk = checkpoint.resume(self.rng)
+        review_id = len(self.reviews) + 1
         
-        for _, product in self.products_df.iterrows():
+        for chunk, (_, product) in enumerate(self.products_df.iterrows()):
+            if chunk < first_chunk:
+                continue
+            chunk_start = len(self.reviews)
+            
             # Get transactions for this product
             product_transactions = self.transactions_df[
                 self.transactions_df['product_id'] == product['product_id']
@@ -48,80 +83,131 @@ class ReviewGenerator:
                     random_state=self.rng.seed
                 )
             else:
-                continue
+                sampled_txns = product_transactions
             
             for _, txn in sampled_txns.iterrows():
-                # Select rating based on distribution
-                rating = self.rng.weighted_choice(
-                    list(self.RATING_DISTRIBUTION.keys()),
-                    list(self.RATING_DISTRIBUTION.values())
-                )
-                
-                # Review date (7-30 days after purchase)
-                # Parse transaction_datetime (now includes time)
-                if 'T' in txn['transaction_datetime']:
-                    purchase_date = parse_date(txn['transaction_datetime'].split('T')[0])
-                else:
-                    purchase_date = parse_date(txn['transaction_datetime'])
-                
-                days_after = self.rng.randint(7, 30)
-                review_date = add_days(purchase_date, days_after)
-                
-                # Add random time for review
-                hour = self.rng.randint(0, 23)
-                minute = self.rng.randint(0, 59)
-                second = self.rng.randint(0, 59)
-                review_date = review_date.replace(hour=hour, minute=minute, second=second)
-                
-                # Generate review text
-                review_content = generate_review_text(rating, product['product_name'], self.rng)
-                
-                # Generate pros/cons
-                pros_cons = generate_pros_cons(rating, self.rng)
-                
-                # Verified purchase (85%)
-                verified_purchase = self.rng.random() < 0.85
-                
-                # Helpful votes (higher ratings get more votes)
-                if rating >= 4:
-                    total_votes = self.rng.randint(10, 100)
-                    helpful_votes = int(total_votes * self.rng.uniform(0.7, 0.95))
-                else:
-                    total_votes = self.rng.randint(5, 50)
-                    helpful_votes = int(total_votes * self.rng.uniform(0.5, 0.8))
-                
-                # Reviewer profile
-                reviewer_profile = {
-                    'total_reviews': self.rng.randint(1, 50),
-                    'verified_purchases': self.rng.randint(1, 40)
-                }
-                
-                # Variant (color and storage from product)
-                colors = product['color_options'].split(',')
-                variant = {
-                    'color': self.rng.choice(colors),
-                    'storage': f"{product['storage_gb']}GB"
-                }
-                
-                review = {
-                    'review_id': f'REV-{review_id:08d}',
-                    'product_id': product['product_id'],
-                    'customer_id': txn['customer_id'],
-                    'review_datetime': review_date.strftime('%Y-%m-%dT%H:%M:%S'),
-                    'purchase_datetime': txn['transaction_datetime'],
-                    'verified_purchase': verified_purchase,
-                    'rating': rating,
-                    'review_title': review_content['title'],
-                    'review_text': review_content['text'],
-                    'pros': pros_cons['pros'],
-                    'cons': pros_cons['cons'],
-                    'helpful_votes': helpful_votes,
-                    'total_votes': total_votes,
-                    'reviewer_profile': reviewer_profile,
-                    'variant': variant
-                }
-                
+                review = self._build_review(product, txn, review_id)
                 self.reviews.append(review)
                 review_id += 1
+            
+            if checkpoint:
+                checkpoint.commit(chunk, self.reviews[chunk_start:], self.rng)
         
         return self.reviews
+    
+    def generate_reviews_for_transactions(self, review_rate: float, start_id: int = 1) -> List[Dict]:
+        """
+        Generate reviews for a batch of new transactions (used for incremental runs).
+        
+        Args:
+            review_rate: Probability that a transaction receives a review
+            start_id: Sequence number of the first review
+        
+        Returns:
+            List of review dictionaries
+        """
+        review_id = start_id
+        products = self.products_df.set_index('product_id', drop=False)
+        
+        for _, txn in self.transactions_df.iterrows():
+            if self.rng.random() >= review_rate:
+                continue
+            review = self._build_review(products.loc[txn['product_id']], txn, review_id)
+            self.reviews.append(review)
+            review_id += 1
+        
+        return self.reviews
+    
+    def generate_reviews_for_count(self, count: int, start_id: int = 1) -> List[Dict]:
+        """
+        Generate a planned number of reviews for distinct transactions (used for sharded runs).
+        
+        Args:
+            count: Number of reviews (capped at the number of transactions)
+            start_id: Sequence number of the first review
+        
+        Returns:
+            List of review dictionaries in transaction order
+        """
+        products = self.products_df.set_index('product_id', drop=False)
+        rows = sorted(self.rng.sample(range(len(self.transactions_df)), min(count, len(self.transactions_df))))
+        
+        for review_id, row in enumerate(rows, start=start_id):
+            txn = self.transactions_df.iloc[row]
+            self.reviews.append(self._build_review(products.loc[txn['product_id']], txn, review_id))
+        
+        return self.reviews
+    
+    def _build_review(self, product: pd.Series, txn: pd.Series, review_id: int) -> Dict:
+        """Build a single review of a product for a purchase transaction."""
+        # Select rating based on distribution
+        rating = self.rng.weighted_choice(
+            list(self.RATING_DISTRIBUTION.keys()),
+            list(self.RATING_DISTRIBUTION.values())
+        )
+        
+        # Review date (7-30 days after purchase)
+        # Parse transaction_datetime (now includes time)
+        if 'T' in txn['transaction_datetime']:
+            purchase_date = parse_date(txn['transaction_datetime'].split('T')[0])
+        else:
+            purchase_date = parse_date(txn['transaction_datetime'])
+        
+        days_after = self.rng.randint(7, 30)
+        review_date = add_days(purchase_date, days_after)
+        
+        # Add random time for review
+        hour = self.rng.randint(0, 23)
+        minute = self.rng.randint(0, 59)
+        second = self.rng.randint(0, 59)
+        review_date = review_date.replace(hour=hour, minute=minute, second=second)
+        
+        # Generate review text
+        review_content = generate_review_text(rating, product['product_name'], self.rng)
+        
+        # Generate pros/cons
+        pros_cons = generate_pros_cons(rating, self.rng)
+        
+        # Verified purchase (85%)
+        verified_purchase = self.rng.random() < 0.85
+        
+        # Helpful votes (higher ratings get more votes)
+        if rating >= 4:
+            total_votes = self.rng.randint(10, 100)
+            helpful_votes = int(total_votes * self.rng.uniform(0.7, 0.95))
+        else:
+            total_votes = self.rng.randint(5, 50)
+            helpful_votes = int(total_votes * self.rng.uniform(0.5, 0.8))
+        
+        # Reviewer profile
+        reviewer_profile = {
+            'total_reviews': self.rng.randint(1, 50),
+            'verified_purchases': self.rng.randint(1, 40)
+        }
+        
+        # Variant (color and storage from product)
+        colors = product['color_options'].split(',')
+        variant = {
+            'color': self.rng.choice(colors),
+            'storage': f"{product['storage_gb']}GB"
+        }
+        
+        review = {
+            'review_id': f'REV-{review_id:08d}',
+            'product_id': product['product_id'],
+            'customer_id': txn['customer_id'],
+            'review_datetime': review_date.strftime('%Y-%m-%dT%H:%M:%S'),
+            'purchase_datetime': txn['transaction_datetime'],
+            'verified_purchase': verified_purchase,
+            'rating': rating,
+            'review_title': review_content['title'],
+            'review_text': review_content['text'],
+            'pros': pros_cons['pros'],
+            'cons': pros_cons['cons'],
+            'helpful_votes': helpful_votes,
+            'total_votes': total_votes,
+            'reviewer_profile': reviewer_profile,
+            'variant': variant
+        }
+        
+        return review
@@ -1,6 +1,7 @@
 """
 Sales fact data generator.
 """
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict
@@ -9,10 +10,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.random_utils import RandomGenerator
-from utils.date_utils import (
-    generate_date_range, parse_date, get_days_between,
-    is_holiday_season, is_back_to_school_season
-)
+from utils.profiling_utils import phase
+from utils.date_utils import parse_date, Calendar
 
 
 class SalesGenerator:
@@ -59,7 +58,21 @@ class SalesGenerator:
         'Mini': (0.03, 0.04)
     }
     
-    def __init__(self, products_df: pd.DataFrame, config: Dict, rng: RandomGenerator):
+    # Output columns and their logical types (used by nova_data.load)
+    OUTPUT_SCHEMA = {
+        'date': 'date',
+        'product_id': 'category',
+        'region': 'category',
+        'country': 'category',
+        'channel': 'category',
+        'channel_type': 'category',
+        'units_sold': 'int',
+        'revenue_usd': 'int',
+        'units_returned': 'int',
+        'return_rate': 'float'
+    }
+    
+    def __init__(self, products_df: pd.DataFrame, config: Dict, rng: RandomGenerator, calendar: Calendar = None):
         """
         Initialize sales generator.
         
@@ -67,27 +80,43 @@ class SalesGenerator:
             products_df: Product master DataFrame
             config: Configuration dictionary
             rng: Random generator instance
+            calendar: Calendar covering the configured date range (built from config if omitted)
         """
         self.products_df = products_df
         self.config = config
         self.rng = rng
+        self.calendar = calendar or Calendar(config['date_range']['start_date'], config['date_range']['end_date'])
         self.sales_data = []
     
-    def generate_daily_sales(self) -> pd.DataFrame:
+    def generate_daily_sales(self, checkpoint=None) -> pd.DataFrame:
         """
         Generate daily sales data for all products.
         
+        Args:
+            checkpoint: Optional StepCheckpoint; each product is committed as one chunk
+        
         Returns:
             DataFrame with daily sales data
         """
         start_date = parse_date(self.config['date_range']['start_date'])
         end_date = parse_date(self.config['date_range']['end_date'])
         
+        # Resume after the last completed product
+        first_chunk = 0
+        if checkpoint:
+            self.sales_data, first_chunk = checkpoint.resume(self.rng)
+        
         # Generate sales for each product
-        for _, product in self.products_df.iterrows():
+        for chunk, (_, product) in enumerate(self.products_df.iterrows()):
+            if chunk < first_chunk:
+                continue
+            chunk_start = len(self.sales_data)
             self._generate_product_sales(product, start_date, end_date)
+            if checkpoint:
+                checkpoint.commit(chunk, self.sales_data[chunk_start:], self.rng)
         
-        df = pd.DataFrame(self.sales_data)
+        with phase('build_frame'):
+            df = pd.DataFrame(self.sales_data)
         return df
 
     
@@ -100,22 +129,24 @@ class SalesGenerator:
         sales_start = max(product_launch, start_date)
         sales_end = min(product_discontinue, end_date)
         
-        if sales_start >= sales_end:
+        if sales_start > sales_end:
             return
         
-        # Generate date range
-        dates = generate_date_range(sales_start.strftime('%Y-%m-%d'), sales_end.strftime('%Y-%m-%d'), freq='D')
+        # Date attributes of the selling days, looked up from the calendar
+        first, last = self.calendar.index_of(sales_start), self.calendar.index_of(sales_end) + 1
+        dates = self.calendar.dates[first:last]
+        lifecycle_units = self.lifecycle_units(self.calendar.days_since(product_launch)[first:last]).tolist()
+        seasonal_multipliers = self.calendar.seasonal_multiplier[first:last].tolist()
         
         # Get return rate range for this product line
         return_rate_range = self.RETURN_RATES.get(product['product_line'], (0.03, 0.04))
         
-        for date in dates:
-            # Calculate lifecycle stage
-            days_since_launch = get_days_between(product_launch, date)
-            base_units = self._get_base_units_by_lifecycle(days_since_launch)
+        for date, base_units, seasonal_multiplier in zip(dates, lifecycle_units, seasonal_multipliers):
+            # Maturity-stage volume varies day to day
+            if base_units < 0:
+                base_units = self.rng.randint(80, 120)
             
             # Apply seasonality
-            seasonal_multiplier = self._get_seasonal_multiplier(date)
             base_units = int(base_units * seasonal_multiplier)
             
             # Generate sales for each region and channel
@@ -141,7 +172,7 @@ class SalesGenerator:
                     units_returned = int(units_sold * return_rate)
                     
                     sale_record = {
-                        'date': date.strftime('%Y-%m-%d'),
+                        'date': date,
                         'product_id': product['product_id'],
                         'region': region,
                         'country': country,
@@ -155,47 +186,28 @@ class SalesGenerator:
                     
                     self.sales_data.append(sale_record)
     
-    def _get_base_units_by_lifecycle(self, days_since_launch: int) -> int:
+    @staticmethod
+    def lifecycle_units(days_since_launch: np.ndarray, maturity_units: int = -1) -> np.ndarray:
         """
         Get base daily units based on product lifecycle stage.
         
         Args:
-            days_since_launch: Number of days since product launch
-        
-        Returns:
-            Base daily units (reduced for demo purposes)
-        """
-        if days_since_launch < 90:  # 0-3 months: Introduction
-            # Gradual increase from 5 to 20
-            return int(5 + (days_since_launch / 90) * 15)
-        elif days_since_launch < 365:  # 3-12 months: Growth
-            # Increase from 20 to 100
-            progress = (days_since_launch - 90) / 275
-            return int(20 + progress * 80)
-        elif days_since_launch < 730:  # 12-24 months: Maturity
-            # Maintain high sales 80-120
-            return self.rng.randint(80, 120)
-        else:  # 24+ months: Decline
-            # Gradual decrease from 60 to 30
-            days_in_decline = days_since_launch - 730
-            decline_factor = max(0.3, 1 - (days_in_decline / 365) * 0.5)
-            return int(60 * decline_factor)
-    
-    def _get_seasonal_multiplier(self, date: datetime) -> float:
-        """
-        Get seasonal multiplier for sales.
-        
-        Args:
-            date: Date to check
+            days_since_launch: Number of days since product launch, per day
+            maturity_units: Value for days in the maturity stage, whose units
+                are drawn per day (randint(80, 120)) by the caller
         
         Returns:
-            Multiplier (1.0 = normal, >1.0 = increased sales)
+            Base daily units per day (reduced for demo purposes)
         """
-        if is_holiday_season(date):
-            return 1.25  # +25% for holiday season
-        elif is_back_to_school_season(date):
-            return 1.15  # +15% for back-to-school
-        elif date.month in [1, 2]:
-            return 0.90  # -10% for post-holiday slowdown
-        else:
-            return 1.0
+        days = np.asarray(days_since_launch, dtype=float)
+        # 24+ months: Decline, gradual decrease from 60 to 30
+        decline_factor = np.maximum(0.3, 1 - ((days - 730) / 365) * 0.5)
+        return np.select(
+            [days < 90, days < 365, days < 730],
+            [
+                np.floor(5 + (days / 90) * 15),           # 0-3 months: Introduction, 5 to 20
+                np.floor(20 + ((days - 90) / 275) * 80),  # 3-12 months: Growth, 20 to 100
+                maturity_units                            # 12-24 months: Maturity, 80-120
+            ],
+            np.floor(60 * decline_factor)
+        ).astype(int)
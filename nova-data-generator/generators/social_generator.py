@@ -20,17 +20,54 @@ class SocialGenerator:
     PLATFORMS = ['Twitter', 'Instagram', 'Facebook']
     SENTIMENT_DISTRIBUTION = {'positive': 0.60, 'neutral': 0.25, 'negative': 0.15}
     
+    # Output fields and their logical types (used by nova_data.load)
+    OUTPUT_SCHEMA = {
+        'post_id': 'string',
+        'timestamp': 'datetime',
+        'platform': 'category',
+        'user_id': 'string',
+        'user_followers': 'int',
+        'text': 'string',
+        'product_mentioned': 'category',
+        'hashtags': 'list',
+        'sentiment': 'category',
+        'sentiment_score': 'float',
+        'engagement': 'object',
+        'language': 'category'
+    }
+    
     def __init__(self, products_df: pd.DataFrame, config: Dict, rng: RandomGenerator):
         self.products_df = products_df
         self.config = config
         self.rng = rng
         self.posts = []
     
-    def generate_posts(self) -> List[Dict]:
-        """Generate social media posts."""
-        post_id = 1
+    def generate_posts(self, checkpoint=None) -> List[Dict]:
+        """
+        Generate social media posts.
+        
+        Each product is mentioned for 6 months after launch; posts dated
+        outside date_range are not generated, so an incremental run that
+        starts the day after end_date does not repeat them.
+        
+        Args:
+            checkpoint: Optional StepCheckpoint; each product is committed as one chunk
         
-        for _, product in self.products_df.iterrows():
+        Returns:
+            List of post dictionaries
+        """
+        # Resume after the last completed product
+        first_chunk = 0
+        if checkpoint:
+            self.posts, first_chunk = checkpoint.resume(self.rng)
+        post_id = len(self.posts) + 1
+        start_date = parse_date(self.config['date_range']['start_date'])
+        end_date = parse_date(self.config['date_range']['end_date'])
+        
+        for chunk, (_, product) in enumerate(self.products_df.iterrows()):
+            if chunk < first_chunk:
+                continue
+            chunk_start = len(self.posts)
             launch_date = parse_date(product['launch_date'])
             
             # Generate posts for 6 months after launch
@@ -45,66 +82,121 @@ class SocialGenerator:
                     # Random date in this month
                     days_offset = month * 30 + self.rng.randint(0, 29)
                     post_date = add_days(launch_date, days_offset)
+                    if post_date < start_date or post_date > end_date:
+                        continue
                     
-                    # Add random time (24 hours)
-                    hour = self.rng.randint(0, 23)
-                    minute = self.rng.randint(0, 59)
-                    second = self.rng.randint(0, 59)
-                    post_date = post_date.replace(hour=hour, minute=minute, second=second)
-                    
-                    # Select sentiment
-                    sentiment = self.rng.weighted_choice(
-                        list(self.SENTIMENT_DISTRIBUTION.keys()),
-                        list(self.SENTIMENT_DISTRIBUTION.values())
-                    )
-                    
-                    # Generate post text
-                    text = generate_social_post(sentiment, product['product_name'], self.rng)
-                    
-                    # Generate hashtags
-                    hashtags = generate_hashtags(product['product_line'], sentiment, self.rng)
-                    
-                    # Sentiment score
-                    if sentiment == 'positive':
-                        sentiment_score = self.rng.uniform(0.5, 1.0)
-                    elif sentiment == 'negative':
-                        sentiment_score = self.rng.uniform(-1.0, -0.5)
-                    else:
-                        sentiment_score = self.rng.uniform(-0.3, 0.3)
-                    
-                    # Engagement metrics
-                    platform = self.rng.choice(self.PLATFORMS)
-                    followers = self.rng.randint(100, 50000)
-                    
-                    if sentiment == 'positive':
-                        likes = int(followers * self.rng.uniform(0.02, 0.10))
-                        comments = int(likes * self.rng.uniform(0.05, 0.15))
-                        shares = int(likes * self.rng.uniform(0.02, 0.08))
-                    else:
-                        likes = int(followers * self.rng.uniform(0.005, 0.03))
-                        comments = int(likes * self.rng.uniform(0.10, 0.25))
-                        shares = int(likes * self.rng.uniform(0.01, 0.05))
-                    
-                    post = {
-                        'post_id': f'SM-{post_id:08d}',
-                        'timestamp': post_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                        'platform': platform,
-                        'user_id': f'user_{self.rng.randint(10000, 99999)}',
-                        'user_followers': followers,
-                        'text': text,
-                        'product_mentioned': product['product_id'],
-                        'hashtags': hashtags,
-                        'sentiment': sentiment,
-                        'sentiment_score': round(sentiment_score, 2),
-                        'engagement': {
-                            'likes': likes,
-                            'comments': comments,
-                            'shares': shares
-                        },
-                        'language': 'en'
-                    }
-                    
+                    post = self._build_post(product, post_date, post_id)
                     self.posts.append(post)
                     post_id += 1
+            
+            if checkpoint:
+                checkpoint.commit(chunk, self.posts[chunk_start:], self.rng)
         
         return self.posts
+    
+    def generate_posts_for_window(self, start_date: datetime, end_date: datetime, start_id: int = 1,
+                                  daily_counts=None) -> List[Dict]:
+        """
+        Generate posts dated within a window (used for incremental runs).
+        
+        Posts follow the same 6-month post-launch pattern as generate_posts(),
+        spread as a daily Poisson volume over the days in the window.
+        
+        Args:
+            start_date: First day of the window
+            end_date: Last day of the window (inclusive)
+            start_id: Sequence number of the first post
+            daily_counts: Optional planned posts per product (row) and day (column), used
+                instead of drawing the Poisson volume (sharded runs)
+        
+        Returns:
+            List of post dictionaries
+        """
+        post_id = start_id
+        days = (end_date - start_date).days + 1
+        
+        for index, (_, product) in enumerate(self.products_df.iterrows()):
+            launch_date = parse_date(product['launch_date'])
+            
+            for day in range(days):
+                post_date = add_days(start_date, day)
+                days_offset = (post_date - launch_date).days
+                if days_offset < 0 or days_offset >= 180:
+                    continue
+                
+                if daily_counts is not None:
+                    num_posts = int(daily_counts[index, day])
+                else:
+                    posts_this_month = self.config['social_posts']['posts_per_product_per_month']
+                    if days_offset < 30:
+                        posts_this_month = int(posts_this_month * 1.5)
+                    num_posts = self.rng.poisson(posts_this_month / 30)
+                
+                for _ in range(num_posts):
+                    post = self._build_post(product, post_date, post_id)
+                    self.posts.append(post)
+                    post_id += 1
+        
+        return self.posts
+    
+    def _build_post(self, product: pd.Series, post_date: datetime, post_id: int) -> Dict:
+        """Build a single post for a product on a given day."""
+        # Add random time (24 hours)
+        hour = self.rng.randint(0, 23)
+        minute = self.rng.randint(0, 59)
+        second = self.rng.randint(0, 59)
+        post_date = post_date.replace(hour=hour, minute=minute, second=second)
+        
+        # Select sentiment
+        sentiment = self.rng.weighted_choice(
+            list(self.SENTIMENT_DISTRIBUTION.keys()),
+            list(self.SENTIMENT_DISTRIBUTION.values())
+        )
+        
+        # Generate post text
+        text = generate_social_post(sentiment, product['product_name'], self.rng)
+        
+        # Generate hashtags
+        hashtags = generate_hashtags(product['product_line'], sentiment, self.rng)
+        
+        # Sentiment score
+        if sentiment == 'positive':
+            sentiment_score = self.rng.uniform(0.5, 1.0)
+        elif sentiment == 'negative':
+            sentiment_score = self.rng.uniform(-1.0, -0.5)
+        else:
+            sentiment_score = self.rng.uniform(-0.3, 0.3)
+        
+        # Engagement metrics
+        platform = self.rng.choice(self.PLATFORMS)
+        followers = self.rng.randint(100, 50000)
+        
+        if sentiment == 'positive':
+            likes = int(followers * self.rng.uniform(0.02, 0.10))
+            comments = int(likes * self.rng.uniform(0.05, 0.15))
+            shares = int(likes * self.rng.uniform(0.02, 0.08))
+        else:
+            likes = int(followers * self.rng.uniform(0.005, 0.03))
+            comments = int(likes * self.rng.uniform(0.10, 0.25))
+            shares = int(likes * self.rng.uniform(0.01, 0.05))
+        
+        post = {
+            'post_id': f'SM-{post_id:08d}',
+            'timestamp': post_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'platform': platform,
+            'user_id': f'user_{self.rng.randint(10000, 99999)}',
+            'user_followers': followers,
+            'text': text,
+            'product_mentioned': product['product_id'],
+            'hashtags': hashtags,
+            'sentiment': sentiment,
+            'sentiment_score': round(sentiment_score, 2),
+            'engagement': {
+                'likes': likes,
+                'comments': comments,
+                'shares': shares
+            },
+            'language': 'en'
+        }
+        
+        return post
@@ -8,6 +8,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.random_utils import RandomGenerator
+from utils.profiling_utils import phase
 
 
 class TransactionGenerator:
@@ -31,77 +32,183 @@ class TransactionGenerator:
         'Casual User': ['Plus', 'Lite', 'Mini']
     }
     
+    # Output columns and their logical types (used by nova_data.load)
+    OUTPUT_SCHEMA = {
+        'transaction_id': 'string',
+        'transaction_datetime': 'datetime',
+        'customer_id': 'string',
+        'product_id': 'category',
+        'price_paid': 'float',
+        'discount_amount': 'float',
+        'channel': 'category',
+        'region': 'category',
+        'country': 'category',
+        'customer_segment': 'category',
+        'age_group': 'category',
+        'income_level': 'category',
+        'is_repeat_customer': 'bool',
+        'previous_product_id': 'category'
+    }
+    
     def __init__(self, products_df: pd.DataFrame, sales_df: pd.DataFrame, 
-                 config: Dict, rng: RandomGenerator):
+                 config: Dict, rng: RandomGenerator, customer_history: Dict = None):
         self.products_df = products_df
         self.sales_df = sales_df
         self.config = config
         self.rng = rng
         self.transactions = []
-        self.customer_history = {}  # Track customer purchases
+        # Track customer purchases (customer_id -> last product_id); seeded
+        # from a previous run when extending data incrementally
+        self.customer_history = dict(customer_history) if customer_history else {}
+        # Customer ids in first-purchase order, for drawing repeat customers
+        self.customer_ids = list(self.customer_history)
     
-    def generate_transactions(self) -> pd.DataFrame:
-        """Generate transaction data based on sales data."""
+    def generate_transactions(self, checkpoint=None, chunk_size: int = 5000, start_id: int = 1) -> pd.DataFrame:
+        """
+        Generate transaction data based on sales data.
+        
+        Args:
+            checkpoint: Optional StepCheckpoint; every chunk_size sampled sales rows form one chunk
+            chunk_size: Number of sampled sales rows per checkpoint chunk
+            start_id: Sequence number of the first transaction
+        
+        Returns:
+            DataFrame with transaction data
+        """
         # Sample transactions from sales (not every sale needs a detailed transaction)
         sampled_sales = self.sales_df.sample(frac=0.3, random_state=self.rng.seed)
         
-        transaction_id = 1
-        for _, sale in sampled_sales.iterrows():
+        # Resume after the last completed chunk; replaying the restored
+        # transactions rebuilds customer history in the original order
+        first_chunk = 0
+        if checkpoint:
+            self.transactions, first_chunk = checkpoint.resume(self.rng)
+            for txn in self.transactions:
+                if txn['customer_id'] not in self.customer_history:
+                    self.customer_ids.append(txn['customer_id'])
+                self.customer_history[txn['customer_id']] = txn['product_id']
+        
+        transaction_id = start_id + len(self.transactions)
+        first_row = first_chunk * chunk_size
+        chunk_start = len(self.transactions)
+        for row_number, (_, sale) in enumerate(sampled_sales.iloc[first_row:].iterrows(), start=first_row):
             # Generate multiple transactions for this sale record
             num_transactions = max(1, int(sale['units_sold'] * 0.1))  # 10% of units
             
             for _ in range(num_transactions):
-                customer_id = self._get_or_create_customer()
                 product = self.products_df[self.products_df['product_id'] == sale['product_id']].iloc[0]
-                
-                # Determine if repeat customer
-                is_repeat = customer_id in self.customer_history
-                previous_product_id = self.customer_history.get(customer_id) if is_repeat else None
-                
-                # Calculate discount
-                discount_pct = self._get_discount_rate(sale['channel'], sale['channel_type'])
-                discount_amount = round(product['price_usd'] * discount_pct, 2)
-                price_paid = round(product['price_usd'] - discount_amount, 2)
-                
-                # Get customer attributes
-                segment = self._get_customer_segment(product['product_line'])
-                age_group = self.rng.choice(self.AGE_GROUPS)
-                income_level = self.rng.choice(self.INCOME_LEVELS)
-                
-                # Generate datetime with random hour (business hours 9-21)
-                hour = self.rng.randint(9, 21)
-                minute = self.rng.randint(0, 59)
-                second = self.rng.randint(0, 59)
-                transaction_datetime = f"{sale['date']}T{hour:02d}:{minute:02d}:{second:02d}"
-                
-                transaction = {
-                    'transaction_id': f'TXN-{transaction_id:08d}',
-                    'transaction_datetime': transaction_datetime,
-                    'customer_id': customer_id,
-                    'product_id': sale['product_id'],
-                    'price_paid': price_paid,
-                    'discount_amount': discount_amount,
-                    'channel': sale['channel'],
-                    'region': sale['region'],
-                    'country': sale['country'],
-                    'customer_segment': segment,
-                    'age_group': age_group,
-                    'income_level': income_level,
-                    'is_repeat_customer': is_repeat,
-                    'previous_product_id': previous_product_id if previous_product_id else ''
-                }
-                
-                self.transactions.append(transaction)
-                self.customer_history[customer_id] = sale['product_id']
+                self.transactions.append(self._build_transaction(sale, product, transaction_id))
                 transaction_id += 1
+            
+            if checkpoint and ((row_number + 1) % chunk_size == 0 or row_number + 1 == len(sampled_sales)):
+                checkpoint.commit(row_number // chunk_size, self.transactions[chunk_start:], self.rng)
+                chunk_start = len(self.transactions)
+        
+        with phase('build_frame'):
+            df = pd.DataFrame(self.transactions)
+        return df
+    
+    def generate_transactions_for_count(self, count: int, start_id: int = 1) -> pd.DataFrame:
+        """
+        Generate a planned number of transactions over the sales data (used for sharded runs).
+        
+        Sales rows are drawn with the weight generate_transactions() gives
+        them (10% of units, at least one), so the count can be fixed before
+        the sales exist and ID ranges assigned up front.
+        
+        Args:
+            count: Number of transactions
+            start_id: Sequence number of the first transaction
+        
+        Returns:
+            DataFrame with transaction data (empty when there are no sales rows)
+        """
+        sales = self.sales_df.to_dict('records')
+        if sales and count > 0:
+            products = {product['product_id']: product for product in self.products_df.to_dict('records')}
+            weights = [max(1, int(sale['units_sold'] * 0.1)) for sale in sales]
+            # Keep the drawn rows in sales order so transactions follow the calendar
+            rows = sorted(self.rng.choices(range(len(sales)), weights, k=count))
+            for transaction_id, row in enumerate(rows, start=start_id):
+                sale = sales[row]
+                self.transactions.append(self._build_transaction(sale, products[sale['product_id']], transaction_id))
         
-        return pd.DataFrame(self.transactions)
+        with phase('build_frame'):
+            df = pd.DataFrame(self.transactions)
+        return df
+    
+    def _build_transaction(self, sale, product, transaction_id: int, transaction_datetime: str = None) -> Dict:
+        """
+        Build a single purchase of a product and record it in the customer history.
+        
+        Args:
+            sale: Sales context with product_id, channel, channel_type, region, country and date
+            product: Product row (or record) with price_usd and product_line
+            transaction_id: Sequence number of the transaction
+            transaction_datetime: Purchase time; a random business hour on sale['date'] if omitted
+        
+        Returns:
+            Transaction dictionary
+        """
+        customer_id = self._get_or_create_customer()
+        
+        # Determine if repeat customer
+        is_repeat = customer_id in self.customer_history
+        previous_product_id = self.customer_history.get(customer_id) if is_repeat else None
+        
+        # Calculate discount
+        discount_pct = self._get_discount_rate(sale['channel'], sale['channel_type'])
+        discount_amount = round(product['price_usd'] * discount_pct, 2)
+        price_paid = round(product['price_usd'] - discount_amount, 2)
+        
+        # Get customer attributes
+        segment = self._get_customer_segment(product['product_line'])
+        age_group = self.rng.choice(self.AGE_GROUPS)
+        income_level = self.rng.choice(self.INCOME_LEVELS)
+        
+        if transaction_datetime is None:
+            # Generate datetime with random hour (business hours 9-21)
+            hour = self.rng.randint(9, 21)
+            minute = self.rng.randint(0, 59)
+            second = self.rng.randint(0, 59)
+            transaction_datetime = f"{sale['date']}T{hour:02d}:{minute:02d}:{second:02d}"
+        
+        transaction = {
+            'transaction_id': f'TXN-{transaction_id:08d}',
+            'transaction_datetime': transaction_datetime,
+            'customer_id': customer_id,
+            'product_id': sale['product_id'],
+            'price_paid': price_paid,
+            'discount_amount': discount_amount,
+            'channel': sale['channel'],
+            'region': sale['region'],
+            'country': sale['country'],
+            'customer_segment': segment,
+            'age_group': age_group,
+            'income_level': income_level,
+            'is_repeat_customer': is_repeat,
+            'previous_product_id': previous_product_id if previous_product_id else ''
+        }
+        
+        if not is_repeat:
+            self.customer_ids.append(customer_id)
+        self.customer_history[customer_id] = sale['product_id']
+        return transaction
+    
+    def forget_customers(self, keep: int):
+        """Drop all but the keep most recently acquired customers (bounds memory of long-running streams)."""
+        if len(self.customer_ids) <= keep:
+            return
+        dropped = self.customer_ids[:len(self.customer_ids) - keep]
+        self.customer_ids = self.customer_ids[len(self.customer_ids) - keep:]
+        for customer_id in dropped:
+            del self.customer_history[customer_id]
     
     def _get_or_create_customer(self) -> str:
         """Get existing customer or create new one."""
         # 30% chance of repeat customer
         if self.customer_history and self.rng.random() < 0.30:
-            return self.rng.choice(list(self.customer_history.keys()))
+            return self.rng.choice(self.customer_ids)
         else:
             return f'CUST-{self.rng.randint(100000, 999999)}'
     
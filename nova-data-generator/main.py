@@ -3,8 +3,15 @@ Nova Data Generator - Main execution script.
 """
 import yaml
 import logging
-from datetime import datetime
+import argparse
+import os
+import shutil
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
 import sys
+import pandas as pd
 
 from utils.random_utils import RandomGenerator
 from generators.product_generator import ProductGenerator
@@ -14,9 +21,46 @@ from generators.campaign_generator import CampaignGenerator
 
 from generators.social_generator import SocialGenerator
 from generators.review_generator import ReviewGenerator
+from generators.event_generator import EventGenerator
 from output.csv_writer import write_csv
 from output.json_writer import write_json
-from output.metadata_writer import generate_data_dictionary, generate_log
+from output.sqlite_writer import write_sqlite
+from output.parquet_writer import write_parquet
+from output.stream_sinks import open_sink
+from output.s3_publisher import open_publisher
+from output.metadata_writer import (
+    generate_data_dictionary, generate_log, write_run_metrics, write_validation_report, write_column_profiles,
+    write_rollup_lineage
+)
+from utils.profiling_utils import StageProfiler
+from utils.cache_utils import StageCache
+from utils.checkpoint_utils import RunJournal, run_fingerprint
+from utils.state_utils import (
+    load_run_state, save_run_state, load_customer_history, save_customer_history, derive_seed,
+    load_dataset_profiles, save_dataset_profiles, IncrementJournal
+)
+from utils.date_utils import parse_date, format_date, Calendar
+from utils.validation_utils import run_validation, validate_files
+from utils.integrity_utils import run_integrity_checks, table_chunks, file_chunks
+from utils.stream_utils import dataset_files
+from utils.sketch_utils import DatasetProfile
+from utils.rollup_utils import ROLLUPS, lineage_record, load_lineage
+from utils.search_utils import build_segment
+from utils.emitter_utils import EventEmitter, RateSchedule
+from utils.replay_utils import merged_events, replay
+from utils.plan_utils import plan_run, format_plan
+from utils.flatten_utils import FLAT_TABLES, flatten
+from utils.attribution_utils import CONTROL_REGIONS, PRE_PERIOD, UNKNOWN_PRODUCT, attribute_campaigns
+from utils.merkle_utils import build_manifest, save_manifest, load_manifest, diff_runs, format_diff
+from utils.scenario_utils import (
+    SUMMARY_FILE, load_scenarios, scenario_configs, precompute_inputs, generate_products, calendar_for
+)
+from utils.shard_utils import (
+    SHARD_FILES, ShardPlan, parse_shard, shard_dir, write_manifest, merge_shards, load_merged, record_merge_outputs,
+    verify_against, generate_window_sales, generate_window_transactions, generate_window_posts,
+    generate_window_reviews, generate_product_campaigns
+)
+from nova_data import DATASETS, load as load_dataset
 
 # Configure logging
 logging.basicConfig(
@@ -26,9 +70,56 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Nova Data Generator')
+    parser.add_argument('--config', default='config/config.yaml',
+                        help='Path to config file (relative to main.py)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Dump a cProfile per step to <data_dir>/profiles/')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Regenerate every step instead of reusing cached outputs')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run from its last completed chunk')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Append only the days after the previous run up to date_range.end_date')
+    parser.add_argument('--plan', action='store_true',
+                        help='Predict rows, bytes, runtime and memory per dataset from the config without generating')
+    parser.add_argument('--validate', metavar='DATA_DIR',
+                        help='Stream-validate existing output files in DATA_DIR instead of generating')
+    parser.add_argument('--stream', action='store_true',
+                        help='Emit transactions, posts and reviews continuously (see the stream config section)')
+    parser.add_argument('--replay', metavar='DATA_DIR',
+                        help='Replay the datasets in DATA_DIR as one event-time ordered stream')
+    parser.add_argument('--speed', type=float,
+                        help='Replay speed-up factor (0 = as fast as possible), overriding replay.speed')
+    parser.add_argument('--sink', choices=['jsonl', 'socket', 'stdout'],
+                        help='Stream/replay sink, overriding stream.sink.type')
+    parser.add_argument('--rate', type=float,
+                        help='Stream events/sec, overriding stream.events_per_sec')
+    parser.add_argument('--duration', type=float,
+                        help='Stream seconds (0 = until interrupted), overriding stream.duration_sec')
+    parser.add_argument('--publish', action='store_true',
+                        help='Upload outputs to the publish endpoint even if publish.enabled is false')
+    parser.add_argument('--shard', metavar='I/N',
+                        help='Generate shard I of N (0-based) into <data_dir>/shard-I-of-N (see the sharding config section)')
+    parser.add_argument('--merge-shards', metavar='SHARD_DIR', nargs='+',
+                        help='Check a complete set of shard directories, concatenate them into data_dir '
+                             '(which must not hold the outputs of another run) and run the remaining stages')
+    parser.add_argument('--verify-against', metavar='DATA_DIR',
+                        help='With --merge-shards, compare the merged datasets byte for byte with a normal '
+                             'run (python main.py) of the same config')
+    parser.add_argument('--diff', nargs=2, metavar=('LEFT_DIR', 'RIGHT_DIR'),
+                        help='Compare two output directories by their manifests and report what differs')
+    parser.add_argument('--scenarios', metavar='FILE',
+                        help='Generate every scenario (config overrides) in FILE on a process pool')
+    parser.add_argument('--workers', type=int,
+                        help='Scenario worker processes, overriding scenarios.max_workers')
+    return parser.parse_args(argv)
+
+
 def load_config(config_path: str = 'config/config.yaml') -> dict:
     """Load configuration from YAML file."""
-    import os
     # Get the directory where main.py is located
     script_dir = os.path.dirname(os.path.abspath(__file__))
     full_config_path = os.path.join(script_dir, config_path)
@@ -43,34 +134,1328 @@ def load_config(config_path: str = 'config/config.yaml') -> dict:
         sys.exit(1)
 
 
-def main():
+def run_step(cache, journal, rng, name: str, config_sections: dict, upstream: list, sources: list, generate):
+    """
+    Run a generation step, reusing a cached or checkpointed output when available.
+    
+    Args:
+        generate: Callable taking the step's StepCheckpoint (or None) and returning its output
+    
+    Returns:
+        Tuple of (output, step key or None when caching is disabled, cache hit)
+    """
+    key = cache.step_key(name, config_sections, rng.seed, upstream, sources) if cache else None
+    
+    # Step already finished before an interruption
+    if journal and journal.is_step_complete(name):
+        return journal.load_step(name, rng), key, False
+    
+    checkpoint = journal.checkpoint(name) if journal else None
+    if cache is None:
+        data, cache_hit = generate(checkpoint), False
+    else:
+        data, cache_hit = cache.run(key, rng, lambda: generate(checkpoint))
+        if cache_hit:
+            logger.info(f"✓ Reused cached {name} output ({key[:12]})")
+    
+    if journal:
+        journal.complete_step(name, data, rng)
+    return data, key, cache_hit
+
+
+def clustering_options(config: dict, filename: str) -> dict:
+    """Writer arguments clustering a dataset on its configured key and indexing it with a zone map."""
+    clustering = config['output'].get('clustering', {})
+    if not clustering.get('enabled', False):
+        return {}
+    stem, ext = os.path.splitext(filename)
+    keys = clustering.get('tables', {}).get(stem)
+    if not keys:
+        return {}
+    options = {'sort_by': keys, 'zone_map_columns': keys}
+    if ext == '.csv':
+        options['block_rows'] = clustering.get('block_rows', 10000)
+    return options
+
+
+def _append_csv(df: pd.DataFrame, filename: str, data_dir: str, profile=None, **options):
+    """Append rows to a CSV dataset; returns (filepath, bytes appended)."""
+    filepath = os.path.join(data_dir, filename)
+    size_before = os.path.getsize(filepath) if os.path.exists(filepath) else 0
+    write_csv(df, filename, data_dir, append=True, profile=profile, **options)
+    return filepath, os.path.getsize(filepath) - size_before
+
+
+def _increment_filename(filename: str, start_date: str, end_date: str) -> str:
+    """Name of the part file holding one increment of a JSON dataset."""
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{start_date}_{end_date}{ext}"
+
+
+def run_integrity(validation_config: dict, chunks, has_dataset) -> dict:
+    """Check the relationships declared under validation.integrity."""
+    integrity_config = validation_config.get('integrity', {})
+    if not integrity_config.get('enabled', False):
+        return {}
+    return run_integrity_checks(
+        integrity_config.get('relationships', []), chunks,
+        use_bloom=integrity_config.get('bloom_filter', False),
+        bloom_error_rate=integrity_config.get('bloom_error_rate', 0.01),
+        sample_values=validation_config.get('sample_rows', 5),
+        has_dataset=has_dataset
+    )
+
+
+def run_validation_stage(config: dict, tables: dict, date_range: dict, profiler, log_entries: list, data_dir: str,
+                         partial: bool = False) -> bool:
+    """
+    Validate generated tables against the declarative rules in config.
+    
+    Args:
+        tables: DataFrames by dataset name (file name without extension)
+        date_range: Start and end date the 'start_date'/'end_date' bounds resolve to
+        partial: The tables hold the rows of one incremental window
+    
+    Returns:
+        True if every table passed (or validation is disabled)
+    """
+    validation_config = config.get('validation', {})
+    if not validation_config.get('enabled', False):
+        return True
+    
+    logger.info("Validating generated data...")
+    with profiler.step('Validation') as step:
+        with step.phase('validate'):
+            results = run_validation(
+                tables, validation_config.get('datasets', {}), date_range,
+                max_workers=validation_config.get('max_workers', 4),
+                sample_rows=validation_config.get('sample_rows', 5),
+                partial=partial
+            )
+        with step.phase('integrity'):
+            integrity = run_integrity(validation_config, table_chunks(tables), tables.__contains__)
+        with step.phase('write'):
+            filepath = write_validation_report(results, data_dir, integrity)
+        step.record_output(sum(result['record_count'] for result in results.values()), filepath)
+    
+    violation_count = sum(len(result['violations']) for result in results.values()) + \
+        sum(1 for result in integrity.values() if not result['passed'])
+    log_entries.append({
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': 'Validation',
+        'record_count': step.record_count,
+        'metrics': step.to_dict(),
+        'status': 'SUCCESS' if violation_count == 0 else f'FAILED ({violation_count} rule violations)'
+    })
+    return violation_count == 0
+
+
+def run_rollup_stage(config: dict, tables: dict, sources: dict, run: dict, profiler, log_entries: list,
+                     data_dir: str, incremental: bool = False):
+    """
+    Materialize the configured rollup tables from the generated frames.
+    
+    Full runs compute each rollup from scratch. Incremental runs aggregate
+    only the new rows and merge them into the rollups on disk by summing
+    the additive measures; rollups whose sources got no new rows are left
+    as they are.
+    
+    Args:
+        tables: DataFrames by dataset name (file name without extension)
+        sources: Per dataset: file, record_count and step_key for the lineage records
+        run: Run identity (run_id, random_seed, date_range)
+        incremental: Merge into the existing rollups instead of replacing them
+    """
+    rollup_config = config.get('rollups', {})
+    if not rollup_config.get('enabled', False):
+        return
+    
+    rollup_dir = os.path.join(data_dir, rollup_config.get('dir', 'rollups'))
+    lineage = load_lineage(rollup_dir) if incremental else {}
+    row_count = 0
+    
+    logger.info("Building rollup tables...")
+    with profiler.step('Rollups') as step:
+        for name in rollup_config.get('tables', list(ROLLUPS)):
+            rollup = ROLLUPS[name]
+            if not all(len(tables.get(source, ())) for source in rollup.sources):
+                continue
+            
+            filepath = os.path.join(rollup_dir, f'{name}.csv')
+            if incremental and (name not in lineage or not os.path.exists(filepath)):
+                logger.warning(f"Skipping rollup {name}: no previous rollup to merge into (run a full generation)")
+                continue
+            with step.phase('aggregate'):
+                df = rollup.merge(pd.read_csv(filepath), tables) if incremental else rollup.compute(tables)
+            with step.phase('write'):
+                write_csv(df, f'{name}.csv', rollup_dir)
+            row_count += len(df)
+            step.record_output(row_count, filepath)
+            
+            if incremental:
+                record = lineage[name]
+                record['row_count'] = len(df)
+                record['date_range']['end_date'] = run['date_range']['end_date']
+                record['increments'].append({
+                    'run_id': run['run_id'],
+                    'date_range': run['date_range'],
+                    'sources': [dict(dataset=source, **sources[source]) for source in rollup.sources]
+                })
+            else:
+                lineage[name] = lineage_record(rollup, df, sources, run)
+        
+        with step.phase('write'):
+            filepath = write_rollup_lineage(lineage, rollup_dir)
+        step.record_output(row_count, filepath)
+    
+    log_entries.append({
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': 'Rollups',
+        'record_count': row_count,
+        'metrics': step.to_dict(),
+        'status': 'SUCCESS'
+    })
+
+
+def run_sqlite_stage(config: dict, tables: dict, profiler, log_entries: list, data_dir: str, append: bool = False):
+    """
+    Load the generated tables into the SQLite database.
+    
+    Args:
+        tables: DataFrames or record lists by dataset name (used as table names)
+        append: Insert into the existing tables instead of rebuilding the database
+    """
+    sqlite_config = config.get('sqlite', {})
+    if not sqlite_config.get('enabled', False):
+        return
+    if append and not os.path.exists(os.path.join(data_dir, sqlite_config.get('filename', 'nova.db'))):
+        logger.warning("Skipping SQLite load: no database to append to (run a full generation)")
+        return
+    
+    logger.info("Loading tables into SQLite...")
+    with profiler.step('SQLite') as step:
+        filepath, metrics = write_sqlite(
+            tables, {name: DATASETS[name]['schema'] for name in tables},
+            sqlite_config.get('filename', 'nova.db'), data_dir,
+            indexes=sqlite_config.get('indexes', {}),
+            unique_keys=sqlite_config.get('unique_keys', {}),
+            batch_size=sqlite_config.get('batch_size', 50000),
+            append=append
+        )
+        row_count = sum(table['rows'] for table in metrics.values())
+        step.record_output(row_count, filepath)
+    
+    log_entries.append({
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': 'SQLite' + (' (incremental)' if append else ''),
+        'record_count': row_count,
+        'metrics': dict(step.to_dict(), tables=metrics),
+        'status': 'SUCCESS'
+    })
+
+
+def run_search_index_stage(config: dict, corpora: dict, profiler, log_entries: list, data_dir: str,
+                           segment: str = 'base'):
+    """
+    Build inverted text indexes over the generated reviews and posts.
+    
+    Full runs replace the index; incremental runs add a segment holding
+    only the new records, which queries read together with the others.
+    
+    Args:
+        corpora: Record lists by dataset name
+        segment: Segment name (the window of an incremental run)
+    """
+    index_config = config.get('search_index', {})
+    if not index_config.get('enabled', False):
+        return
+    
+    index_dir = os.path.join(data_dir, index_config.get('dir', 'search'))
+    doc_count = 0
+    
+    logger.info("Building search indexes...")
+    with profiler.step('Search Index') as step:
+        for corpus in index_config.get('datasets', list(corpora)):
+            records = corpora.get(corpus)
+            corpus_dir = os.path.join(index_dir, corpus)
+            if segment == 'base' and os.path.exists(corpus_dir):
+                shutil.rmtree(corpus_dir)
+            elif segment != 'base' and not os.path.exists(corpus_dir):
+                logger.warning(f"Skipping search index for {corpus}: no index to extend (run a full generation)")
+                continue
+            if not records:
+                continue
+            with step.phase('build'):
+                meta = build_segment(records, corpus, os.path.join(corpus_dir, segment))
+            doc_count += meta['doc_count']
+            step.record_output(doc_count, corpus_dir)
+            print(f"✓ Indexed {meta['doc_count']} {corpus} records: {len(meta['terms'])} terms, "
+                  f"{meta['posting_count']} postings, {meta['index_bytes'] / 1024:.1f} KB")
+    
+    log_entries.append({
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': 'Search Index' + ('' if segment == 'base' else ' (incremental)'),
+        'record_count': doc_count,
+        'metrics': step.to_dict(),
+        'status': 'SUCCESS'
+    })
+
+
+def validate_existing(config: dict, data_dir: str) -> bool:
+    """
+    Validate output files already on disk with bounded memory.
+    
+    Files are streamed in chunks, so datasets generated elsewhere or larger
+    than RAM can be checked with the same rules as the in-memory stage.
+    Date bounds come from the run state in data_dir when present.
+    """
+    validation_config = config.get('validation', {})
+    state = load_run_state(data_dir)
+    date_range = config['date_range']
+    if state is not None:
+        date_range = {'start_date': state['start_date'], 'end_date': state['end_date']}
+    
+    logger.info(f"Streaming validation of {data_dir} ({date_range['start_date']} to {date_range['end_date']})")
+    results = validate_files(
+        data_dir, validation_config.get('datasets', {}), date_range,
+        chunk_size=validation_config.get('chunk_size', 100000),
+        sample_rows=validation_config.get('sample_rows', 5)
+    )
+    integrity = run_integrity(
+        validation_config, file_chunks(data_dir, validation_config.get('chunk_size', 100000)),
+        lambda dataset: bool(dataset_files(data_dir, dataset))
+    )
+    write_validation_report(results, data_dir, integrity)
+    return all(result['passed'] for result in list(results.values()) + list(integrity.values()))
+
+
+def run_diff(config: dict, left_dir: str, right_dir: str) -> bool:
+    """
+    Report which datasets, partitions and columns differ between two outputs.
+    
+    The runs' manifests are compared top-down and only the byte ranges of
+    mismatching partitions are read, to show sample differing rows. A
+    directory without a manifest is fingerprinted in memory first, which
+    reads all of its files.
+    
+    Returns:
+        True if the outputs hold identical data
+    """
+    manifest_config = config.get('manifest', {})
+    manifests = []
+    for run_dir in (left_dir, right_dir):
+        manifest = load_manifest(run_dir)
+        if manifest is None:
+            logger.warning(f"No manifest in {run_dir}; fingerprinting all of its files")
+            manifest = build_manifest(run_dir, manifest_config.get('partition_rows', 10000))
+        manifests.append(manifest)
+    
+    started = datetime.now()
+    try:
+        report = diff_runs(left_dir, right_dir, *manifests,
+                           sample_rows=manifest_config.get('sample_rows', 5),
+                           sample_partitions=manifest_config.get('sample_partitions', 3))
+    except ValueError as e:
+        logger.error(f"Cannot compare {left_dir} and {right_dir}: {e}")
+        sys.exit(1)
+    print()
+    for line in format_diff(report, left_dir, right_dir):
+        print(line)
+    print()
+    total_bytes = sum(file_entry['bytes'] for manifest in manifests for entry in manifest['datasets'].values()
+                      for file_entry in entry['files'])
+    logger.info(f"✓ Compared in {(datetime.now() - started).total_seconds():.2f}s, reading "
+                f"{report['bytes_read']:,} of {total_bytes:,} data bytes")
+    return report['identical']
+
+
+def run_plan(config: dict) -> bool:
+    """
+    Print the expected size and cost of a full run without generating it.
+    
+    Returns:
+        False if the run is expected to exceed the memory or disk budget
+    """
+    plan = plan_run(config)
+    print()
+    for line in format_plan(plan):
+        print(line)
+    print()
+    for warning in plan['warnings']:
+        logger.warning(f"Budget exceeded: {warning}")
+    logger.info(f"✓ Planned in {plan['plan_sec']:.2f}s")
+    return not plan['warnings']
+
+
+def run_stream(config: dict, args: argparse.Namespace):
+    """
+    Emit events continuously instead of writing dated files.
+    
+    Transactions, social posts and reviews are built by the batch generators
+    and emitted at stream.events_per_sec (shaped over the day) to rotating
+    JSONL files, a socket or stdout until the duration ends or the process
+    is interrupted. Logs go to stderr, so stdout carries only events.
+    """
+    stream_config = config.get('stream', {})
+    sink_config = dict(stream_config.get('sink', {}))
+    if args.sink:
+        sink_config['type'] = args.sink
+    events_per_sec = args.rate if args.rate is not None else stream_config.get('events_per_sec', 20000)
+    duration = args.duration if args.duration is not None else stream_config.get('duration_sec', 0)
+    data_dir = config['output']['data_dir']
+    
+    rng = RandomGenerator(seed=config['random_seed'])
+    products_df = ProductGenerator(config, rng).generate_products()
+    generator = EventGenerator(
+        products_df, config, rng,
+        mix=stream_config.get('mix'),
+        max_customers=stream_config.get('max_customers', 100000)
+    )
+    sink = open_sink(sink_config, data_dir)
+    emitter = EventEmitter(
+        generator, sink,
+        RateSchedule(events_per_sec, stream_config.get('diurnal_amplitude', 0.0), stream_config.get('peak_hour', 19)),
+        tick_ms=stream_config.get('tick_ms', 50),
+        queue_batches=stream_config.get('queue_batches', 8),
+        time_scale=stream_config.get('time_scale', 1),
+        report_interval_sec=stream_config.get('report_interval_sec', 5)
+    )
+    
+    logger.info(f"Streaming {events_per_sec:,.0f} events/sec to {sink.describe()}"
+                + (f" for {duration:g}s" if duration else " (Ctrl+C to stop)"))
+    summary = asyncio.run(emitter.run(duration=duration, max_events=stream_config.get('max_events', 0)))
+    logger.info(f"✓ Emitted {summary['events']:,} events in {summary['seconds']:.1f}s: "
+                f"{summary['achieved_events_per_sec']:,.0f}/s achieved vs {summary['target_events_per_sec']:,.0f}/s "
+                f"target ({summary['achieved_pct']:.1f}%)")
+    
+    os.makedirs(data_dir, exist_ok=True)
+    summary_path = os.path.join(data_dir, 'stream_metrics.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(summary, created_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                       events_per_sec=events_per_sec), f, indent=2)
+    logger.info(f"✓ Wrote stream metrics: {summary_path}")
+
+
+def run_replay(config: dict, args: argparse.Namespace):
+    """
+    Replay generated datasets as one chronologically ordered event stream.
+    
+    Daily sales, transactions, posts and reviews in args.replay are merged by
+    event time and written to the stream sink at replay.speed times real
+    time. Files are read lazily in chunks, so memory does not grow with the
+    length of the history.
+    """
+    replay_config = config.get('replay', {})
+    sink_config = dict(config.get('stream', {}).get('sink', {}))
+    sink_config.setdefault('prefix', 'replay')
+    if args.sink:
+        sink_config['type'] = args.sink
+    speed = args.speed if args.speed is not None else replay_config.get('speed', 3600)
+    data_dir = config['output']['data_dir']
+    
+    events = merged_events(
+        args.replay,
+        datasets=replay_config.get('datasets'),
+        chunk_size=replay_config.get('chunk_size', 10000),
+        spill_dir=replay_config.get('spill_dir') or None
+    )
+    sink = open_sink(sink_config, data_dir)
+    logger.info(f"Replaying {args.replay} at {speed:g}x to {sink.describe()}" if speed else
+                f"Replaying {args.replay} unpaced to {sink.describe()}")
+    summary = asyncio.run(replay(
+        events, sink, speed=speed,
+        batch_size=replay_config.get('batch_size', 1000),
+        report_interval_sec=config.get('stream', {}).get('report_interval_sec', 5)
+    ))
+    logger.info(f"✓ Replayed {summary['events']:,} events ({summary['first_event_time']} to "
+                f"{summary['last_event_time']}) in {summary['seconds']:.1f}s: "
+                f"{summary['achieved_speed']:,.0f}x, {summary['events_per_sec']:,.0f} events/sec")
+    
+    os.makedirs(data_dir, exist_ok=True)
+    summary_path = os.path.join(data_dir, 'replay_metrics.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(summary, created_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'), source=args.replay),
+                  f, indent=2)
+    logger.info(f"✓ Wrote replay metrics: {summary_path}")
+
+
+def open_publish_stage(config: dict, args: argparse.Namespace):
+    """Start the background S3 publisher when publish.enabled or --publish is set (None otherwise)."""
+    publish_config = config.get('publish', {})
+    if not (publish_config.get('enabled', False) or args.publish):
+        return None
+    try:
+        publisher = open_publisher(publish_config)
+    except ImportError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    logger.info(f"✓ Publishing finished files to s3://{publisher.bucket}/{publisher.prefix}"
+                + (f" at {publish_config['endpoint_url']}" if publish_config.get('endpoint_url') else ""))
+    return publisher
+
+
+def run_flat_export_stage(config: dict, corpora: dict, profiler, log_entries: list, data_dir: str,
+                          append: bool = False) -> list:
+    """
+    Write the nested post and review datasets as flat typed tables.
+    
+    Nested objects become columns and list fields become bridge tables
+    keyed by the records' integer keys. Tables go through the same CSV
+    writer as the fact tables (clustering and zone maps included) and,
+    when configured, to Parquet.
+    
+    Args:
+        corpora: Record lists by dataset name
+        append: Add the rows to the existing flat tables
+    
+    Returns:
+        Paths of the written files
+    """
+    export_config = config.get('flat_export', {})
+    if not export_config.get('enabled', False):
+        return []
+    formats = export_config.get('formats', ['csv'])
+    if append and not any(os.path.exists(os.path.join(data_dir, f'fact_social_posts.{ext}')) for ext in formats):
+        logger.warning("Skipping flat export: no flat tables to append to (run a full generation)")
+        return []
+    
+    logger.info("Exporting flat tables...")
+    files = []
+    row_count = 0
+    with profiler.step('Flat Export') as step:
+        with step.phase('flatten'):
+            tables = {}
+            for dataset, records in corpora.items():
+                tables.update(flatten(dataset, records))
+        for table, df in tables.items():
+            if append and len(df) == 0:
+                continue
+            options = clustering_options(config, f'{table}.csv')
+            if 'csv' in formats:
+                with step.phase('write'):
+                    if append:
+                        filepath, _ = _append_csv(df, f'{table}.csv', data_dir, **options)
+                    else:
+                        filepath = write_csv(df, f'{table}.csv', data_dir, **options)
+                files.append(filepath)
+            if 'parquet' in formats:
+                with step.phase('write_parquet'):
+                    filepath = write_parquet(
+                        df, f'{table}.parquet', data_dir, FLAT_TABLES[table]['schema'], append=append,
+                        sort_by=options.get('sort_by'), row_group_rows=export_config.get('row_group_rows', 100000)
+                    )
+                files.append(filepath)
+            row_count += len(df)
+            step.record_output(row_count, filepath)
+    
+    log_entries.append({
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': 'Flat Export' + (' (incremental)' if append else ''),
+        'record_count': row_count,
+        'metrics': dict(step.to_dict(), tables={table: len(df) for table, df in tables.items()}),
+        'status': 'SUCCESS'
+    })
+    return files
+
+
+def run_attribution_stage(config: dict, campaigns_df: pd.DataFrame, sales_df: pd.DataFrame, products_df: pd.DataFrame,
+                          date_range: dict, profiler, log_entries: list, data_dir: str, incremental: bool = False):
+    """
+    Attribute daily sales to campaigns in fact_campaign_attribution.csv.
+    
+    Each campaign's in-flight window and the baseline window before it are
+    joined to its product's sales in its region through one sorted index
+    (see utils/attribution_utils), so the cost grows with the number of
+    sales rows plus campaigns rather than their product.
+    
+    Args:
+        sales_df: Daily sales covering the campaign and baseline windows
+        date_range: Date range of the sales data
+        incremental: The file is recomputed after an incremental run
+    
+    Returns:
+        Path of the written file (None when disabled)
+    """
+    attribution_config = config.get('attribution', {})
+    if not attribution_config.get('enabled', False):
+        return None
+    
+    logger.info("Attributing sales to campaigns...")
+    with profiler.step('Attribution') as step:
+        with step.phase('join'):
+            attribution_df = attribute_campaigns(
+                campaigns_df, sales_df, products_df, date_range['start_date'], date_range['end_date'],
+                baseline_days=attribution_config.get('baseline_days', 28)
+            )
+        with step.phase('write'):
+            filepath = write_csv(attribution_df, 'fact_campaign_attribution.csv', data_dir,
+                                 **clustering_options(config, 'fact_campaign_attribution.csv'))
+        step.record_output(len(attribution_df), filepath)
+    methods = attribution_df['baseline_method'].value_counts()
+    with_baseline = int(attribution_df['lift_pct'].notna().sum())
+    if methods.get(UNKNOWN_PRODUCT, 0):
+        logger.warning(f"  {methods[UNKNOWN_PRODUCT]} campaigns reference products missing from dim_products; "
+                       f"their attribution columns are left empty")
+    print(f"✓ Attributed {len(attribution_df)} campaigns against {len(sales_df)} sales rows "
+          f"({with_baseline} with lift: {methods.get(PRE_PERIOD, 0)} from the pre-campaign baseline, "
+          f"{methods.get(CONTROL_REGIONS, 0)} from other regions)")
+    
+    log_entries.append({
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': 'Attribution' + (' (incremental)' if incremental else ''),
+        'record_count': len(attribution_df),
+        'metrics': dict(step.to_dict(), campaigns_with_lift=with_baseline,
+                        baseline_methods={method: int(count) for method, count in methods.items()}),
+        'status': 'SUCCESS'
+    })
+    return filepath
+
+
+def run_manifest_stage(config: dict, profiler, log_entries: list, data_dir: str):
+    """
+    Fingerprint the written datasets as a Merkle tree in manifest.json.
+    
+    Files left unchanged since the previous manifest (e.g. the base files
+    of an incremental run) keep their fingerprints instead of being re-read.
+    """
+    manifest_config = config.get('manifest', {})
+    if not manifest_config.get('enabled', False):
+        return
+    
+    logger.info("Fingerprinting outputs...")
+    with profiler.step('Manifest') as step:
+        manifest = build_manifest(data_dir, manifest_config.get('partition_rows', 10000),
+                                  previous=load_manifest(data_dir))
+        filepath = save_manifest(manifest, data_dir)
+        row_count = sum(entry['rows'] for entry in manifest['datasets'].values())
+        step.record_output(row_count, filepath)
+    partitions = sum(len(file_entry['partitions']) for entry in manifest['datasets'].values()
+                     for file_entry in entry['files'])
+    print(f"✓ Fingerprinted {len(manifest['datasets'])} datasets in {partitions} partitions "
+          f"(root {manifest['root'][:16]})")
+    
+    log_entries.append({
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': 'Manifest',
+        'record_count': row_count,
+        'metrics': dict(step.to_dict(), root=manifest['root'], partitions=partitions),
+        'status': 'SUCCESS'
+    })
+
+
+def run_publish_stage(publisher, config: dict, profiler, log_entries: list, data_dir: str) -> bool:
+    """
+    Queue the remaining files written during the run and wait for all uploads.
+    
+    Dataset files are queued as soon as they are written, so most bytes are
+    already uploaded while later steps run; this stage mostly waits for the
+    tail. Returns False if any file failed to upload.
+    """
+    if publisher is None:
+        return True
+    
+    logger.info("Publishing outputs...")
+    with profiler.step('Publish') as step:
+        with step.phase('upload'):
+            publisher.publish_tree(data_dir, config['publish'].get('exclude', []), since=publisher.started)
+            summary = publisher.wait()
+        step.record_output(summary['files'])
+    
+    log_entries.append({
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': 'Publish',
+        'record_count': summary['files'],
+        'metrics': dict(step.to_dict(), publish=summary),
+        'status': 'FAILED' if summary['failed'] else 'SUCCESS'
+    })
+    logger.info(f"✓ Published {summary['files']} files ({summary['bytes'] / 1048576:,.1f} MB, {summary['parts']} parts, "
+                f"{summary['retries']} retries); {summary['bytes_before_wait'] / 1048576:,.1f} MB uploaded during generation")
+    for failure in summary['failed']:
+        logger.error(f"Failed to publish {failure['file']}: {failure['error']}")
+    return not summary['failed']
+
+
+def finish_publish(publisher, config: dict, data_dir: str) -> bool:
+    """Upload the metadata files written after the publish stage and stop the publisher."""
+    if publisher is None:
+        return True
+    publisher.publish_tree(data_dir, config['publish'].get('exclude', []), since=publisher.started)
+    summary = publisher.close()
+    for failure in summary['failed']:
+        logger.error(f"Failed to publish {failure['file']}: {failure['error']}")
+    return not summary['failed']
+
+
+def run_incremental(config: dict, args: argparse.Namespace):
+    """
+    Extend a previous run with the days after its high-water mark.
+    
+    Only the new days of sales, transactions, posts and reviews are
+    generated. CSV facts are appended to the existing files and JSON
+    datasets get a new part file, so previously written bytes never change.
+    ID sequences and customer history continue from the previous run.
+    
+    The run's writes are journaled (see IncrementJournal): a run that fails
+    or is interrupted is rolled back, so its window can be retried without
+    its rows being appended twice.
+    """
+    data_dir = config['output']['data_dir']
+    journal = IncrementJournal(data_dir)
+    if journal.pending():
+        logger.warning("Rolling back an incremental run that did not finish")
+        journal.rollback()
+    state = load_run_state(data_dir)
+    if state is None:
+        logger.error(f"No previous run state in {data_dir}; run a full generation first")
+        sys.exit(1)
+    if state['random_seed'] != config['random_seed']:
+        logger.error(f"random_seed {config['random_seed']} differs from the previous run ({state['random_seed']})")
+        sys.exit(1)
+    
+    window_start = parse_date(state['end_date']) + timedelta(days=1)
+    window_end = parse_date(config['date_range']['end_date'])
+    if window_start > window_end:
+        logger.info(f"✓ Data is already up to date through {state['end_date']}")
+        return
+    start_str, end_str = format_date(window_start), format_date(window_end)
+    logger.info(f"Incremental run: generating {start_str} to {end_str}")
+    
+    # Only the fact CSVs are appended to; products, campaigns, earlier JSON parts
+    # and search segments are left alone, and everything else is copied
+    journal.begin(
+        appended=['dim_date.csv', 'fact_daily_sales.csv', 'fact_transactions.csv'] +
+                 [f'{table}.csv' for table in FLAT_TABLES],
+        unchanged=[
+            os.path.relpath(path, data_dir)
+            for dataset in ('dim_products', 'fact_campaign_performance', 'social_media_posts', 'product_reviews')
+            for path in dataset_files(data_dir, dataset)
+        ] + [config.get('search_index', {}).get('dir', 'search')]
+    )
+    try:
+        passed, published = _extend_run(config, args, state, window_start, window_end)
+    except BaseException:
+        logger.error("Incremental run failed; rolling back its writes")
+        journal.rollback()
+        raise
+    journal.commit()
+    
+    if not passed and config['validation'].get('fail_on_error', False):
+        logger.error("Validation failed; see validation_report.json")
+        sys.exit(1)
+    if not published:
+        logger.error("Publishing failed; see generation.log")
+        sys.exit(1)
+
+
+def _extend_run(config: dict, args: argparse.Namespace, state: dict, window_start: datetime, window_end: datetime):
+    """
+    Generate and write one incremental window (see run_incremental).
+    
+    Returns:
+        (validation passed, publishing succeeded)
+    """
+    data_dir = config['output']['data_dir']
+    start_str, end_str = format_date(window_start), format_date(window_end)
+    
+    # Each window gets its own deterministic random stream
+    rng = RandomGenerator(seed=derive_seed(config['random_seed'], start_str, end_str))
+    window_config = dict(config, date_range={'start_date': start_str, 'end_date': end_str})
+    products_df = pd.read_csv(os.path.join(data_dir, 'dim_products.csv'))
+    next_ids = state['next_ids']
+    
+    # Column sketches of the previous run are merged with the appended rows
+    datasets_info, profiles = load_dataset_profiles(data_dir) or ({}, {})
+    
+    log_entries = []
+    record_counts = {}
+    files = []
+    profiler = StageProfiler(profile_dir=os.path.join(data_dir, 'profiles') if args.profile else None)
+    publisher = open_publish_stage(config, args)
+    
+    def record(step, dataset: str, count: int):
+        record_counts[dataset] = count
+        log_entries.append({
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'dataset': f"{dataset} (incremental)",
+            'record_count': count,
+            'date_range': f"{start_str} to {end_str}",
+            'metrics': step.to_dict(),
+            'status': 'SUCCESS'
+        })
+    
+    # New calendar days; day indexes continue from the first run's start date
+    calendar = Calendar(state['start_date'], end_str, config.get('calendar', {}).get('holidays'))
+    with profiler.step('Calendar') as step:
+        with step.phase('generate'):
+            calendar_df = calendar.frame()
+            if os.path.exists(os.path.join(data_dir, 'dim_date.csv')):
+                calendar_df = calendar_df.iloc[calendar.index_of(window_start):]
+        with step.phase('write'):
+            filepath, appended = _append_csv(calendar_df, 'dim_date.csv', data_dir, profiles.get('Calendar'))
+            files.append(filepath)
+        step.record_output(len(calendar_df), filepath, bytes_written=appended)
+    record(step, 'Calendar', len(calendar_df))
+    
+    with profiler.step('Daily Sales') as step:
+        with step.phase('generate'):
+            sales_df = SalesGenerator(products_df, window_config, rng, calendar).generate_daily_sales()
+        filepath, appended = None, 0
+        if len(sales_df) > 0:
+            with step.phase('write'):
+                filepath, appended = _append_csv(
+                    sales_df, 'fact_daily_sales.csv', data_dir, profiles.get('Daily Sales'),
+                    **clustering_options(config, 'fact_daily_sales.csv')
+                )
+                files.append(filepath)
+        step.record_output(len(sales_df), filepath, bytes_written=appended)
+    record(step, 'Daily Sales', len(sales_df))
+    
+    with profiler.step('Transactions') as step:
+        with step.phase('generate'):
+            transaction_gen = TransactionGenerator(
+                products_df, sales_df, window_config, rng,
+                customer_history=load_customer_history(data_dir)
+            )
+            transactions_df = transaction_gen.generate_transactions(start_id=next_ids['transaction'])
+        filepath, appended = None, 0
+        if len(transactions_df) > 0:
+            with step.phase('write'):
+                filepath, appended = _append_csv(
+                    transactions_df, 'fact_transactions.csv', data_dir, profiles.get('Transactions'),
+                    **clustering_options(config, 'fact_transactions.csv')
+                )
+                files.append(filepath)
+        step.record_output(len(transactions_df), filepath, bytes_written=appended)
+    record(step, 'Transactions', len(transactions_df))
+    
+    with profiler.step('Social Media Posts') as step:
+        with step.phase('generate'):
+            social_posts = SocialGenerator(products_df, window_config, rng).generate_posts_for_window(
+                window_start, window_end, start_id=next_ids['post']
+            )
+        filepath = None
+        if social_posts:
+            with step.phase('write'):
+                filepath = write_json(
+                    social_posts, _increment_filename('social_media_posts.json', start_str, end_str), data_dir,
+                    profile=profiles.get('Social Media Posts'), **clustering_options(config, 'social_media_posts.json')
+                )
+                files.append(filepath)
+        step.record_output(len(social_posts), filepath)
+    record(step, 'Social Media Posts', len(social_posts))
+    
+    with profiler.step('Product Reviews') as step:
+        with step.phase('generate'):
+            reviews = ReviewGenerator(products_df, transactions_df, window_config, rng).generate_reviews_for_transactions(
+                state['review_rate'], start_id=next_ids['review']
+            )
+        filepath = None
+        if reviews:
+            with step.phase('write'):
+                filepath = write_json(
+                    reviews, _increment_filename('product_reviews.json', start_str, end_str), data_dir,
+                    profile=profiles.get('Product Reviews'), **clustering_options(config, 'product_reviews.json')
+                )
+                files.append(filepath)
+        step.record_output(len(reviews), filepath)
+    record(step, 'Product Reviews', len(reviews))
+    
+    tables = {
+        'dim_products': products_df,
+        'dim_date': calendar_df,
+        'fact_daily_sales': sales_df,
+        'fact_transactions': transactions_df,
+        'social_media_posts': pd.DataFrame(social_posts),
+        'product_reviews': pd.DataFrame(reviews)
+    }
+    passed = run_validation_stage(config, tables, window_config['date_range'], profiler, log_entries, data_dir,
+                                  partial=True)
+    
+    # Merge the new rows into the rollups; step keys do not apply to incremental windows
+    run_rollup_stage(config, tables, {
+        'dim_products': {'file': 'dim_products.csv', 'record_count': len(products_df), 'step_key': None},
+        'fact_daily_sales': {'file': 'fact_daily_sales.csv', 'record_count': len(sales_df), 'step_key': None},
+        'fact_transactions': {'file': 'fact_transactions.csv', 'record_count': len(transactions_df), 'step_key': None},
+        'social_media_posts': {
+            'file': _increment_filename('social_media_posts.json', start_str, end_str),
+            'record_count': len(social_posts), 'step_key': None
+        },
+        'product_reviews': {
+            'file': _increment_filename('product_reviews.json', start_str, end_str),
+            'record_count': len(reviews), 'step_key': None
+        }
+    }, {
+        'run_id': profiler.run_id,
+        'random_seed': config['random_seed'],
+        'date_range': window_config['date_range']
+    }, profiler, log_entries, data_dir, incremental=True)
+    
+    run_sqlite_stage(config, {
+        'dim_date': calendar_df,
+        'fact_daily_sales': sales_df,
+        'fact_transactions': transactions_df,
+        'social_media_posts': social_posts,
+        'product_reviews': reviews
+    }, profiler, log_entries, data_dir, append=True)
+    
+    run_search_index_stage(config, {'product_reviews': reviews, 'social_media_posts': social_posts},
+                           profiler, log_entries, data_dir, segment=f"{start_str}_{end_str}")
+    
+    files.extend(run_flat_export_stage(config, {'social_media_posts': social_posts, 'product_reviews': reviews},
+                                       profiler, log_entries, data_dir, append=True))
+    
+    # Campaigns still running at the old high-water mark gain in-flight days; their sales
+    # (and baselines) are re-read from the data files, pruned to the campaign windows
+    if config.get('attribution', {}).get('enabled', False):
+        campaigns_df = pd.read_csv(os.path.join(data_dir, 'fact_campaign_performance.csv'))
+        if (campaigns_df['end_date'] >= start_str).any():
+            baseline_days = config['attribution'].get('baseline_days', 28)
+            first_needed = max(state['start_date'],
+                               format_date(parse_date(campaigns_df['start_date'].min()) - timedelta(days=baseline_days)))
+            attribution_sales = load_dataset(
+                'fact_daily_sales', columns=['date', 'product_id', 'region', 'units_sold', 'revenue_usd'],
+                date_range=(first_needed, end_str), data_dir=data_dir
+            )
+            files.append(run_attribution_stage(
+                config, campaigns_df, attribution_sales, products_df,
+                {'start_date': state['start_date'], 'end_date': end_str},
+                profiler, log_entries, data_dir, incremental=True
+            ))
+    
+    run_manifest_stage(config, profiler, log_entries, data_dir)
+    
+    published = run_publish_stage(publisher, config, profiler, log_entries, data_dir)
+    
+    # Advance the high-water mark
+    state['end_date'] = end_str
+    state['next_ids'] = {
+        'transaction': next_ids['transaction'] + len(transactions_df),
+        'post': next_ids['post'] + len(social_posts),
+        'review': next_ids['review'] + len(reviews)
+    }
+    state['increments'].append({
+        'run_id': profiler.run_id,
+        'start_date': start_str,
+        'end_date': end_str,
+        'record_counts': record_counts,
+        'files': [os.path.basename(path) for path in files]
+    })
+    save_customer_history(transaction_gen.customer_history, data_dir)
+    save_run_state(state, data_dir)
+    
+    # Refresh record counts and column statistics with the merged sketches
+    if profiles:
+        for name, profile in profiles.items():
+            datasets_info[name]['record_count'] = profile.record_count
+            datasets_info[name]['profile'] = profile.to_dict()
+        generate_data_dictionary(datasets_info, data_dir)
+        write_column_profiles(datasets_info, data_dir)
+        save_dataset_profiles(datasets_info, profiles, data_dir)
+    generate_log(log_entries, data_dir, append=True)
+    write_run_metrics(profiler.to_dict(), data_dir)
+    published = finish_publish(publisher, config, data_dir) and published
+    
+    print()
+    print(f"✓ Incremental run completed: {start_str} to {end_str}")
+    for name, count in record_counts.items():
+        print(f"  - {name}: +{count} records")
+    print()
+    return passed, published
+
+
+def run_shard(config: dict, args: argparse.Namespace):
+    """
+    Generate one shard of a partitioned run.
+    
+    Fact tables are generated per date window and campaigns per product,
+    each from its own seed, with record counts and ID ranges taken from a
+    ShardPlan that every node computes identically. A normal run generates
+    every unit of the same plan, so it is the 0/1 plan. The shard writes its
+    slice unclustered, with a manifest, to <data_dir>/shard-I-of-N;
+    --merge-shards concatenates a complete set and finishes it like a
+    normal run.
+    """
+    try:
+        index, count = parse_shard(args.shard)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    seed = config['random_seed']
+    window_days = config.get('sharding', {}).get('window_days', 7)
+    output_dir = shard_dir(config['output']['data_dir'], index, count)
+    profiler = StageProfiler(profile_dir=os.path.join(output_dir, 'profiles') if args.profile else None)
+    
+    with profiler.step('Plan') as step:
+        with step.phase('generate'):
+            products_df = ProductGenerator(config, RandomGenerator(seed=seed)).generate_products()
+            plan = ShardPlan(config, products_df, window_days)
+            units = plan.assignment(index, count)
+        step.record_output(len(plan.windows) + len(products_df))
+    window_start, window_stop = units['windows']
+    product_start, product_stop = units['products']
+    logger.info(f"Shard {index}/{count}: windows {window_start}-{window_stop} of {len(plan.windows)} "
+                f"({window_days} days each), products {product_start}-{product_stop} of {len(products_df)}")
+    
+    with profiler.step('Products') as step:
+        with step.phase('write'):
+            filepath = write_csv(products_df, 'dim_products.csv', output_dir)
+        step.record_output(len(products_df), filepath)
+    
+    # Fact windows: each has its own random stream, customer history and ID ranges
+    windows = range(window_start, window_stop)
+    with profiler.step('Fact Windows') as step:
+        with step.phase('generate'):
+            sales_df = generate_window_sales(plan, products_df, config, windows, calendar_for(config))
+            transactions_df = generate_window_transactions(plan, products_df, sales_df, config, windows)
+            social_posts = generate_window_posts(plan, products_df, config, windows)
+            reviews = generate_window_reviews(plan, products_df, transactions_df, config, windows)
+        with step.phase('write'):
+            write_csv(sales_df, 'fact_daily_sales.csv', output_dir)
+            write_csv(transactions_df, 'fact_transactions.csv', output_dir)
+            write_json(social_posts, 'social_media_posts.json', output_dir)
+            write_json(reviews, 'product_reviews.json', output_dir)
+        step.record_output(len(sales_df) + len(transactions_df) + len(social_posts) + len(reviews))
+    
+    # Campaigns: each product has its own random stream
+    with profiler.step('Campaigns') as step:
+        with step.phase('generate'):
+            campaigns_df = generate_product_campaigns(plan, products_df, config, range(product_start, product_stop))
+        with step.phase('write'):
+            filepath = write_csv(campaigns_df, 'fact_campaign_performance.csv', output_dir)
+        step.record_output(len(campaigns_df), filepath)
+    
+    records = {
+        'dim_products': len(products_df),
+        'fact_daily_sales': len(sales_df),
+        'fact_transactions': len(transactions_df),
+        'fact_campaign_performance': len(campaigns_df),
+        'social_media_posts': len(social_posts),
+        'product_reviews': len(reviews)
+    }
+    datasets = {}
+    for dataset, filename in SHARD_FILES.items():
+        datasets[dataset] = {'file': filename, 'records': records[dataset]}
+    for dataset, (start, stop) in [('fact_transactions', units['windows']), ('social_media_posts', units['windows']),
+                                   ('product_reviews', units['windows']), ('fact_campaign_performance', units['products'])]:
+        first_id, planned = plan.planned(dataset, start, stop)
+        datasets[dataset].update(first_id=first_id, planned_records=planned)
+    
+    # The output section (data_dir, clustering) does not affect shard contents
+    fingerprint = run_fingerprint({key: value for key, value in config.items() if key != 'output'}, [
+        ProductGenerator, SalesGenerator, TransactionGenerator,
+        CampaignGenerator, SocialGenerator, ReviewGenerator, ShardPlan
+    ])
+    write_manifest({
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'shard': index,
+        'shards': count,
+        'random_seed': seed,
+        'fingerprint': fingerprint,
+        'plan': {
+            'date_range': config['date_range'],
+            'window_days': window_days,
+            'windows': len(plan.windows),
+            'products': len(products_df),
+            'review_rate': plan.review_rate,
+            'records': plan.totals()
+        },
+        'windows': units['windows'],
+        'products': units['products'],
+        'date_range': {
+            'start_date': format_date(plan.windows[window_start][0]),
+            'end_date': format_date(plan.windows[window_stop - 1][1])
+        } if window_stop > window_start else None,
+        'datasets': datasets
+    }, output_dir)
+    write_run_metrics(profiler.to_dict(), output_dir)
+    
+    print()
+    print(f"✓ Shard {index}/{count} completed: {output_dir}/")
+    for dataset, count_written in records.items():
+        print(f"  - {dataset}: {count_written} records")
+    print()
+
+
+def run_merge_shards(config: dict, args: argparse.Namespace):
+    """
+    Concatenate a complete set of shards into data_dir and finish it like a normal run.
+    
+    The shards' manifests are checked for a shared config and seed, complete
+    non-overlapping coverage and consecutive ID ranges, and every file
+    against its recorded hash. data_dir must not hold another run's outputs.
+    The merged records then go through the normal run's writers and stages
+    (clustering, dim_date, validation, rollups, SQLite, search, attribution,
+    flat tables, manifest, metadata and run state), so the result equals
+    python main.py with the same config. With --verify-against the datasets
+    are compared byte for byte with such a run.
+    """
+    data_dir = config['output']['data_dir']
+    logger.info(f"Merging {len(args.merge_shards)} shards into {data_dir}")
+    try:
+        manifest = merge_shards(args.merge_shards, data_dir)
+    except ValueError as e:
+        logger.error(f"Cannot merge shards: {e}")
+        sys.exit(1)
+    logger.info(f"✓ Merged {manifest['shards']} shards (seed {manifest['random_seed']})")
+    
+    passed = run_generation(config, args, merged=load_merged(data_dir))
+    record_merge_outputs(data_dir)
+    
+    if args.verify_against:
+        try:
+            results = verify_against(data_dir, args.verify_against)
+        except ValueError as e:
+            logger.error(str(e))
+            sys.exit(1)
+        for dataset, identical in results.items():
+            logger.info(f"  {dataset}: {'identical' if identical else 'DIFFERENT'}")
+        if not all(results.values()):
+            logger.error(f"Merged output differs from {args.verify_against}")
+            sys.exit(1)
+        logger.info(f"✓ Merged output is byte-identical to {args.verify_against}")
+    if not passed:
+        sys.exit(1)
+
+
+# Inputs shared by the scenarios a worker process runs (set by _init_scenario_worker)
+_shared_inputs = None
+
+
+def _init_scenario_worker(shared: dict):
+    global _shared_inputs
+    _shared_inputs = shared
+
+
+def _run_scenario(name: str, config: dict, args: argparse.Namespace) -> dict:
+    """Generate one scenario in a worker process; returns its summary."""
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(logging.Formatter(f'%(asctime)s - %(levelname)s - [{name}] %(message)s'))
+    started = datetime.now()
+    try:
+        succeeded = run_generation(config, args, shared=_shared_inputs)
+        error = None if succeeded else 'validation or publishing failed'
+    except Exception as e:
+        logger.exception(f"Scenario {name} failed")
+        succeeded, error = False, f"{type(e).__name__}: {e}"
+    return {
+        'name': name,
+        'data_dir': config['output']['data_dir'],
+        'random_seed': config['random_seed'],
+        'date_range': config['date_range'],
+        'status': 'SUCCESS' if succeeded else 'FAILED',
+        'error': error,
+        'seconds': round((datetime.now() - started).total_seconds(), 3)
+    }
+
+
+def run_scenarios(config: dict, args: argparse.Namespace):
+    """
+    Generate many scenarios in one invocation.
+    
+    Each scenario is the base config with the overrides from the scenario
+    file, written to its own directory under scenarios.output_dir. The
+    products and calendars of all scenarios are built once in this process
+    and handed to the workers, and scenarios run concurrently on a process
+    pool, so throughput scales with the available cores.
+    """
+    scenario_config = config.get('scenarios', {})
+    root_dir = os.path.join(config['output']['data_dir'], scenario_config.get('output_dir', 'scenarios'))
+    try:
+        configs = scenario_configs(config, load_scenarios(args.scenarios), root_dir)
+    except (OSError, ValueError) as e:
+        logger.error(f"Invalid scenario file {args.scenarios}: {e}")
+        sys.exit(1)
+    workers = args.workers or scenario_config.get('max_workers', 0) or os.cpu_count() or 1
+    workers = min(workers, len(configs))
+    
+    started = datetime.now()
+    shared = precompute_inputs([scenario for _, scenario in configs])
+    logger.info(f"✓ Precomputed {len(shared['products'])} product catalogs and {len(shared['calendars'])} calendars "
+                f"for {len(configs)} scenarios")
+    logger.info(f"Running {len(configs)} scenarios on {workers} worker processes")
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_scenario_worker, initargs=(shared,)) as executor:
+        futures = [executor.submit(_run_scenario, name, scenario, args) for name, scenario in configs]
+        results = [future.result() for future in futures]
+    
+    seconds = (datetime.now() - started).total_seconds()
+    summary = {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'scenario_file': args.scenarios,
+        'workers': workers,
+        'seconds': round(seconds, 3),
+        'scenario_seconds': round(sum(result['seconds'] for result in results), 3),
+        'scenarios': results
+    }
+    os.makedirs(root_dir, exist_ok=True)
+    with open(os.path.join(root_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    
+    print()
+    print(f"{'Scenario':<24}{'Status':<9}{'Seconds':>9}  Output")
+    for result in results:
+        print(f"{result['name']:<24}{result['status']:<9}{result['seconds']:>9.1f}  {result['data_dir']}")
+    print()
+    logger.info(f"✓ {len(results)} scenarios in {seconds:.1f}s wall time "
+                f"({summary['scenario_seconds']:.1f}s of scenario time, {workers} workers); "
+                f"summary in {os.path.join(root_dir, SUMMARY_FILE)}")
+    
+    failed = [result['name'] for result in results if result['status'] != 'SUCCESS']
+    if failed:
+        logger.error(f"Failed scenarios: {', '.join(failed)}")
+        sys.exit(1)
+
+
+def main(argv=None):
     """Main data generation pipeline."""
+    args = parse_args(argv)
+    
+    # Before the banner: with the stdout sink, stdout carries only events
+    if args.stream:
+        run_stream(load_config(args.config), args)
+        return
+    if args.replay:
+        run_replay(load_config(args.config), args)
+        return
+    
     print("="*60)
     print("Nova Data Generator")
     print("="*60)
     print()
     
     # Load configuration
-    config = load_config()
+    config = load_config(args.config)
+    
+    if args.plan:
+        if not run_plan(config):
+            sys.exit(1)
+        return
+    
+    if args.diff:
+        if not run_diff(config, *args.diff):
+            sys.exit(1)
+        return
+    
+    if args.validate:
+        if not validate_existing(config, args.validate):
+            sys.exit(1)
+        return
+    
+    if args.incremental:
+        run_incremental(config, args)
+        return
+    
+    if args.shard:
+        run_shard(config, args)
+        return
+    
+    if args.merge_shards:
+        run_merge_shards(config, args)
+        return
+    
+    if args.scenarios:
+        run_scenarios(config, args)
+        return
+    
+    if not run_generation(config, args):
+        sys.exit(1)
+
+
+def run_generation(config: dict, args: argparse.Namespace, shared: dict = None, merged: dict = None) -> bool:
+    """
+    Generate all datasets, stages and metadata of a full run into data_dir.
+    
+    Fact tables and campaigns are generated through the ShardPlan of the
+    run, as the 0/1 shard, so merged shards hold the same records.
+    
+    Args:
+        shared: Products and calendars precomputed for several scenarios
+            (see utils/scenario_utils.precompute_inputs)
+        merged: Tables of merged shards (see utils/shard_utils.load_merged); they
+            replace the generation steps and the rest of the run is unchanged
+    
+    Returns:
+        False if validation (with fail_on_error) or publishing failed
+    """
+    data_dir = config['output']['data_dir']
     
     # Initialize random generator
     rng = RandomGenerator(seed=config['random_seed'])
     logger.info(f"✓ Initialized random generator with seed {config['random_seed']}")
     
-    # Track generation log
+    # Track generation log and per-step metrics
     log_entries = []
     datasets_info = {}
+    profiler = StageProfiler(profile_dir=os.path.join(data_dir, 'profiles') if args.profile else None)
+    
+    # Column statistics computed while each dataset is written
+    profiles = {}
+    
+    def new_profile(name: str):
+        if not config['output'].get('column_profiles', True):
+            return None
+        profiles[name] = DatasetProfile()
+        return profiles[name]
+    
+    def profile_dict(name: str):
+        return profiles[name].to_dict() if name in profiles else None
+    
+    # Stage cache for reusing unchanged step outputs
+    cache_config = config.get('cache', {})
+    cache = None
+    if cache_config.get('enabled', False) and not args.no_cache and not merged:
+        cache = StageCache(
+            cache_config.get('dir', '.cache/stages'),
+            max_size_mb=cache_config.get('max_size_mb', 2048),
+            max_entries=cache_config.get('max_entries', 50)
+        )
+    
+    # Run journal for chunk-level checkpoints
+    checkpoint_config = config.get('checkpoint', {})
+    journal = None
+    if (checkpoint_config.get('enabled', False) or args.resume) and not merged:
+        fingerprint = run_fingerprint(config, [
+            ProductGenerator, SalesGenerator, TransactionGenerator,
+            CampaignGenerator, SocialGenerator, ReviewGenerator, ShardPlan
+        ])
+        try:
+            journal = RunJournal(checkpoint_config.get('dir', '.cache/checkpoints'), fingerprint, resume=args.resume)
+        except ValueError as e:
+            logger.error(f"Failed to resume: {e}")
+            return False
+    
+    # Optional upload of finished files, overlapped with the later steps
+    publisher = open_publish_stage(config, args)
+    
+    def publish(filepath: str):
+        if publisher:
+            publisher.publish(filepath, data_dir)
+    
+    def generated(dataset: str, generate):
+        # Merged shards already hold the step's records
+        return (lambda checkpoint: merged[dataset]) if merged else generate
     
     # 1. Generate Products
     logger.info("Step 1/6: Generating product master data...")
-    product_gen = ProductGenerator(config, rng)
-    products_df = product_gen.generate_products()
-    write_csv(products_df, 'dim_products.csv', config['output']['data_dir'])
+    with profiler.step('Products') as step:
+        with step.phase('generate'):
+            products_df, products_key, cache_hit = run_step(
+                cache, journal, rng, 'products',
+                {'products': config['products'], 'date_range': config['date_range']},
+                [], [ProductGenerator],
+                generated('dim_products', lambda checkpoint: generate_products(config, rng, shared))
+            )
+        with step.phase('write'):
+            filepath = write_csv(products_df, 'dim_products.csv', data_dir, profile=new_profile('Products'))
+        step.record_output(len(products_df), filepath)
+    publish(filepath)
     
     log_entries.append({
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'dataset': 'Products',
         'record_count': len(products_df),
+        'metrics': step.to_dict(),
+        'cache': 'HIT' if cache_hit else ('MISS' if cache else 'DISABLED'),
         'status': 'SUCCESS'
     })
     
@@ -78,6 +1463,7 @@ def main():
         'filename': 'dim_products.csv',
         'description': 'Product master data with specifications',
         'record_count': len(products_df),
+        'profile': profile_dict('Products'),
         'fields': [
             {'name': 'product_id', 'type': 'STRING', 'description': 'Unique product identifier'},
             {'name': 'product_name', 'type': 'STRING', 'description': 'Product name'},
@@ -86,17 +1472,78 @@ def main():
         ]
     }
     
+    # Calendar over the date range, shared by the generators and written for BI joins
+    calendar = calendar_for(config, shared)
+    with profiler.step('Calendar') as step:
+        with step.phase('generate'):
+            calendar_df = calendar.frame()
+        with step.phase('write'):
+            filepath = write_csv(calendar_df, 'dim_date.csv', data_dir, profile=new_profile('Calendar'))
+        step.record_output(len(calendar_df), filepath)
+    publish(filepath)
+    
+    log_entries.append({
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'dataset': 'Calendar',
+        'record_count': len(calendar_df),
+        'metrics': step.to_dict(),
+        'status': 'SUCCESS'
+    })
+    
+    datasets_info['Calendar'] = {
+        'filename': 'dim_date.csv',
+        'description': 'Calendar dimension with seasons and per-country holidays',
+        'record_count': len(calendar_df),
+        'profile': profile_dict('Calendar'),
+        'fields': [
+            {'name': 'date', 'type': 'DATE', 'description': 'Calendar date (join key of the date columns)'},
+            {'name': 'date_key', 'type': 'INTEGER', 'description': 'Date as YYYYMMDD'},
+            {'name': 'season', 'type': 'STRING', 'description': 'Sales season (Holiday, Back to School, Post-Holiday, Regular)'},
+            {'name': 'seasonal_multiplier', 'type': 'DECIMAL', 'description': 'Sales multiplier of the season'},
+            {'name': 'holiday_countries', 'type': 'STRING', 'description': 'Countries with a public holiday on the date'},
+        ]
+    }
+    
+    # Record counts and ID ranges of every date window and product; each unit has its own random stream
+    window_days = config.get('sharding', {}).get('window_days', 7)
+    with profiler.step('Plan') as step:
+        with step.phase('generate'):
+            plan = ShardPlan(config, products_df, window_days)
+            windows = range(len(plan.windows))
+        step.record_output(len(plan.windows) + len(products_df))
+    plan_sections = {
+        'date_range': config['date_range'],
+        'social_posts': config['social_posts'],
+        'reviews': config['reviews'],
+        'window_days': window_days
+    }
+    
     # 2. Generate Sales
     logger.info("Step 2/6: Generating daily sales data...")
-    sales_gen = SalesGenerator(products_df, config, rng)
-    sales_df = sales_gen.generate_daily_sales()
-    write_csv(sales_df, 'fact_daily_sales.csv', config['output']['data_dir'])
+    with profiler.step('Daily Sales') as step:
+        with step.phase('generate'):
+            sales_df, sales_key, cache_hit = run_step(
+                cache, journal, rng, 'sales', plan_sections,
+                [products_key], [SalesGenerator, ShardPlan],
+                generated('fact_daily_sales', lambda checkpoint: generate_window_sales(
+                    plan, products_df, config, windows, calendar, checkpoint
+                ))
+            )
+        with step.phase('write'):
+            filepath = write_csv(
+                sales_df, 'fact_daily_sales.csv', data_dir, profile=new_profile('Daily Sales'),
+                **clustering_options(config, 'fact_daily_sales.csv')
+            )
+        step.record_output(len(sales_df), filepath)
+    publish(filepath)
     
     log_entries.append({
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'dataset': 'Daily Sales',
         'record_count': len(sales_df),
         'date_range': f"{sales_df['date'].min()} to {sales_df['date'].max()}",
+        'metrics': step.to_dict(),
+        'cache': 'HIT' if cache_hit else ('MISS' if cache else 'DISABLED'),
         'status': 'SUCCESS'
     })
     
@@ -104,6 +1551,7 @@ def main():
         'filename': 'fact_daily_sales.csv',
         'description': 'Daily sales transactions by product, region, and channel',
         'record_count': len(sales_df),
+        'profile': profile_dict('Daily Sales'),
         'date_range': f"{sales_df['date'].min()} to {sales_df['date'].max()}",
         'fields': [
             {'name': 'date', 'type': 'DATE', 'description': 'Sale date'},
@@ -115,14 +1563,29 @@ def main():
     
     # 3. Generate Transactions
     logger.info("Step 3/6: Generating customer transactions...")
-    transaction_gen = TransactionGenerator(products_df, sales_df, config, rng)
-    transactions_df = transaction_gen.generate_transactions()
-    write_csv(transactions_df, 'fact_transactions.csv', config['output']['data_dir'])
+    with profiler.step('Transactions') as step:
+        with step.phase('generate'):
+            transactions_df, transactions_key, cache_hit = run_step(
+                cache, journal, rng, 'transactions', dict(plan_sections, customers=config['customers']),
+                [products_key, sales_key], [TransactionGenerator, ShardPlan],
+                generated('fact_transactions', lambda checkpoint: generate_window_transactions(
+                    plan, products_df, sales_df, config, windows, checkpoint
+                ))
+            )
+        with step.phase('write'):
+            filepath = write_csv(
+                transactions_df, 'fact_transactions.csv', data_dir, profile=new_profile('Transactions'),
+                **clustering_options(config, 'fact_transactions.csv')
+            )
+        step.record_output(len(transactions_df), filepath)
+    publish(filepath)
     
     log_entries.append({
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'dataset': 'Transactions',
         'record_count': len(transactions_df),
+        'metrics': step.to_dict(),
+        'cache': 'HIT' if cache_hit else ('MISS' if cache else 'DISABLED'),
         'status': 'SUCCESS'
     })
     
@@ -130,6 +1593,7 @@ def main():
         'filename': 'fact_transactions.csv',
         'description': 'Customer transaction details with segments and demographics',
         'record_count': len(transactions_df),
+        'profile': profile_dict('Transactions'),
         'fields': [
             {'name': 'transaction_id', 'type': 'STRING', 'description': 'Unique transaction identifier'},
             {'name': 'customer_id', 'type': 'STRING', 'description': 'Customer identifier'},
@@ -139,14 +1603,29 @@ def main():
     
     # 4. Generate Campaigns
     logger.info("Step 4/6: Generating campaign performance data...")
-    campaign_gen = CampaignGenerator(products_df, config, rng)
-    campaigns_df = campaign_gen.generate_campaigns()
-    write_csv(campaigns_df, 'fact_campaign_performance.csv', config['output']['data_dir'])
+    with profiler.step('Campaigns') as step:
+        with step.phase('generate'):
+            campaigns_df, campaigns_key, cache_hit = run_step(
+                cache, journal, rng, 'campaigns', {},
+                [products_key], [CampaignGenerator, ShardPlan],
+                generated('fact_campaign_performance', lambda checkpoint: generate_product_campaigns(
+                    plan, products_df, config, range(len(products_df))
+                ))
+            )
+        with step.phase('write'):
+            filepath = write_csv(
+                campaigns_df, 'fact_campaign_performance.csv', data_dir, profile=new_profile('Campaigns'),
+                **clustering_options(config, 'fact_campaign_performance.csv')
+            )
+        step.record_output(len(campaigns_df), filepath)
+    publish(filepath)
     
     log_entries.append({
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'dataset': 'Campaigns',
         'record_count': len(campaigns_df),
+        'metrics': step.to_dict(),
+        'cache': 'HIT' if cache_hit else ('MISS' if cache else 'DISABLED'),
         'status': 'SUCCESS'
     })
     
@@ -154,6 +1633,7 @@ def main():
         'filename': 'fact_campaign_performance.csv',
         'description': 'Marketing campaign performance metrics',
         'record_count': len(campaigns_df),
+        'profile': profile_dict('Campaigns'),
         'fields': [
             {'name': 'campaign_id', 'type': 'STRING', 'description': 'Campaign identifier'},
             {'name': 'channel', 'type': 'STRING', 'description': 'Marketing channel'},
@@ -163,14 +1643,29 @@ def main():
     
     # 5. Generate Social Media Posts
     logger.info("Step 5/6: Generating social media posts...")
-    social_gen = SocialGenerator(products_df, config, rng)
-    social_posts = social_gen.generate_posts()
-    write_json(social_posts, 'social_media_posts.json', config['output']['data_dir'])
+    with profiler.step('Social Media Posts') as step:
+        with step.phase('generate'):
+            social_posts, social_key, cache_hit = run_step(
+                cache, journal, rng, 'social_posts', plan_sections,
+                [products_key], [SocialGenerator, ShardPlan],
+                generated('social_media_posts', lambda checkpoint: generate_window_posts(
+                    plan, products_df, config, windows, checkpoint
+                ))
+            )
+        with step.phase('write'):
+            filepath = write_json(
+                social_posts, 'social_media_posts.json', data_dir, profile=new_profile('Social Media Posts'),
+                **clustering_options(config, 'social_media_posts.json')
+            )
+        step.record_output(len(social_posts), filepath)
+    publish(filepath)
     
     log_entries.append({
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'dataset': 'Social Media Posts',
         'record_count': len(social_posts),
+        'metrics': step.to_dict(),
+        'cache': 'HIT' if cache_hit else ('MISS' if cache else 'DISABLED'),
         'status': 'SUCCESS'
     })
     
@@ -178,6 +1673,7 @@ def main():
         'filename': 'social_media_posts.json',
         'description': 'Social media posts with sentiment analysis',
         'record_count': len(social_posts),
+        'profile': profile_dict('Social Media Posts'),
         'fields': [
             {'name': 'post_id', 'type': 'STRING', 'description': 'Post identifier'},
             {'name': 'sentiment', 'type': 'STRING', 'description': 'Sentiment classification'},
@@ -186,14 +1682,29 @@ def main():
     
     # 6. Generate Reviews
     logger.info("Step 6/6: Generating product reviews...")
-    review_gen = ReviewGenerator(products_df, transactions_df, config, rng)
-    reviews = review_gen.generate_reviews()
-    write_json(reviews, 'product_reviews.json', config['output']['data_dir'])
+    with profiler.step('Product Reviews') as step:
+        with step.phase('generate'):
+            reviews, reviews_key, cache_hit = run_step(
+                cache, journal, rng, 'reviews', plan_sections,
+                [products_key, transactions_key], [ReviewGenerator, ShardPlan],
+                generated('product_reviews', lambda checkpoint: generate_window_reviews(
+                    plan, products_df, transactions_df, config, windows, checkpoint
+                ))
+            )
+        with step.phase('write'):
+            filepath = write_json(
+                reviews, 'product_reviews.json', data_dir, profile=new_profile('Product Reviews'),
+                **clustering_options(config, 'product_reviews.json')
+            )
+        step.record_output(len(reviews), filepath)
+    publish(filepath)
     
     log_entries.append({
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'dataset': 'Product Reviews',
         'record_count': len(reviews),
+        'metrics': step.to_dict(),
+        'cache': 'HIT' if cache_hit else ('MISS' if cache else 'DISABLED'),
         'status': 'SUCCESS'
     })
     
@@ -201,16 +1712,101 @@ def main():
         'filename': 'product_reviews.json',
         'description': 'Amazon-style product reviews with ratings and feedback',
         'record_count': len(reviews),
+        'profile': profile_dict('Product Reviews'),
         'fields': [
             {'name': 'review_id', 'type': 'STRING', 'description': 'Review identifier'},
             {'name': 'rating', 'type': 'INTEGER', 'description': 'Rating (1-5)'},
         ]
     }
     
+    tables = {
+        'dim_products': products_df,
+        'dim_date': calendar_df,
+        'fact_daily_sales': sales_df,
+        'fact_transactions': transactions_df,
+        'fact_campaign_performance': campaigns_df,
+        'social_media_posts': pd.DataFrame(social_posts),
+        'product_reviews': pd.DataFrame(reviews)
+    }
+    
+    # Validate all tables against the configured rules
+    passed = run_validation_stage(config, tables, config['date_range'], profiler, log_entries, data_dir)
+    
+    # Pre-aggregate dashboard rollups, each tied to the step outputs it was computed from
+    step_keys = {
+        'dim_products': products_key,
+        'dim_date': None,
+        'fact_daily_sales': sales_key,
+        'fact_transactions': transactions_key,
+        'fact_campaign_performance': campaigns_key,
+        'social_media_posts': social_key,
+        'product_reviews': reviews_key
+    }
+    sources = {}
+    for info in datasets_info.values():
+        dataset = os.path.splitext(info['filename'])[0]
+        sources[dataset] = {'file': info['filename'], 'record_count': info['record_count'], 'step_key': step_keys[dataset]}
+    run_rollup_stage(config, tables, sources, {
+        'run_id': profiler.run_id,
+        'random_seed': config['random_seed'],
+        'date_range': config['date_range']
+    }, profiler, log_entries, data_dir)
+    
+    # Load typed tables into SQLite; nested JSON fields are flattened from the raw records
+    run_sqlite_stage(config, dict(tables, social_media_posts=social_posts, product_reviews=reviews),
+                     profiler, log_entries, data_dir)
+    
+    # Index review and post text for search demos
+    run_search_index_stage(config, {'product_reviews': reviews, 'social_media_posts': social_posts},
+                           profiler, log_entries, data_dir)
+    
+    # Campaign lift measured on the daily sales rather than the campaigns' reported revenue
+    filepath = run_attribution_stage(config, campaigns_df, sales_df, products_df, config['date_range'],
+                                     profiler, log_entries, data_dir)
+    if filepath:
+        publish(filepath)
+    
+    # Flat typed tables of the nested JSON datasets for BI tools
+    for filepath in run_flat_export_stage(config, {'social_media_posts': social_posts, 'product_reviews': reviews},
+                                          profiler, log_entries, data_dir):
+        publish(filepath)
+    
+    # Fingerprint the outputs for --diff
+    run_manifest_stage(config, profiler, log_entries, data_dir)
+    
+    # Wait for the uploads started during generation
+    published = run_publish_stage(publisher, config, profiler, log_entries, data_dir)
+    
     # Generate metadata
     logger.info("Generating metadata and documentation...")
-    generate_data_dictionary(datasets_info, config['output']['data_dir'])
-    generate_log(log_entries, config['output']['data_dir'])
+    generate_data_dictionary(datasets_info, data_dir)
+    if profiles:
+        write_column_profiles(datasets_info, data_dir)
+    generate_log(log_entries, data_dir)
+    write_run_metrics(profiler.to_dict(), data_dir)
+    
+    # Record high-water marks so later runs can extend the data incrementally
+    save_customer_history(dict(zip(transactions_df['customer_id'], transactions_df['product_id'])), data_dir)
+    save_dataset_profiles(datasets_info, profiles, data_dir)
+    save_run_state({
+        'random_seed': config['random_seed'],
+        'start_date': config['date_range']['start_date'],
+        'end_date': config['date_range']['end_date'],
+        # IDs continue after the plan's ranges, which may hold a few unused IDs
+        'next_ids': {
+            'transaction': plan.totals()['fact_transactions'] + 1,
+            'post': plan.totals()['social_media_posts'] + 1,
+            'review': plan.totals()['product_reviews'] + 1
+        },
+        # The rate implied by reviews.min/max_per_product over the planned transactions,
+        # not the share of this run's transactions that got reviews
+        'review_rate': plan.review_rate,
+        'increments': []
+    }, data_dir)
+    
+    if journal:
+        journal.finish()
+    published = finish_publish(publisher, config, data_dir) and published
     
     print()
     print("="*60)
@@ -219,8 +1815,16 @@ def main():
     print(f"\nGenerated {len(datasets_info)} datasets:")
     for name, info in datasets_info.items():
         print(f"  - {name}: {info['record_count']} records")
-    print(f"\nOutput directory: {config['output']['data_dir']}/")
+    print(f"\nOutput directory: {data_dir}/")
     print()
+    
+    if not passed and config['validation'].get('fail_on_error', False):
+        logger.error("Validation failed; see validation_report.json")
+        return False
+    if not published:
+        logger.error("Publishing failed; see generation.log")
+        return False
+    return True
 
 
 if __name__ == '__main__':
@@ -0,0 +1,247 @@
+"""
+Typed loader for generated Nova datasets.
+
+Usage:
+    import nova_data
+
+    sales = nova_data.load('fact_daily_sales', columns=['date', 'product_id', 'units_sold'],
+                           date_range=('2023-05-01', '2023-05-31'))
+"""
+import json
+import os
+import sys
+from typing import Dict, List, Tuple, Union
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generators.product_generator import ProductGenerator
+from generators.sales_generator import SalesGenerator
+from generators.transaction_generator import TransactionGenerator
+from generators.campaign_generator import CampaignGenerator
+from generators.social_generator import SocialGenerator
+from generators.review_generator import ReviewGenerator
+from utils.date_utils import Calendar
+from utils.attribution_utils import ATTRIBUTION_SCHEMA
+from utils.flatten_utils import FLAT_TABLES
+from utils.stream_utils import dataset_files
+from utils.zonemap_utils import ZoneMap, in_range, iter_blocks
+
+# Dataset name -> generator schema and the column date_range applies to
+DATASETS = {
+    'dim_products': {'schema': ProductGenerator.OUTPUT_SCHEMA, 'date_column': 'launch_date'},
+    'dim_date': {'schema': Calendar.OUTPUT_SCHEMA, 'date_column': 'date'},
+    'fact_daily_sales': {'schema': SalesGenerator.OUTPUT_SCHEMA, 'date_column': 'date'},
+    'fact_transactions': {'schema': TransactionGenerator.OUTPUT_SCHEMA, 'date_column': 'transaction_datetime'},
+    'fact_campaign_performance': {'schema': CampaignGenerator.OUTPUT_SCHEMA, 'date_column': 'start_date'},
+    'social_media_posts': {'schema': SocialGenerator.OUTPUT_SCHEMA, 'date_column': 'timestamp'},
+    'product_reviews': {'schema': ReviewGenerator.OUTPUT_SCHEMA, 'date_column': 'review_datetime'},
+    'fact_campaign_attribution': {'schema': ATTRIBUTION_SCHEMA, 'date_column': 'start_date'},
+    **{table: {'schema': spec['schema'], 'date_column': spec['date_column']} for table, spec in FLAT_TABLES.items()}
+}
+
+# Parse-time dtypes of CSV columns; dates stay strings until rows are filtered
+_CSV_DTYPES = {
+    'string': 'object',
+    'category': 'category',
+    'int': 'int64',
+    'float': 'float64',
+    'bool': 'bool',
+    'date': 'object',
+    'datetime': 'object'
+}
+
+Filter = Union[Tuple, List, set, str, int, float]
+
+
+def schema(dataset: str) -> Dict[str, str]:
+    """Logical column types of a dataset, as declared by its generator."""
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}' (expected one of: {', '.join(DATASETS)})")
+    return DATASETS[dataset]['schema']
+
+
+def _normalize_filters(filters: Dict[str, Filter]) -> Dict[str, Tuple]:
+    """
+    Convert filters to ('range', low, high) or ('in', values).
+
+    A tuple is an inclusive (low, high) range with None for an open side,
+    a list or set matches any of its values, and a scalar matches equality.
+    """
+    normalized = {}
+    for col, condition in (filters or {}).items():
+        if isinstance(condition, tuple):
+            normalized[col] = ('range',) + condition
+        elif isinstance(condition, (list, set, frozenset)):
+            normalized[col] = ('in', list(condition))
+        else:
+            normalized[col] = ('in', [condition])
+    return normalized
+
+
+def _prune_bounds(filters: Dict[str, Tuple]) -> Dict[str, Tuple]:
+    """(low, high) bounds per filter for zone-map and row-group pruning."""
+    bounds = {}
+    for col, condition in filters.items():
+        if condition[0] == 'range':
+            bounds[col] = condition[1:]
+        elif condition[1]:
+            try:
+                bounds[col] = (min(condition[1]), max(condition[1]))
+            except TypeError:
+                # Mixed value types cannot be ordered; skip pruning on this column
+                pass
+    return bounds
+
+
+def _apply_filters(df: pd.DataFrame, filters: Dict[str, Tuple]) -> pd.DataFrame:
+    if not filters or df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for col, condition in filters.items():
+        values = df[col]
+        if condition[0] == 'range':
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype(object)
+            mask &= in_range(values, condition[1], condition[2])
+        else:
+            mask &= values.isin(condition[1])
+    return df[mask]
+
+
+def _convert(df: pd.DataFrame, types: Dict[str, str]) -> pd.DataFrame:
+    """Apply logical types that could not be set while parsing."""
+    for col in df.columns:
+        logical = types.get(col)
+        if logical == 'date':
+            df[col] = pd.to_datetime(df[col], format='%Y-%m-%d')
+        elif logical == 'datetime':
+            df[col] = pd.to_datetime(df[col], format='ISO8601')
+        elif logical == 'category' and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+        elif logical in ('int', 'float') and df[col].dtype == object:
+            df[col] = df[col].astype('int64' if logical == 'int' else 'float64')
+        elif logical == 'bool' and df[col].dtype == object:
+            df[col] = df[col].astype(bool)
+    return df
+
+
+def _concat(frames: List[pd.DataFrame], columns: List[str], types: Dict[str, str]) -> pd.DataFrame:
+    """Concatenate parsed chunks, unioning the categories of categorical columns."""
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    df = pd.concat(frames, ignore_index=True)
+    for col in df.columns:
+        parts = [frame[col] for frame in frames]
+        if types.get(col) == 'category' and not isinstance(df[col].dtype, pd.CategoricalDtype) and \
+                all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            df[col] = union_categoricals(parts)
+    return df
+
+
+def _load_csv(path: str, usecols: List[str], types: Dict[str, str], filters: Dict[str, Tuple],
+              bounds: Dict[str, Tuple]) -> List[pd.DataFrame]:
+    dtypes = {col: _CSV_DTYPES[types[col]] for col in usecols if col in types}
+    frames = []
+    for chunk in iter_blocks(path, bounds, usecols=usecols, dtype=dtypes):
+        frames.append(_apply_filters(chunk, filters))
+    return frames
+
+
+def _load_json(path: str, usecols: List[str], filters: Dict[str, Tuple]) -> List[pd.DataFrame]:
+    if path.endswith('.jsonl'):
+        frames = [chunk[usecols] for chunk in pd.read_json(path, lines=True, chunksize=100000, dtype=False)]
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            frames = [pd.DataFrame(json.load(f), columns=usecols)]
+    return [_apply_filters(frame, filters) for frame in frames]
+
+
+def _load_parquet(path: str, usecols: List[str], filters: Dict[str, Tuple],
+                  bounds: Dict[str, Tuple]) -> List[pd.DataFrame]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet files requires the optional pyarrow package (pip install pyarrow)")
+    # Bounds are pushed down so row groups whose statistics do not overlap are skipped
+    expressions = []
+    for col, (low, high) in bounds.items():
+        if low is not None:
+            expressions.append((col, '>=', low))
+        if high is not None:
+            expressions.append((col, '<=', high))
+    table = pq.read_table(path, columns=usecols, filters=expressions or None, memory_map=True)
+    return [_apply_filters(table.to_pandas(), filters)]
+
+
+def load(dataset: str, columns: List[str] = None, filters: Dict[str, Filter] = None,
+         date_range: Tuple[str, str] = None, data_dir: str = 'data') -> pd.DataFrame:
+    """
+    Load a generated dataset with typed columns, reading only what is needed.
+
+    Columns get the types declared by the generators at parse time
+    (categorical, integer, boolean, float), and date/datetime columns are
+    converted after the rows are filtered. Only the requested columns are
+    parsed. Blocks of clustered CSV files and whole incremental part files
+    whose zone maps do not overlap the filters are skipped without being
+    parsed; a Parquet copy (<dataset>.parquet) is preferred when present and
+    read memory-mapped with row-group pruning (requires the optional pyarrow
+    package).
+
+    Zone maps are written for the datasets listed in output.clustering.tables
+    (on by default for the fact tables). A dataset written with clustering
+    disabled or left out of that list has no zone map, so a date_range or
+    filter read parses the whole file.
+
+    Args:
+        dataset: Dataset name (file name without extension), e.g. 'fact_daily_sales'
+        columns: Columns to return (None returns all)
+        filters: Column -> (low, high) inclusive range, list of values, or a single value.
+            Date and datetime columns are compared as ISO strings.
+        date_range: (start_date, end_date) inclusive range on the dataset's date column
+        data_dir: Directory with generated outputs
+
+    Returns:
+        DataFrame with the matching rows
+    """
+    types = schema(dataset)
+    filters = _normalize_filters(filters)
+    if date_range:
+        if DATASETS[dataset]['date_column'] is None:
+            raise ValueError(f"Dataset '{dataset}' has no date column; filter on its key instead")
+        start, end = date_range
+        # An end date covers its whole day when the column holds datetimes
+        filters[DATASETS[dataset]['date_column']] = ('range', start, f'{end}~' if end and len(end) == 10 else end)
+    bounds = _prune_bounds(filters)
+
+    columns = list(columns) if columns else list(types)
+    unknown = [col for col in columns + list(filters) if col not in types]
+    if unknown:
+        raise ValueError(f"Unknown columns for {dataset}: {', '.join(unknown)}")
+    usecols = columns + [col for col in filters if col not in columns]
+
+    parquet_path = os.path.join(data_dir, f'{dataset}.parquet')
+    paths = [parquet_path] if os.path.exists(parquet_path) else dataset_files(data_dir, dataset)
+    if not paths:
+        raise FileNotFoundError(f"No files for dataset '{dataset}' in {data_dir}")
+
+    frames = []
+    for path in paths:
+        if path.endswith('.parquet'):
+            frames.extend(_load_parquet(path, usecols, filters, bounds))
+        elif path.endswith('.csv'):
+            frames.extend(_load_csv(path, usecols, types, filters, bounds))
+        else:
+            # Skip whole part files whose zone map rules them out
+            zone_map = ZoneMap.load(path)
+            if zone_map is not None and not zone_map.select(bounds):
+                continue
+            frames.extend(_load_json(path, usecols, filters))
+
+    df = _concat(frames, usecols, types)
+    return _convert(df[columns], types)
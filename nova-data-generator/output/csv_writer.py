@@ -3,9 +3,16 @@ CSV file writer.
 """
 import pandas as pd
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from utils.profiling_utils import phase
+from utils.zonemap_utils import ZoneMap
 
-def write_csv(df: pd.DataFrame, filename: str, output_dir: str = 'data', encoding: str = 'utf-8'):
+
+def write_csv(df: pd.DataFrame, filename: str, output_dir: str = 'data', encoding: str = 'utf-8',
+              append: bool = False, profile=None, chunk_size: int = 100000,
+              sort_by: list = None, zone_map_columns: list = None, block_rows: int = 10000):
     """
     Write DataFrame to CSV file.
     
@@ -14,9 +21,58 @@ def write_csv(df: pd.DataFrame, filename: str, output_dir: str = 'data', encodin
         filename: Output filename
         output_dir: Output directory
         encoding: File encoding (default: utf-8)
+        append: Append rows to an existing file without rewriting it
+        profile: Optional DatasetProfile updated with each chunk as it is written
+        chunk_size: Rows per written chunk when profiling
+        sort_by: Cluster the written rows on these columns (the DataFrame itself is not modified)
+        zone_map_columns: Write a zone map sidecar with per-block min/max of these columns
+        block_rows: Rows per zone map block
     """
     os.makedirs(output_dir, exist_ok=True)
     filepath = os.path.join(output_dir, filename)
-    df.to_csv(filepath, index=False, encoding=encoding)
-    print(f"✓ Wrote {len(df)} records to {filepath}")
+    append = append and os.path.exists(filepath)
+    
+    if sort_by:
+        with phase('sort'):
+            df = df.sort_values(sort_by, kind='mergesort')
+    
+    zone_map = None
+    if zone_map_columns:
+        if append:
+            # Rows already in the file can only be skipped if they were indexed too
+            zone_map = ZoneMap.load(filepath)
+        else:
+            zone_map = ZoneMap(zone_map_columns, block_rows, sort_by)
+    
+    if profile is None and zone_map is None:
+        if append:
+            df.to_csv(filepath, mode='a', header=False, index=False, encoding=encoding)
+        else:
+            df.to_csv(filepath, index=False, encoding=encoding)
+    else:
+        # Profile each chunk while it is still hot, instead of re-reading the file
+        block_rows = min(zone_map.block_rows, chunk_size) if zone_map else chunk_size
+        with open(filepath, 'ab' if append else 'wb') as f:
+            if not append:
+                f.write(df.head(0).to_csv(index=False).encode(encoding))
+                if zone_map:
+                    zone_map.header_bytes = f.tell()
+            for start in range(0, max(len(df), 1), chunk_size):
+                chunk = df.iloc[start:start + chunk_size]
+                for block_start in range(0, len(chunk), block_rows):
+                    block = chunk.iloc[block_start:block_start + block_rows]
+                    data = block.to_csv(header=False, index=False).encode(encoding)
+                    if zone_map:
+                        zone_map.add_block(block, f.tell(), len(data))
+                    f.write(data)
+                if profile is not None:
+                    with phase('profile'):
+                        profile.update(chunk)
+        if zone_map:
+            zone_map.save(filepath)
+    
+    if append:
+        print(f"✓ Appended {len(df)} records to {filepath}")
+    else:
+        print(f"✓ Wrote {len(df)} records to {filepath}")
     return filepath
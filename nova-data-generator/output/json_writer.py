@@ -3,9 +3,16 @@ JSON file writer.
 """
 import json
 import os
+import sys
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from utils.profiling_utils import phase
+from utils.zonemap_utils import ZoneMap
 
-def write_json(data: list, filename: str, output_dir: str = 'data', indent: int = 2, encoding: str = 'utf-8'):
+
+def write_json(data: list, filename: str, output_dir: str = 'data', indent: int = 2, encoding: str = 'utf-8',
+               profile=None, chunk_size: int = 100000, sort_by: list = None, zone_map_columns: list = None):
     """
     Write list of dictionaries to JSON file.
     
@@ -15,6 +22,10 @@ def write_json(data: list, filename: str, output_dir: str = 'data', indent: int
         output_dir: Output directory
         indent: JSON indentation (default: 2)
         encoding: File encoding (default: utf-8)
+        profile: Optional DatasetProfile updated from the converted records
+        chunk_size: Records per profiled batch
+        sort_by: Cluster the written records on these fields (the list itself is not modified)
+        zone_map_columns: Write a zone map sidecar with the file-level min/max of these fields
     """
     import numpy as np
     
@@ -36,10 +47,26 @@ def write_json(data: list, filename: str, output_dir: str = 'data', indent: int
     filepath = os.path.join(output_dir, filename)
     
     # Convert data
-    converted_data = convert_to_native(data)
+    with phase('serialize'):
+        converted_data = convert_to_native(data)
+    
+    if sort_by:
+        with phase('sort'):
+            converted_data = sorted(converted_data, key=lambda record: tuple(record[key] for key in sort_by))
     
     with open(filepath, 'w', encoding=encoding) as f:
         json.dump(converted_data, f, indent=indent, ensure_ascii=False)
     
+    if zone_map_columns:
+        # A JSON array cannot be read from an offset, so the whole file is one block
+        zone_map = ZoneMap(zone_map_columns, len(converted_data), sort_by)
+        zone_map.add_block(pd.DataFrame(converted_data, columns=zone_map_columns), 0, os.path.getsize(filepath))
+        zone_map.save(filepath)
+    
+    if profile is not None:
+        with phase('profile'):
+            for start in range(0, len(converted_data), chunk_size):
+                profile.update_records(converted_data[start:start + chunk_size])
+    
     print(f"✓ Wrote {len(data)} records to {filepath}")
     return filepath
@@ -2,6 +2,7 @@
 Metadata and documentation writer.
 """
 import os
+import json
 from datetime import datetime
 import pandas as pd
 
@@ -35,32 +36,177 @@ def generate_data_dictionary(datasets_info: dict, output_dir: str = 'data'):
                 f.write(f"- `{field['name']}` ({field['type']}): {field['description']}\n")
             
             f.write("\n")
+            
+            if info.get('profile'):
+                _write_column_statistics(f, info['profile'])
     
     print(f"✓ Generated data dictionary: {filepath}")
     return filepath
 
 
-def generate_log(log_entries: list, output_dir: str = 'data'):
+def _format_stat(value, max_length: int = 30) -> str:
+    """Format a statistic for a Markdown table cell."""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        text = f"{value:,.4g}" if abs(value) < 1e6 else f"{value:,.0f}"
+    else:
+        text = str(value)
+    text = text.replace('|', '\\|').replace('\n', ' ')
+    return text if len(text) <= max_length else text[:max_length - 1] + '…'
+
+
+def _write_column_statistics(f, profile: dict):
+    """Write the per-column statistics table of a dataset."""
+    f.write("**Column Statistics**:\n\n")
+    f.write("| Column | Type | Nulls | Distinct (≈) | Min | Max | Median | p99 | Top Values |\n")
+    f.write("|---|---|---|---|---|---|---|---|---|\n")
+    for column in profile['columns']:
+        quantiles = column.get('quantiles', {})
+        top_values = ', '.join(
+            f"{_format_stat(top['value'], 20)} ({top['count']:,})" for top in column.get('top_values', [])[:3]
+        )
+        f.write(
+            f"| `{column['name']}` | {column['type']} | {column['null_count']:,} | "
+            f"{column['approx_distinct']:,} | {_format_stat(column['min'])} | {_format_stat(column['max'])} | "
+            f"{_format_stat(quantiles.get('p50'))} | {_format_stat(quantiles.get('p99'))} | {top_values} |\n"
+        )
+    f.write("\n")
+
+
+def write_column_profiles(datasets_info: dict, output_dir: str = 'data'):
+    """
+    Write machine-readable column statistics sidecar.
+    
+    Args:
+        datasets_info: Dictionary with dataset information (datasets with a 'profile' are written)
+        output_dir: Output directory
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, 'column_profiles.json')
+    
+    profiles = {
+        info['filename']: info['profile']
+        for info in datasets_info.values() if info.get('profile')
+    }
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'datasets': profiles
+        }, f, indent=2, ensure_ascii=False, default=str)
+    
+    print(f"✓ Generated column profiles: {filepath}")
+    return filepath
+
+
+def generate_log(log_entries: list, output_dir: str = 'data', append: bool = False):
     """
     Generate generation log file.
     
     Args:
         log_entries: List of log entry dictionaries
         output_dir: Output directory
+        append: Append entries to the existing log (incremental runs)
     """
     os.makedirs(output_dir, exist_ok=True)
     filepath = os.path.join(output_dir, 'generation.log')
+    append = append and os.path.exists(filepath)
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(f"Nova Data Generator - Generation Log\n")
-        f.write(f"{'='*60}\n\n")
+    with open(filepath, 'a' if append else 'w', encoding='utf-8') as f:
+        if append:
+            f.write(f"Incremental Run - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"{'-'*60}\n\n")
+        else:
+            f.write(f"Nova Data Generator - Generation Log\n")
+            f.write(f"{'='*60}\n\n")
         
         for entry in log_entries:
             f.write(f"[{entry['timestamp']}] {entry['dataset']}\n")
             f.write(f"  Records: {entry['record_count']}\n")
             if 'date_range' in entry:
                 f.write(f"  Date Range: {entry['date_range']}\n")
+            if 'cache' in entry:
+                f.write(f"  Cache: {entry['cache']}\n")
+            if 'metrics' in entry:
+                _write_log_metrics(f, entry['metrics'])
             f.write(f"  Status: {entry['status']}\n\n")
     
     print(f"✓ Generated log file: {filepath}")
     return filepath
+
+
+def _write_log_metrics(f, metrics: dict):
+    """Write per-step timing, throughput and memory lines for a log entry."""
+    phases = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in metrics['phases'].items())
+    f.write(f"  Duration: {metrics['seconds']:.2f}s ({phases})\n")
+    f.write(f"  Throughput: {metrics['rows_per_sec']:,.0f} rows/sec\n")
+    f.write(f"  Bytes Written: {metrics['bytes_written']:,}\n")
+    f.write(f"  Peak RSS: {metrics['peak_rss_mb']:.1f} MB\n")
+    if metrics.get('profile_path'):
+        f.write(f"  Profile: {metrics['profile_path']}\n")
+
+
+def write_run_metrics(run_metrics: dict, output_dir: str = 'data'):
+    """
+    Write machine-readable run metrics file.
+    
+    Args:
+        run_metrics: Dictionary with run-level and per-step metrics
+        output_dir: Output directory
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, 'run_metrics.json')
+    
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(run_metrics, f, indent=2)
+    
+    print(f"✓ Generated run metrics: {filepath}")
+    return filepath
+
+
+def write_validation_report(results: dict, output_dir: str = 'data', integrity: dict = None):
+    """
+    Write validation report with violation counts and sample rows.
+    
+    Args:
+        results: Validation result per dataset from run_validation()
+        output_dir: Output directory
+        integrity: Result per relationship from run_integrity_checks()
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, 'validation_report.json')
+    
+    integrity = integrity or {}
+    report = {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'passed': all(result['passed'] for result in list(results.values()) + list(integrity.values())),
+        'datasets': results,
+        'integrity': integrity
+    }
+    with open(filepath, 'w', encoding='utf-8') as f:
+        # Sample rows may hold numpy scalars or timestamps
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    
+    print(f"✓ Generated validation report: {filepath}")
+    return filepath
+
+
+def write_rollup_lineage(lineage: dict, output_dir: str = 'data/rollups'):
+    """
+    Write lineage records of the rollup tables.
+    
+    Args:
+        lineage: Lineage record per rollup name from lineage_record()
+        output_dir: Rollup directory
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, 'lineage.json')
+    
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'rollups': lineage
+        }, f, indent=2, ensure_ascii=False)
+    
+    print(f"✓ Generated rollup lineage: {filepath}")
+    return filepath
@@ -0,0 +1,274 @@
+"""
+Background publisher uploading output files to an S3-compatible object store.
+"""
+import base64
+import fnmatch
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Error codes worth retrying; other client errors (access denied, missing bucket) fail at once
+RETRYABLE_CODES = {'BadDigest', 'InvalidDigest', 'RequestTimeout', 'SlowDown', 'InternalError',
+                   'ServiceUnavailable', 'Throttling', 'ThrottlingException'}
+
+
+class ChecksumError(Exception):
+    """The store acknowledged different bytes than were sent."""
+
+
+def _etag(response: Dict) -> str:
+    return response['ETag'].strip('"')
+
+
+class S3Publisher:
+    """
+    Upload files to S3 (or any S3-compatible endpoint) while generation continues.
+
+    publish() only queues a file, so uploads overlap with later steps.
+    Files above part_size are sent as multipart uploads whose parts are read
+    and uploaded concurrently, with at most 2 * max_concurrency parts held in
+    memory. Every request carries a Content-MD5, so the store rejects bodies
+    corrupted in transit, and each part's and object's ETag is checked against
+    the locally computed MD5. Failed requests are retried with exponential
+    backoff; a multipart upload that still fails is aborted so no orphaned
+    parts are left behind.
+    """
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: str = None, region: str = 'us-east-1',
+                 part_size_mb: float = 8, max_concurrency: int = 8, max_retries: int = 5,
+                 retry_backoff_sec: float = 0.5, verify_etag: bool = True, client=None):
+        """
+        Args:
+            bucket: Destination bucket
+            prefix: Key prefix; a file's key is <prefix>/<path relative to the published root>
+            endpoint_url: S3-compatible endpoint (e.g. MinIO or moto server); AWS when empty
+            region: Region name used for request signing
+            part_size_mb: Multipart part size (S3 requires at least 5 MB except for the last part)
+            max_concurrency: Files and parts uploaded at the same time
+            max_retries: Retries per request after the first attempt
+            retry_backoff_sec: Delay before the first retry, doubled for each further retry
+            verify_etag: Compare ETags with the local MD5 (stores encrypting with KMS return other ETags)
+            client: Existing boto3 S3 client (credentials otherwise come from the standard AWS chain)
+        """
+        if client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError:
+                raise ImportError("The publish stage requires the optional boto3 package (pip install boto3)")
+            # Retries are handled here, per part, so botocore makes a single attempt
+            client = boto3.client(
+                's3', endpoint_url=endpoint_url or None, region_name=region,
+                config=Config(max_pool_connections=max_concurrency * 2, retries={'total_max_attempts': 1})
+            )
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.part_size = int(part_size_mb * 1048576)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_sec
+        self.verify_etag = verify_etag
+
+        self.file_pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='publish-file')
+        self.part_pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='publish-part')
+        self.part_slots = threading.Semaphore(max_concurrency * 2)
+        self.lock = threading.Lock()
+        self.submitted = {}
+        self.futures = []
+        self.started = time.time()
+        self.stats = {'files': 0, 'bytes': 0, 'parts': 0, 'multipart_files': 0, 'retries': 0, 'failed': []}
+
+    def key_for(self, path: str, root: str) -> str:
+        """Object key of a file under the published root directory."""
+        relative = os.path.relpath(path, root).replace(os.sep, '/')
+        return f"{self.prefix}/{relative}" if self.prefix else relative
+
+    def publish(self, path: str, root: str):
+        """
+        Queue a finished file for upload (returns immediately).
+
+        A file already queued with the same size and modification time is
+        skipped, so callers can publish eagerly and sweep the tree at the end.
+        """
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            if self.submitted.get(path) == signature:
+                return
+            self.submitted[path] = signature
+        self.futures.append(self.file_pool.submit(self._upload_file, path, self.key_for(path, root), stat.st_size))
+
+    def publish_tree(self, root: str, exclude: List[str] = None, since: float = None):
+        """
+        Queue every file under root not matching an exclude pattern.
+
+        Args:
+            root: Directory to publish
+            exclude: Glob patterns of relative paths to skip (e.g. '.state/*')
+            since: Only files modified at or after this time (seconds since the epoch)
+        """
+        exclude = exclude or []
+        for directory, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                path = os.path.join(directory, filename)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                if any(fnmatch.fnmatch(relative, pattern) for pattern in exclude):
+                    continue
+                if since is not None and os.path.getmtime(path) < since:
+                    continue
+                self.publish(path, root)
+
+    def _call(self, operation: str, check=None, **kwargs) -> Dict:
+        """
+        Run a client operation, retrying transient failures with exponential backoff.
+
+        Args:
+            operation: S3 client method name
+            check: Optional callable validating the response (raises ChecksumError to retry)
+        """
+        from botocore.exceptions import ClientError
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = getattr(self.client, operation)(**kwargs)
+                if check is not None:
+                    check(response)
+                return response
+            except Exception as e:
+                retryable = True
+                if isinstance(e, ClientError):
+                    error = e.response.get('Error', {})
+                    status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+                    retryable = error.get('Code') in RETRYABLE_CODES or status >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise
+                with self.lock:
+                    self.stats['retries'] += 1
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"  publish: {operation} {kwargs.get('Key')} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _put_checked(self, operation: str, data: bytes, **kwargs) -> bytes:
+        """Send a body with its Content-MD5 and confirm the returned ETag; returns the MD5 digest."""
+        digest = hashlib.md5(data).digest()
+
+        def check(response):
+            if self.verify_etag and _etag(response) != digest.hex():
+                raise ChecksumError(f"ETag {_etag(response)} != MD5 {digest.hex()}")
+
+        self._call(operation, check=check, Body=data, ContentMD5=base64.b64encode(digest).decode('ascii'), **kwargs)
+        return digest
+
+    def _upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> bytes:
+        try:
+            return self._put_checked('upload_part', data, Bucket=self.bucket, Key=key,
+                                     UploadId=upload_id, PartNumber=number)
+        finally:
+            self.part_slots.release()
+
+    def _upload_file(self, path: str, key: str, size: int):
+        started = time.time()
+        try:
+            if size <= self.part_size:
+                with open(path, 'rb') as f:
+                    self._put_checked('put_object', f.read(), Bucket=self.bucket, Key=key)
+                parts = 1
+            else:
+                parts = self._upload_multipart(path, key, size)
+        except Exception as e:
+            logger.error(f"  publish: failed to upload {path} to s3://{self.bucket}/{key}: {e}")
+            with self.lock:
+                self.stats['failed'].append({'file': path, 'key': key, 'error': str(e)})
+            return
+        with self.lock:
+            self.stats['files'] += 1
+            self.stats['bytes'] += size
+            self.stats['parts'] += parts
+            self.stats['multipart_files'] += int(parts > 1)
+        logger.info(f"  published s3://{self.bucket}/{key} ({size:,} bytes, {parts} part(s), "
+                    f"{time.time() - started:.2f}s)")
+
+    def _upload_multipart(self, path: str, key: str, size: int) -> int:
+        upload_id = self._call('create_multipart_upload', Bucket=self.bucket, Key=key)['UploadId']
+        futures = []
+        try:
+            # Parts are read as slots free up, so memory stays bounded for any file size
+            with open(path, 'rb') as f:
+                for number in range(1, (size + self.part_size - 1) // self.part_size + 1):
+                    self.part_slots.acquire()
+                    futures.append(self.part_pool.submit(self._upload_part, key, upload_id, number,
+                                                         f.read(self.part_size)))
+            digests = [future.result() for future in futures]
+            response = self._call(
+                'complete_multipart_upload', Bucket=self.bucket, Key=key, UploadId=upload_id,
+                MultipartUpload={'Parts': [
+                    {'ETag': f'"{digest.hex()}"', 'PartNumber': number}
+                    for number, digest in enumerate(digests, start=1)
+                ]}
+            )
+            expected = f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+            if self.verify_etag and _etag(response) != expected:
+                raise ChecksumError(f"multipart ETag {_etag(response)} != {expected}")
+            return len(digests)
+        except BaseException:
+            for future in futures:
+                if future.cancel():
+                    self.part_slots.release()
+            wait(futures)
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            except Exception as e:
+                logger.warning(f"  publish: could not abort upload {upload_id} of {key}: {e}")
+            raise
+
+    def wait(self) -> Dict:
+        """
+        Wait for all queued uploads; more files can be published afterwards.
+
+        Returns:
+            Summary with files, bytes, parts, retries and failures so far, and
+            the bytes that had finished uploading before wait() was called
+        """
+        with self.lock:
+            overlapped = self.stats['bytes']
+        waited = time.time()
+        wait(self.futures)
+        finished = time.time()
+        with self.lock:
+            stats = dict(self.stats, failed=list(self.stats['failed']))
+        return dict(
+            stats,
+            bucket=self.bucket,
+            prefix=self.prefix,
+            seconds=round(finished - self.started, 3),
+            wait_sec=round(finished - waited, 3),
+            bytes_before_wait=overlapped,
+            mb_per_sec=round(stats['bytes'] / 1048576 / (finished - self.started), 2) if finished > self.started else 0.0
+        )
+
+    def close(self) -> Dict:
+        """Wait for all queued uploads and stop the upload threads; returns the final summary."""
+        summary = self.wait()
+        self.file_pool.shutdown()
+        self.part_pool.shutdown()
+        return summary
+
+
+def open_publisher(publish_config: Dict) -> S3Publisher:
+    """Create a publisher from the publish config section."""
+    return S3Publisher(
+        publish_config['bucket'],
+        prefix=publish_config.get('prefix', ''),
+        endpoint_url=publish_config.get('endpoint_url') or None,
+        region=publish_config.get('region', 'us-east-1'),
+        part_size_mb=publish_config.get('part_size_mb', 8),
+        max_concurrency=publish_config.get('max_concurrency', 8),
+        max_retries=publish_config.get('max_retries', 5),
+        retry_backoff_sec=publish_config.get('retry_backoff_sec', 0.5),
+        verify_etag=publish_config.get('verify_etag', True)
+    )
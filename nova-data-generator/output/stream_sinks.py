@@ -0,0 +1,147 @@
+"""
+Event stream sinks (rotating JSONL files, sockets, stdout).
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+
+class JsonlFileSink:
+    """
+    Write events to JSONL files rotated by size and age.
+
+    The file being written is named <prefix>-<time>-<n>.jsonl.part and is
+    renamed to .jsonl when it is rotated or the stream stops, so consumers
+    that pick up *.jsonl files never read a partial file.
+    """
+
+    def __init__(self, output_dir: str, prefix: str = 'events', max_bytes: int = 64 * 1048576,
+                 max_seconds: float = 300):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.file = None
+        self.path = None
+        self.file_bytes = 0
+        self.opened_at = 0.0
+        self.files = 0
+
+    async def open(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def _rotate(self):
+        self._finish()
+        self.files += 1
+        name = f"{self.prefix}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{self.files:04d}.jsonl"
+        self.path = os.path.join(self.output_dir, name)
+        self.file = open(self.path + '.part', 'wb')
+        self.file_bytes = 0
+        self.opened_at = time.monotonic()
+
+    def _finish(self):
+        if self.file is not None:
+            self.file.close()
+            os.replace(self.path + '.part', self.path)
+            self.file = None
+
+    async def write(self, data: bytes):
+        if (self.file is None or self.file_bytes >= self.max_bytes
+                or time.monotonic() - self.opened_at >= self.max_seconds):
+            self._rotate()
+        self.file.write(data)
+        self.file_bytes += len(data)
+
+    async def close(self):
+        self._finish()
+
+    def describe(self) -> str:
+        return f"{self.output_dir}/{self.prefix}-*.jsonl"
+
+
+class SocketSink:
+    """
+    Write events to a TCP or Unix domain socket.
+
+    Each write waits for the socket buffer to drain, so a slow reader slows
+    the emitter down instead of growing memory.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9000, path: str = None):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.writer = None
+
+    async def open(self):
+        if self.path:
+            _, self.writer = await asyncio.open_unix_connection(self.path)
+        else:
+            _, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def write(self, data: bytes):
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def describe(self) -> str:
+        return f"unix:{self.path}" if self.path else f"tcp://{self.host}:{self.port}"
+
+
+class StdoutSink:
+    """Write events to standard output (blocking writes; a full pipe pauses the emitter)."""
+
+    def __init__(self):
+        self.stream = sys.stdout.buffer
+
+    async def open(self):
+        pass
+
+    async def write(self, data: bytes):
+        self.stream.write(data)
+        self.stream.flush()
+
+    async def close(self):
+        self.stream.flush()
+
+    def describe(self) -> str:
+        return 'stdout'
+
+
+def open_sink(sink_config: dict, data_dir: str):
+    """
+    Create the sink described by the stream.sink config section.
+
+    Args:
+        sink_config: Sink settings (type: jsonl | socket | stdout)
+        data_dir: Output directory; JSONL files go to <data_dir>/<dir>
+
+    Returns:
+        Sink with async open(), write(data) and close()
+    """
+    sink_type = sink_config.get('type', 'jsonl')
+    if sink_type == 'jsonl':
+        return JsonlFileSink(
+            os.path.join(data_dir, sink_config.get('dir', 'stream')),
+            prefix=sink_config.get('prefix', 'events'),
+            max_bytes=int(sink_config.get('max_mb', 64) * 1048576),
+            max_seconds=sink_config.get('rotate_sec', 300)
+        )
+    if sink_type == 'socket':
+        return SocketSink(
+            host=sink_config.get('host', '127.0.0.1'),
+            port=sink_config.get('port', 9000),
+            path=sink_config.get('path') or None
+        )
+    if sink_type == 'stdout':
+        return StdoutSink()
+    raise ValueError(f"Unknown stream sink type: {sink_type}")
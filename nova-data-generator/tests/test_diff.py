@@ -0,0 +1,54 @@
+"""
+Manifests of identical runs match, and --diff pinpoints a changed value.
+"""
+import os
+import shutil
+
+import pytest
+
+from conftest import data_dir, run
+from utils.merkle_utils import build_manifest, diff_runs, load_manifest, save_manifest
+
+PARTITION_ROWS = 200
+
+
+def test_diff_round_trip(make_config, tmp_path):
+    manifest = {'enabled': True, 'partition_rows': PARTITION_ROWS, 'sample_rows': 5, 'sample_partitions': 3}
+    left = make_config('left', manifest=manifest)
+    right = make_config('right', manifest=manifest)
+    run(left)
+    run(right)
+    left_dir, right_dir = data_dir(left), data_dir(right)
+
+    # Rebuilding a manifest from the files reproduces the one written by the run
+    assert build_manifest(left_dir, PARTITION_ROWS)['root'] == load_manifest(left_dir)['root']
+    assert diff_runs(left_dir, right_dir, load_manifest(left_dir), load_manifest(right_dir))['identical']
+    run(left, '--diff', left_dir, right_dir)
+
+    # Change one price in the second partition of a copy
+    tampered_dir = str(tmp_path / 'tampered')
+    shutil.copytree(right_dir, tampered_dir)
+    path = os.path.join(tampered_dir, 'fact_transactions.csv')
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    header = lines[0].rstrip('\n').split(',')
+    row = PARTITION_ROWS + 50
+    fields = lines[row + 1].rstrip('\n').split(',')
+    original = fields[header.index('price_paid')]
+    fields[header.index('price_paid')] = '0.01'
+    lines[row + 1] = ','.join(fields) + '\n'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    save_manifest(build_manifest(tampered_dir, PARTITION_ROWS), tampered_dir)
+
+    report = diff_runs(left_dir, tampered_dir, load_manifest(left_dir), load_manifest(tampered_dir))
+    assert not report['identical']
+    assert list(report['datasets']) == ['fact_transactions']
+    entry = report['datasets']['fact_transactions']
+    assert entry['columns'] == ['price_paid']
+    assert [partition['index'] for partition in entry['partitions']] == [1]
+    assert len(entry['samples']) == 1
+    assert entry['samples'][0]['row'] == row
+    assert entry['samples'][0]['values']['price_paid'] == [original, '0.01']
+    with pytest.raises(SystemExit):
+        run(left, '--diff', left_dir, tampered_dir)
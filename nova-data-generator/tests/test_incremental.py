@@ -0,0 +1,53 @@
+"""
+An incremental run appends only the new window, with IDs continuing after the full run's.
+"""
+import json
+import os
+
+import pandas as pd
+
+from conftest import data_dir, run
+from utils.stream_utils import dataset_files
+
+
+# Dataset, ID column and the date column assigning a record to a window (reviews follow their purchase)
+DATASETS = [('fact_transactions', 'transaction_id', 'transaction_datetime'),
+            ('social_media_posts', 'post_id', 'timestamp'),
+            ('product_reviews', 'review_id', 'purchase_datetime')]
+
+
+def _records(data_dir: str, dataset: str) -> pd.DataFrame:
+    """All records of a dataset, including incremental part files."""
+    frames = []
+    for path in dataset_files(data_dir, dataset):
+        if path.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                frames.append(pd.DataFrame(json.load(f)))
+        else:
+            frames.append(pd.read_csv(path))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_incremental_adds_no_duplicates(make_config):
+    base = make_config('base', end_date='2022-03-31')
+    extended = make_config('extended', end_date='2022-04-30', data_name='base')
+    run(base)
+    full = {dataset: _records(data_dir(base), dataset) for dataset, _, _ in DATASETS}
+    run(extended, '--incremental')
+
+    for dataset, id_column, date_column in DATASETS:
+        records = _records(data_dir(base), dataset)
+        day = records[date_column].str[:10]
+        assert records[id_column].is_unique, f"{dataset} has duplicate IDs"
+        assert day.max() <= '2022-04-30', dataset
+
+        # The full run stays inside its date range and is not generated again
+        assert full[dataset][date_column].str[:10].max() <= '2022-03-31', dataset
+        assert (day <= '2022-03-31').sum() == len(full[dataset]), dataset
+        added = records[day > '2022-03-31']
+        assert len(added), dataset
+        assert added[id_column].min() > full[dataset][id_column].max(), dataset
+
+    with open(os.path.join(data_dir(base), '.state', 'run_state.json'), 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    assert state['end_date'] == '2022-04-30'
@@ -0,0 +1,49 @@
+"""
+An interrupted run resumed from its checkpoints writes the same bytes as an uninterrupted run.
+"""
+import json
+import os
+
+import pytest
+
+from conftest import data_dir, differing_files, run
+from generators.review_generator import ReviewGenerator
+
+
+def test_resume_is_byte_identical(make_config, monkeypatch):
+    reference = make_config('reference')
+    interrupted = make_config('interrupted')
+
+    # Count review windows generated, failing in the third one when asked to
+    generate = ReviewGenerator.generate_reviews_for_count
+    calls = []
+    crash_at = [None]
+
+    def counted(self, count, start_id=1):
+        calls.append(count)
+        if len(calls) == crash_at[0]:
+            raise RuntimeError('interrupted')
+        return generate(self, count, start_id)
+
+    monkeypatch.setattr(ReviewGenerator, 'generate_reviews_for_count', counted)
+    run(reference)
+    windows = len(calls)
+
+    calls.clear()
+    crash_at[0] = 3
+    with pytest.raises(RuntimeError, match='interrupted'):
+        run(interrupted)
+
+    journal_path = os.path.join(os.path.dirname(interrupted), 'interrupted-checkpoints', 'journal.json')
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        journal = json.load(f)
+    assert journal['completed_steps'] == ['products', 'sales', 'transactions', 'campaigns', 'social_posts']
+    assert journal['chunks']['reviews'] == 2
+
+    # Only the windows after the last committed chunk are generated again
+    calls.clear()
+    crash_at[0] = None
+    run(interrupted, '--resume')
+    assert len(calls) == windows - 2
+    assert differing_files(data_dir(reference), data_dir(interrupted)) == []
+    assert not os.path.exists(journal_path)
@@ -0,0 +1,45 @@
+"""
+Merged shards finish into the same output as a normal run.
+"""
+import os
+
+import pytest
+
+from conftest import data_dir, differing_files, run
+from utils.merkle_utils import load_manifest
+from utils.shard_utils import shard_dir, verify_against
+
+
+@pytest.mark.parametrize('count', [1, 3])
+def test_merged_shards_equal_normal_run(make_config, count):
+    reference = make_config('reference')
+    sharded = make_config('sharded')
+    merged = make_config('merged')
+    run(reference)
+    for index in range(count):
+        run(sharded, '--shard', f'{index}/{count}')
+
+    shards = [shard_dir(data_dir(sharded), index, count) for index in range(count)]
+    run(merged, '--merge-shards', *reversed(shards), '--verify-against', data_dir(reference))
+    # A second merge replaces the outputs of the first
+    run(merged, '--merge-shards', *shards)
+
+    results = verify_against(data_dir(merged), data_dir(reference))
+    assert all(results.values()), results
+    assert differing_files(data_dir(reference), data_dir(merged)) == []
+
+    # The derived stages ran on the merged records
+    for name in ('validation_report.json', 'rollups', '.state', 'fact_campaign_attribution.csv'):
+        assert os.path.exists(os.path.join(data_dir(merged), name)), name
+    assert load_manifest(data_dir(merged))['root'] == load_manifest(data_dir(reference))['root']
+
+
+def test_merge_refuses_another_runs_outputs(make_config):
+    reference = make_config('reference')
+    sharded = make_config('sharded')
+    run(reference)
+    run(sharded, '--shard', '0/1')
+
+    # reference's data_dir holds a normal run's outputs
+    with pytest.raises(SystemExit):
+        run(reference, '--merge-shards', shard_dir(data_dir(sharded), 0, 1))
@@ -0,0 +1,78 @@
+"""
+Streaming validation of written files reaches the same verdict as the in-memory stage.
+"""
+import json
+import os
+
+import pandas as pd
+import pytest
+import yaml
+
+from conftest import data_dir, run
+from utils.stream_utils import dataset_files
+from utils.validation_utils import run_validation, validate_files
+
+
+def _verdict(results: dict) -> dict:
+    """Pass/fail and violation counts by dataset and rule, without timings or samples."""
+    return {
+        name: (result['passed'], sorted((violation['rule'], violation['column'], violation['violation_count'])
+                                        for violation in result['violations']))
+        for name, result in results.items()
+    }
+
+
+def _load_tables(directory: str, datasets) -> dict:
+    tables = {}
+    for dataset in datasets:
+        path = dataset_files(directory, dataset)[0]
+        if path.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                tables[dataset] = pd.DataFrame(json.load(f))
+        else:
+            tables[dataset] = pd.read_csv(path)
+    return tables
+
+
+@pytest.fixture
+def generated(make_config):
+    config_path = make_config('run')
+    run(config_path)
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    return config, data_dir(config_path)
+
+
+def test_streaming_matches_generation_report(generated):
+    config, directory = generated
+    rules = config['validation']['datasets']
+    with open(os.path.join(directory, 'validation_report.json'), 'r', encoding='utf-8') as f:
+        report = json.load(f)
+
+    streamed = validate_files(directory, rules, config['date_range'], chunk_size=100)
+    assert report['passed']
+    assert _verdict(streamed) == _verdict(report['datasets'])
+
+
+def test_streaming_matches_in_memory_on_violations(generated):
+    config, directory = generated
+    rules = config['validation']['datasets']
+
+    # Negative units and an unknown date in the sales, an out-of-range rating in the reviews
+    sales_path = os.path.join(directory, 'fact_daily_sales.csv')
+    sales = pd.read_csv(sales_path)
+    sales.loc[[3, 50, 200], 'units_sold'] = -5
+    sales.loc[10, 'date'] = '2030-01-01'
+    sales.to_csv(sales_path, index=False)
+    reviews_path = os.path.join(directory, 'product_reviews.json')
+    with open(reviews_path, 'r', encoding='utf-8') as f:
+        reviews = json.load(f)
+    reviews[0]['rating'] = 7
+    with open(reviews_path, 'w', encoding='utf-8') as f:
+        json.dump(reviews, f, indent=2, ensure_ascii=False)
+
+    in_memory = run_validation(_load_tables(directory, rules), rules, config['date_range'])
+    streamed = validate_files(directory, rules, config['date_range'], chunk_size=100)
+    assert _verdict(streamed) == _verdict(in_memory)
+    assert _verdict(in_memory)['fact_daily_sales'] == (False, [('date_range', 'date', 1), ('range', 'units_sold', 3)])
+    assert _verdict(in_memory)['product_reviews'] == (False, [('range', 'rating', 1)])
@@ -0,0 +1,187 @@
+"""
+Content-addressed cache for pipeline step outputs.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Shared generation utilities every step depends on
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMON_SOURCES = [
+    os.path.join(_BASE_DIR, 'utils', 'random_utils.py'),
+    os.path.join(_BASE_DIR, 'utils', 'date_utils.py'),
+    os.path.join(_BASE_DIR, 'utils', 'text_utils.py'),
+]
+
+
+def _source_path(source) -> str:
+    """Resolve a class, module or path to its source file path."""
+    if isinstance(source, str):
+        return source
+    module = sys.modules[source.__module__] if not hasattr(source, '__file__') else source
+    return module.__file__
+
+
+def hash_sources(sources: List) -> str:
+    """
+    Hash the contents of source files.
+
+    Args:
+        sources: Classes, modules or file paths
+
+    Returns:
+        Hex digest of the combined file contents
+    """
+    digest = hashlib.sha256()
+    for path in sorted(_source_path(source) for source in sources):
+        with open(path, 'rb') as f:
+            digest.update(os.path.basename(path).encode('utf-8'))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _remove_if_exists(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class StageCache:
+    """
+    Cache step outputs keyed on a hash of everything that determines them.
+
+    A step's key combines its relevant config subsections, the random seed,
+    the keys of upstream steps and the source code of the generator. Because
+    all generators draw from one shared random stream, a cached entry also
+    stores the generator state after the step so later steps see exactly
+    the same random numbers as in an uncached run.
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 2048, max_entries: int = 50):
+        """
+        Initialize stage cache.
+
+        Args:
+            cache_dir: Directory for cache entries
+            max_size_mb: Total size limit; least recently used entries are evicted
+            max_entries: Maximum number of entries kept
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def step_key(self, step: str, config_sections: Dict, seed: int,
+                 upstream: List[str] = None, sources: List = None) -> str:
+        """
+        Compute the content address of a step.
+
+        Args:
+            step: Step name
+            config_sections: Config subsections the step reads
+            seed: Random seed
+            upstream: Keys of the steps this step depends on
+            sources: Classes, modules or paths whose code determines the output
+
+        Returns:
+            Hex digest identifying the step output
+        """
+        payload = {
+            'step': step,
+            'config': config_sections,
+            'seed': seed,
+            'upstream': upstream or [],
+            'source': hash_sources(list(sources or []) + COMMON_SOURCES),
+            'python': sys.version_info[:2]
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Return a cached entry, or None on a miss.
+
+        Safe with several processes sharing the cache: an entry evicted by
+        another process while it is being read counts as a miss.
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key[:12]}: {e}")
+            _remove_if_exists(path)
+            return None
+        # Refresh modification time so eviction is least-recently-used
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        """Store an entry and evict old entries beyond the size limits."""
+        path = self._path(key)
+        # Unique per process so concurrent writers of the same key never share a temp file
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict(keep=key)
+
+    def evict(self, keep: str = None):
+        """Remove least recently used entries until within limits."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl'):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, path = entries.pop(0)
+            if keep and path == self._path(keep):
+                continue
+            _remove_if_exists(path)
+            total -= size
+            logger.info(f"Evicted cache entry {os.path.basename(path)[:12]}")
+
+    def run(self, key: str, rng, generate: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return a step's output from the cache, or generate and store it.
+
+        Args:
+            key: Step key from step_key()
+            rng: RandomGenerator shared by the pipeline
+            generate: Callable producing the step output
+
+        Returns:
+            Tuple of (output, cache_hit)
+        """
+        entry = self.get(key)
+        if entry is not None:
+            rng.set_state(entry['rng_state'])
+            return entry['data'], True
+
+        data = generate()
+        self.put(key, {'data': data, 'rng_state': rng.get_state()})
+        return data, False
@@ -0,0 +1,186 @@
+"""
+Run journal with chunk-level checkpoints for resuming interrupted runs.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from utils.cache_utils import hash_sources
+
+logger = logging.getLogger(__name__)
+
+
+def run_fingerprint(config: Dict, sources: List) -> str:
+    """
+    Hash the config and generator code a run depends on.
+
+    Args:
+        config: Full configuration dictionary
+        sources: Generator classes, modules or paths
+
+    Returns:
+        Hex digest used to reject resuming with a different config or code
+    """
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(hash_sources(sources).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _atomic_pickle(obj: Any, path: str):
+    """Pickle an object to path without leaving a partial file on crash."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+class StepCheckpoint:
+    """
+    Chunk-level checkpoint for a single generation step.
+
+    Generators commit the records produced by each chunk (a product, a
+    block of sampled sales rows, or a date window) together with the random
+    state after the chunk. Resuming replays the committed records and
+    restores the random state, so the remaining chunks draw exactly the same
+    numbers as in an uninterrupted run. Chunks that seed their own random
+    stream (the date windows of a ShardPlan) have no state to restore.
+    """
+
+    def __init__(self, journal: 'RunJournal', step: str):
+        self.journal = journal
+        self.step = step
+        self.step_dir = os.path.join(journal.journal_dir, step)
+        os.makedirs(self.step_dir, exist_ok=True)
+
+    def _chunk_path(self, chunk: int) -> str:
+        return os.path.join(self.step_dir, f'chunk_{chunk:06d}.pkl')
+
+    def resume(self, rng=None) -> Tuple[List, int]:
+        """
+        Load records of completed chunks and restore the random state.
+
+        Args:
+            rng: RandomGenerator shared by the pipeline (None when chunks seed their own)
+
+        Returns:
+            Tuple of (records from completed chunks, index of the next chunk)
+        """
+        completed = self.journal.completed_chunks(self.step)
+        records = []
+        entry = None
+        for chunk in range(completed):
+            with open(self._chunk_path(chunk), 'rb') as f:
+                entry = pickle.load(f)
+            records.extend(entry['records'])
+
+        if entry is not None:
+            if rng is not None:
+                rng.set_state(entry['rng_state'])
+            logger.info(f"Resuming {self.step} from chunk {completed} ({len(records)} records restored)")
+        return records, completed
+
+    def commit(self, chunk: int, records: List, rng=None):
+        """
+        Persist a completed chunk.
+
+        Args:
+            chunk: Chunk index (chunks are committed in order)
+            records: Records produced by this chunk
+            rng: RandomGenerator shared by the pipeline (None when chunks seed their own)
+        """
+        state = rng.get_state() if rng is not None else None
+        _atomic_pickle({'records': records, 'rng_state': state}, self._chunk_path(chunk))
+        self.journal.mark_chunk(self.step, chunk + 1)
+
+
+class RunJournal:
+    """Journal of completed steps and chunks for one generation run."""
+
+    def __init__(self, journal_dir: str, fingerprint: str, resume: bool = False):
+        """
+        Open or start a run journal.
+
+        Args:
+            journal_dir: Directory for the journal and checkpoint files
+            fingerprint: Hash of the config and code the run depends on
+            resume: Continue a previous run instead of starting fresh
+
+        Raises:
+            ValueError: If resuming a journal written for a different config or code
+        """
+        self.journal_dir = journal_dir
+        self.fingerprint = fingerprint
+        self.journal_path = os.path.join(journal_dir, 'journal.json')
+
+        if resume and os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+            if self.state['fingerprint'] != fingerprint:
+                raise ValueError(
+                    f"Checkpoint journal in {journal_dir} was written for a different "
+                    f"config or code version; rerun without --resume"
+                )
+            logger.info(f"✓ Resuming run started at {self.state['started_at']}")
+        else:
+            if resume:
+                logger.warning(f"No checkpoint journal found in {journal_dir}; starting a new run")
+            shutil.rmtree(journal_dir, ignore_errors=True)
+            os.makedirs(journal_dir, exist_ok=True)
+            self.state = {
+                'fingerprint': fingerprint,
+                'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'completed_steps': [],
+                'chunks': {}
+            }
+            self._save()
+
+    def _save(self):
+        tmp_path = f'{self.journal_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.journal_path)
+
+    def _step_path(self, step: str) -> str:
+        return os.path.join(self.journal_dir, f'{step}.pkl')
+
+    def completed_chunks(self, step: str) -> int:
+        """Number of chunks of a step committed so far."""
+        return self.state['chunks'].get(step, 0)
+
+    def mark_chunk(self, step: str, completed: int):
+        """Record that the first `completed` chunks of a step are persisted."""
+        self.state['chunks'][step] = completed
+        self._save()
+
+    def checkpoint(self, step: str) -> StepCheckpoint:
+        """Get the chunk checkpoint for a step."""
+        return StepCheckpoint(self, step)
+
+    def is_step_complete(self, step: str) -> bool:
+        """Check whether a step finished in a previous attempt."""
+        return step in self.state['completed_steps']
+
+    def load_step(self, step: str, rng) -> Any:
+        """Load a completed step's output and restore the random state after it."""
+        with open(self._step_path(step), 'rb') as f:
+            entry = pickle.load(f)
+        rng.set_state(entry['rng_state'])
+        logger.info(f"✓ Restored completed step {step} from checkpoint")
+        return entry['data']
+
+    def complete_step(self, step: str, data: Any, rng):
+        """Persist a step's full output and drop its chunk checkpoints."""
+        _atomic_pickle({'data': data, 'rng_state': rng.get_state()}, self._step_path(step))
+        self.state['completed_steps'].append(step)
+        self.state['chunks'].pop(step, None)
+        self._save()
+        shutil.rmtree(os.path.join(self.journal_dir, step), ignore_errors=True)
+
+    def finish(self):
+        """Remove the journal after a successful run."""
+        shutil.rmtree(self.journal_dir, ignore_errors=True)
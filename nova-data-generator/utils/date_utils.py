@@ -2,10 +2,44 @@
 Date utility functions for data generation.
 """
 from datetime import datetime, timedelta
-from typing import List
+from typing import Dict, List
+import numpy as np
 import pandas as pd
 
 
+# Sales multiplier by month (1.0 = normal, >1.0 = increased sales)
+SEASONAL_MULTIPLIERS = {
+    11: 1.25, 12: 1.25,  # Holiday season
+    8: 1.15, 9: 1.15,    # Back-to-school
+    1: 0.90, 2: 0.90     # Post-holiday slowdown
+}
+
+# Fixed-date public holidays (MM-DD -> name) of the countries sales are generated for
+COUNTRY_HOLIDAYS = {
+    'USA': {'01-01': "New Year's Day", '07-04': 'Independence Day', '12-25': 'Christmas Day'},
+    'Canada': {'01-01': "New Year's Day", '07-01': 'Canada Day', '12-25': 'Christmas Day'},
+    'Mexico': {'01-01': "New Year's Day", '09-16': 'Independence Day', '12-25': 'Christmas Day'},
+    'UK': {'01-01': "New Year's Day", '12-25': 'Christmas Day', '12-26': 'Boxing Day'},
+    'Germany': {'01-01': "New Year's Day", '10-03': 'German Unity Day', '12-25': 'Christmas Day'},
+    'France': {'01-01': "New Year's Day", '07-14': 'Bastille Day', '12-25': 'Christmas Day'},
+    'Spain': {'01-01': "New Year's Day", '10-12': 'National Day', '12-25': 'Christmas Day'},
+    'Italy': {'01-01': "New Year's Day", '06-02': 'Republic Day', '12-25': 'Christmas Day'},
+    'Japan': {'01-01': "New Year's Day", '02-11': 'National Foundation Day', '11-03': 'Culture Day'},
+    'South Korea': {'01-01': "New Year's Day", '03-01': 'Independence Movement Day',
+                    '08-15': 'Liberation Day', '10-03': 'National Foundation Day', '12-25': 'Christmas Day'},
+    'Australia': {'01-01': "New Year's Day", '01-26': 'Australia Day', '12-25': 'Christmas Day'},
+    'Singapore': {'01-01': "New Year's Day", '08-09': 'National Day', '12-25': 'Christmas Day'},
+    'India': {'01-26': 'Republic Day', '08-15': 'Independence Day', '10-02': 'Gandhi Jayanti'},
+    'Brazil': {'01-01': "New Year's Day", '09-07': 'Independence Day', '12-25': 'Christmas Day'},
+    'Argentina': {'01-01': "New Year's Day", '05-25': 'May Revolution Day', '07-09': 'Independence Day',
+                  '12-25': 'Christmas Day'},
+    'Chile': {'01-01': "New Year's Day", '09-18': 'Independence Day', '12-25': 'Christmas Day'},
+    'UAE': {'01-01': "New Year's Day", '12-02': 'National Day'},
+    'Saudi Arabia': {'02-22': 'Founding Day', '09-23': 'National Day'},
+    'Qatar': {'12-18': 'National Day'}
+}
+
+
 def generate_date_range(start_date: str, end_date: str, freq: str = 'D') -> List[datetime]:
     """
     Generate a list of dates between start_date and end_date.
@@ -78,3 +112,98 @@ def is_holiday_season(date: datetime) -> bool:
 def is_back_to_school_season(date: datetime) -> bool:
     """Check if date is in back-to-school season (August-September)."""
     return date.month in [8, 9]
+
+
+class Calendar:
+    """
+    Precomputed calendar of every day in a date range.
+    
+    Date attributes are computed once per day as arrays indexed by day
+    number (days since start_date), so generators look them up for whole
+    date ranges instead of deriving them per date and product. frame()
+    returns the same days as the dim_date table.
+    """
+    
+    # Output columns and their logical types (used by nova_data.load)
+    OUTPUT_SCHEMA = {
+        'date': 'date',
+        'date_key': 'int',
+        'day_index': 'int',
+        'year': 'int',
+        'quarter': 'int',
+        'month': 'int',
+        'month_name': 'category',
+        'week_of_year': 'int',
+        'day_of_week': 'int',
+        'day_name': 'category',
+        'is_weekend': 'bool',
+        'season': 'category',
+        'is_holiday_season': 'bool',
+        'is_back_to_school_season': 'bool',
+        'seasonal_multiplier': 'float',
+        'holiday_countries': 'string',
+        'holiday_names': 'string'
+    }
+    
+    def __init__(self, start_date: str, end_date: str, holidays: Dict[str, Dict[str, str]] = None):
+        """
+        Args:
+            start_date: First day (YYYY-MM-DD); day index 0
+            end_date: Last day (YYYY-MM-DD), inclusive
+            holidays: Fixed-date holidays by country (MM-DD -> name) added to or
+                replacing those in COUNTRY_HOLIDAYS
+        """
+        self.start = parse_date(start_date)
+        self.days = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1)
+        self.holidays = dict(COUNTRY_HOLIDAYS, **(holidays or {}))
+        index = pd.DatetimeIndex(self.days)
+        self.dates = index.strftime('%Y-%m-%d').tolist()
+        self.month = index.month.to_numpy()
+        self.seasonal_multiplier = np.array([SEASONAL_MULTIPLIERS.get(month, 1.0) for month in range(13)])[self.month]
+        self.is_holiday_season = np.isin(self.month, [11, 12])
+        self.is_back_to_school_season = np.isin(self.month, [8, 9])
+    
+    def __len__(self) -> int:
+        return len(self.days)
+    
+    def index_of(self, date: datetime) -> int:
+        """Day index of a date (negative before start_date, >= len() after end_date)."""
+        return (date - self.start).days
+    
+    def days_since(self, date: datetime) -> np.ndarray:
+        """Days between a date and every calendar day (e.g. days since a product launch)."""
+        return np.arange(len(self.days)) - self.index_of(date)
+    
+    def frame(self) -> pd.DataFrame:
+        """The calendar as the dim_date table, one row per day."""
+        index = pd.DatetimeIndex(self.days)
+        monthday = index.strftime('%m-%d')
+        countries = [[] for _ in self.days]
+        names = [[] for _ in self.days]
+        for country, holidays in self.holidays.items():
+            for day in np.flatnonzero(np.isin(monthday, list(holidays))):
+                countries[day].append(country)
+                names[day].append(f"{country}: {holidays[monthday[day]]}")
+        
+        return pd.DataFrame({
+            'date': self.dates,
+            'date_key': index.year * 10000 + index.month * 100 + index.day,
+            'day_index': np.arange(len(self.days)),
+            'year': index.year,
+            'quarter': index.quarter,
+            'month': self.month,
+            'month_name': index.strftime('%B'),
+            'week_of_year': index.isocalendar().week.to_numpy().astype(int),
+            'day_of_week': index.dayofweek + 1,
+            'day_name': index.strftime('%A'),
+            'is_weekend': index.dayofweek >= 5,
+            'season': np.select(
+                [self.is_holiday_season, self.is_back_to_school_season, np.isin(self.month, [1, 2])],
+                ['Holiday', 'Back to School', 'Post-Holiday'], 'Regular'
+            ),
+            'is_holiday_season': self.is_holiday_season,
+            'is_back_to_school_season': self.is_back_to_school_season,
+            'seasonal_multiplier': self.seasonal_multiplier,
+            'holiday_countries': [','.join(day) for day in countries],
+            'holiday_names': ['; '.join(day) for day in names]
+        })
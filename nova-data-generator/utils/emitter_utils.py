@@ -0,0 +1,254 @@
+"""
+Rate-controlled asyncio event emitter for the stream mode.
+"""
+import asyncio
+import json
+import logging
+import math
+import signal
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Achieved/target rate below which the emitter reports that it is falling behind
+BEHIND_RATIO = 0.95
+
+
+class RateSchedule:
+    """
+    Target event rate with a diurnal shape.
+
+    The rate follows a cosine over the day that peaks at peak_hour and
+    averages to events_per_sec, so a full day emits events_per_sec * 86400
+    events.
+    """
+
+    def __init__(self, events_per_sec: float, diurnal_amplitude: float = 0.0, peak_hour: float = 19.0):
+        self.events_per_sec = events_per_sec
+        self.amplitude = min(max(diurnal_amplitude, 0.0), 1.0)
+        self.peak_hour = peak_hour
+
+    def rate_at(self, when: datetime) -> float:
+        """Target events/sec at a time of day."""
+        hour = when.hour + when.minute / 60 + when.second / 3600
+        return self.events_per_sec * (1 + self.amplitude * math.cos(2 * math.pi * (hour - self.peak_hour) / 24))
+
+
+def _native(obj):
+    """JSON fallback for numpy scalars produced by the generators."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_native).encode
+
+
+def encode_event(event_type: str, event_time: str, record: Dict) -> str:
+    """Serialize one event as a JSON line."""
+    return _encode({'event_type': event_type, 'event_time': event_time, 'data': record}) + '\n'
+
+
+def encode_events(events: list, event_time: str) -> bytes:
+    """Serialize (event_type, record) tuples sharing an event time as JSON lines."""
+    return ''.join([encode_event(event_type, event_time, record) for event_type, record in events]).encode('utf-8')
+
+
+class EventEmitter:
+    """
+    Emit generated events to a sink at a scheduled rate.
+
+    A producer task generates one batch per tick sized to the events due
+    since the previous tick and puts it on a bounded queue; a writer task
+    drains the queue into the sink. When the sink falls behind the queue
+    fills up and the producer waits, so memory stays bounded and the
+    shortfall shows up as achieved rate below target. Events that fall
+    more than max_lag_sec behind schedule are skipped rather than emitted
+    as a burst.
+    """
+
+    def __init__(self, generator, sink, schedule: RateSchedule, tick_ms: int = 50, queue_batches: int = 8,
+                 time_scale: float = 1.0, max_lag_sec: float = 1.0, report_interval_sec: float = 5.0):
+        """
+        Args:
+            generator: EventGenerator
+            sink: Sink from output.stream_sinks.open_sink()
+            schedule: Target rate over the day
+            tick_ms: Interval between batches
+            queue_batches: Batches buffered between producer and writer
+            time_scale: Simulated seconds per second for event times (e.g. 1440 plays a day in a minute)
+            max_lag_sec: Backlog of due events kept when behind schedule
+            report_interval_sec: Interval between progress log lines
+        """
+        self.generator = generator
+        self.sink = sink
+        self.schedule = schedule
+        self.tick = tick_ms / 1000
+        self.queue_batches = queue_batches
+        self.time_scale = time_scale
+        self.max_lag_sec = max_lag_sec
+        self.report_interval = report_interval_sec
+
+        self.stop_event = None
+        self.target = 0.0
+        self.skipped = 0.0
+        self.emitted = 0
+        self.written = 0
+        self.bytes = 0
+        self.by_type = {}
+        self.generate_sec = 0.0
+        self.write_sec = 0.0
+        self.blocked_sec = 0.0
+        self.produce_sec = 0.0
+
+    def stop(self):
+        """Ask the producer to finish after the current batch."""
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    async def _produce(self, queue: asyncio.Queue, start_time: datetime, duration: float, max_events: int):
+        loop = asyncio.get_running_loop()
+        started = last = loop.time()
+        next_tick = started
+        due = 0.0
+        while not self.stop_event.is_set():
+            now = loop.time()
+            if duration and now - started >= duration:
+                break
+            clock = start_time + timedelta(seconds=(now - started) * self.time_scale)
+            rate = self.schedule.rate_at(clock)
+
+            # Events due since the last tick; a backlog beyond max_lag_sec is dropped
+            owed = rate * (now - last)
+            last = now
+            self.target += owed
+            due += owed
+            if due > rate * self.max_lag_sec + 1:
+                self.skipped += due - (rate * self.max_lag_sec + 1)
+                due = rate * self.max_lag_sec + 1
+            # Bounded batches keep the writer and progress reports running when generation falls behind
+            count = min(int(due), int(rate * self.tick * 4) + 1)
+            if max_events:
+                count = min(count, max_events - self.emitted)
+
+            if count > 0:
+                gen_start = time.perf_counter()
+                events = self.generator.generate(count, clock)
+                payload = encode_events(events, clock.strftime('%Y-%m-%dT%H:%M:%S.%fZ'))
+                self.generate_sec += time.perf_counter() - gen_start
+                for event_type, _ in events:
+                    self.by_type[event_type] = self.by_type.get(event_type, 0) + 1
+
+                put_start = time.perf_counter()
+                await queue.put((count, payload))
+                self.blocked_sec += time.perf_counter() - put_start
+                self.emitted += count
+                due -= count
+                if max_events and self.emitted >= max_events:
+                    break
+
+            next_tick = max(next_tick + self.tick, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+        self.produce_sec = loop.time() - started
+        await queue.put(None)
+
+    async def _write(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            count, payload = item
+            write_start = time.perf_counter()
+            await self.sink.write(payload)
+            self.write_sec += time.perf_counter() - write_start
+            self.written += count
+            self.bytes += len(payload)
+
+    def _bottleneck(self, generate_sec: float, write_sec: float) -> str:
+        """Name the side that limited the rate over an interval, by time spent."""
+        return 'event generation' if generate_sec >= write_sec else f'the {self.sink.describe()} sink'
+
+    async def _report(self):
+        loop = asyncio.get_running_loop()
+        last_time, last_written, last_target = loop.time(), 0, 0.0
+        last_generate, last_write = 0.0, 0.0
+        while True:
+            await asyncio.sleep(self.report_interval)
+            now = loop.time()
+            seconds = now - last_time
+            achieved = (self.written - last_written) / seconds
+            target = (self.target - last_target) / seconds
+            progress = f"  stream: {self.written:,} events, {achieved:,.0f}/s"
+            if target:
+                progress += f" (target {target:,.0f}/s, {achieved / target:.0%})"
+            if target and achieved < target * BEHIND_RATIO:
+                bottleneck = self._bottleneck(self.generate_sec - last_generate, self.write_sec - last_write)
+                logger.warning(f"{progress}: falling behind, limited by {bottleneck}")
+            else:
+                logger.info(progress)
+            last_time, last_written, last_target = now, self.written, self.target
+            last_generate, last_write = self.generate_sec, self.write_sec
+
+    async def run(self, duration: float = 0, max_events: int = 0, start_time: datetime = None) -> Dict:
+        """
+        Emit events until duration/max_events is reached or SIGINT/SIGTERM.
+
+        Args:
+            duration: Seconds to run (0 = until stopped)
+            max_events: Events to emit (0 = unlimited)
+            start_time: Event time of the first batch (UTC now by default)
+
+        Returns:
+            Summary with target and achieved rates
+        """
+        loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        start_time = start_time or datetime.utcnow()
+        queue = asyncio.Queue(maxsize=self.queue_batches)
+        await self.sink.open()
+        started = loop.time()
+        reporter = asyncio.create_task(self._report())
+        writer = asyncio.create_task(self._write(queue))
+        try:
+            await asyncio.gather(self._produce(queue, start_time, duration, max_events), writer)
+        finally:
+            reporter.cancel()
+            await self.sink.close()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+        seconds = loop.time() - started
+
+        # The target accrues while producing; seconds also covers draining the queue at the end
+        achieved = self.written / seconds if seconds > 0 else 0.0
+        target = self.target / self.produce_sec if self.produce_sec > 0 else 0.0
+        if target and achieved < target * BEHIND_RATIO:
+            logger.warning(f"Achieved {achieved:,.0f} events/sec of the {target:,.0f}/s target "
+                           f"({achieved / target:.0%}), limited by {self._bottleneck(self.generate_sec, self.write_sec)}")
+
+        return {
+            'sink': self.sink.describe(),
+            'seconds': round(seconds, 3),
+            'events': self.written,
+            'events_by_type': self.by_type,
+            'bytes': self.bytes,
+            'target_events': int(round(self.target)),
+            'skipped_events': int(round(self.skipped)),
+            'target_events_per_sec': round(target, 1),
+            'achieved_events_per_sec': round(achieved, 1),
+            'achieved_pct': round(100 * self.written / self.target, 1) if self.target else 0.0,
+            'generate_sec': round(self.generate_sec, 3),
+            'write_sec': round(self.write_sec, 3),
+            'backpressure_sec': round(self.blocked_sec, 3)
+        }
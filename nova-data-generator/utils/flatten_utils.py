@@ -0,0 +1,142 @@
+"""
+Flat tables of the nested social post and review datasets.
+"""
+import itertools
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Flat table name -> source dataset, logical column types and the column date_range applies to.
+# Nested objects become <field>_<key> columns (as in the SQLite tables); each list becomes
+# a bridge table keyed by the integer part of the record ID, with a count column in the flat table.
+FLAT_TABLES = {
+    'fact_social_posts': {
+        'source': 'social_media_posts',
+        'date_column': 'timestamp',
+        'schema': {
+            'post_key': 'int',
+            'post_id': 'string',
+            'timestamp': 'datetime',
+            'platform': 'category',
+            'user_id': 'string',
+            'user_followers': 'int',
+            'text': 'string',
+            'product_mentioned': 'category',
+            'sentiment': 'category',
+            'sentiment_score': 'float',
+            'engagement_likes': 'int',
+            'engagement_comments': 'int',
+            'engagement_shares': 'int',
+            'hashtag_count': 'int',
+            'language': 'category'
+        }
+    },
+    'post_hashtags': {
+        'source': 'social_media_posts',
+        'date_column': None,
+        'schema': {'post_key': 'int', 'position': 'int', 'hashtag': 'category'}
+    },
+    'fact_product_reviews': {
+        'source': 'product_reviews',
+        'date_column': 'review_datetime',
+        'schema': {
+            'review_key': 'int',
+            'review_id': 'string',
+            'product_id': 'category',
+            'customer_id': 'string',
+            'review_datetime': 'datetime',
+            'purchase_datetime': 'datetime',
+            'verified_purchase': 'bool',
+            'rating': 'int',
+            'review_title': 'string',
+            'review_text': 'string',
+            'helpful_votes': 'int',
+            'total_votes': 'int',
+            'pros_count': 'int',
+            'cons_count': 'int',
+            'reviewer_profile_total_reviews': 'int',
+            'reviewer_profile_verified_purchases': 'int',
+            'variant_color': 'category',
+            'variant_storage': 'category'
+        }
+    },
+    'review_pros': {
+        'source': 'product_reviews',
+        'date_column': None,
+        'schema': {'review_key': 'int', 'position': 'int', 'pro': 'category'}
+    },
+    'review_cons': {
+        'source': 'product_reviews',
+        'date_column': None,
+        'schema': {'review_key': 'int', 'position': 'int', 'con': 'category'}
+    }
+}
+
+
+def record_keys(ids: List[str]) -> np.ndarray:
+    """Integer keys from record IDs such as 'REV-00000797' (797); unique and stable across runs."""
+    return np.array([int(value.rsplit('-', 1)[1]) for value in ids], dtype=np.int64)
+
+
+def _bridge(key_column: str, keys: np.ndarray, lists: List[List], value_column: str) -> pd.DataFrame:
+    """One row per list element, numbered from 1 within its record."""
+    lengths = np.array([len(values) for values in lists], dtype=np.int64)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return pd.DataFrame({
+        key_column: np.repeat(keys, lengths),
+        'position': np.arange(lengths.sum(), dtype=np.int64) - starts + 1,
+        value_column: list(itertools.chain.from_iterable(lists))
+    })
+
+
+def _nested(records: List[Dict], field: str, keys: List[str]) -> Dict[str, list]:
+    return {f'{field}_{key}': [record[field][key] for record in records] for key in keys}
+
+
+def flatten_posts(posts: List[Dict]) -> Dict[str, pd.DataFrame]:
+    """fact_social_posts and post_hashtags from social media post records."""
+    keys = record_keys([post['post_id'] for post in posts])
+    hashtags = [post['hashtags'] for post in posts]
+    columns = {'post_key': keys}
+    for col in FLAT_TABLES['fact_social_posts']['schema']:
+        if col in ('post_key', 'hashtag_count') or col.startswith('engagement_'):
+            continue
+        columns[col] = [post[col] for post in posts]
+    columns.update(_nested(posts, 'engagement', ['likes', 'comments', 'shares']))
+    columns['hashtag_count'] = [len(values) for values in hashtags]
+    return {
+        'fact_social_posts': pd.DataFrame(columns, columns=list(FLAT_TABLES['fact_social_posts']['schema'])),
+        'post_hashtags': _bridge('post_key', keys, hashtags, 'hashtag')
+    }
+
+
+def flatten_reviews(reviews: List[Dict]) -> Dict[str, pd.DataFrame]:
+    """fact_product_reviews, review_pros and review_cons from product review records."""
+    keys = record_keys([review['review_id'] for review in reviews])
+    pros = [review['pros'] for review in reviews]
+    cons = [review['cons'] for review in reviews]
+    schema = FLAT_TABLES['fact_product_reviews']['schema']
+    columns = {'review_key': keys}
+    for col in schema:
+        if col in ('review_key', 'pros_count', 'cons_count') or col.startswith(('reviewer_profile_', 'variant_')):
+            continue
+        columns[col] = [review[col] for review in reviews]
+    columns['pros_count'] = [len(values) for values in pros]
+    columns['cons_count'] = [len(values) for values in cons]
+    columns.update(_nested(reviews, 'reviewer_profile', ['total_reviews', 'verified_purchases']))
+    columns.update(_nested(reviews, 'variant', ['color', 'storage']))
+    return {
+        'fact_product_reviews': pd.DataFrame(columns, columns=list(schema)),
+        'review_pros': _bridge('review_key', keys, pros, 'pro'),
+        'review_cons': _bridge('review_key', keys, cons, 'con')
+    }
+
+
+def flatten(dataset: str, records: List[Dict]) -> Dict[str, pd.DataFrame]:
+    """Flat tables derived from a nested dataset ('social_media_posts' or 'product_reviews')."""
+    if dataset == 'social_media_posts':
+        return flatten_posts(records)
+    if dataset == 'product_reviews':
+        return flatten_reviews(records)
+    raise ValueError(f"No flat export for dataset '{dataset}'")
@@ -0,0 +1,344 @@
+"""
+Merkle fingerprints of generated datasets and a top-down diff between runs.
+"""
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.stream_utils import dataset_files
+
+MANIFEST_FILE = 'manifest.json'
+
+# Datasets fingerprinted, in manifest order
+DATASETS = [
+    'dim_products', 'dim_date', 'fact_daily_sales', 'fact_transactions',
+    'fact_campaign_performance', 'fact_campaign_attribution', 'social_media_posts', 'product_reviews',
+    'fact_social_posts', 'post_hashtags', 'fact_product_reviews', 'review_pros', 'review_cons'
+]
+
+
+def _digest(lines) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for line in lines:
+        digest.update(line.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def _column_hash(values: List[str]) -> str:
+    return hashlib.blake2b('\x1f'.join(values).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def _csv_ranges(path: str, rows: int) -> Iterator[Tuple[int, int, int]]:
+    """(byte offset, byte length, row count) of consecutive blocks of rows after the header."""
+    with open(path, 'rb') as f:
+        offset = len(f.readline())
+        start, count, quoted = offset, 0, False
+        for line in f:
+            offset += len(line)
+            # A quoted field may span lines; the record ends where the quotes balance
+            if line.count(b'"') % 2:
+                quoted = not quoted
+            if quoted:
+                continue
+            count += 1
+            if count == rows:
+                yield start, offset - start, count
+                start, count = offset, 0
+        if count:
+            yield start, offset - start, count
+
+
+def _json_ranges(path: str, rows: int, buffer_size: int = 1 << 20) -> Iterator[Tuple[int, int, int]]:
+    """
+    (byte offset, byte length, row count) of consecutive runs of objects in a JSON array file.
+
+    A range starts at its first object and ends after its last one, so
+    '[' + bytes + ']' parses on its own.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf, pos, byte_pos = f.read(buffer_size), 0, 0
+        start, end, count = None, 0, 0
+        while True:
+            # Array punctuation and indentation are ASCII, so characters and bytes match
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] in '[,'):
+                pos += 1
+                byte_pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                break
+            try:
+                if pos >= len(buf):
+                    raise json.JSONDecodeError('Buffer exhausted', buf, pos)
+                _, next_pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                more = f.read(buffer_size)
+                if not more:
+                    if buf[pos:].strip():
+                        raise
+                    break
+                buf, pos = buf[pos:] + more, 0
+                continue
+            if start is None:
+                start = byte_pos
+            byte_pos += len(buf[pos:next_pos].encode('utf-8'))
+            pos, end, count = next_pos, byte_pos, count + 1
+            if count == rows:
+                yield start, end - start, count
+                start, count = None, 0
+    if count:
+        yield start, end - start, count
+
+
+def read_partition(path: str, partition: Dict, encoding: str = 'utf-8') -> pd.DataFrame:
+    """
+    Read one partition of a file as canonical string values, seeking to its byte range.
+
+    CSV fields keep their text; JSON values are serialized with sorted keys,
+    so nested objects and arrays compare as a whole.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline() if path.endswith('.csv') else b''
+        f.seek(partition['byte_offset'])
+        data = f.read(partition['byte_length'])
+    if path.endswith('.csv'):
+        return pd.read_csv(io.BytesIO(header + data), dtype=str, keep_default_na=False, encoding=encoding)
+    records = json.loads(b'[' + data + b']')
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    return pd.DataFrame({col: [_canonical(record.get(col)) for record in records] for col in columns},
+                        columns=columns)
+
+
+def _fingerprint_file(path: str, rows: int) -> List[Dict]:
+    """Partitions of one file with their per-column hashes."""
+    ranges = _csv_ranges(path, rows) if path.endswith('.csv') else _json_ranges(path, rows)
+    partitions = []
+    for offset, length, count in ranges:
+        partition = {'rows': count, 'byte_offset': offset, 'byte_length': length}
+        frame = read_partition(path, partition)
+        columns = {col: _column_hash(frame[col].tolist()) for col in frame.columns}
+        partition['hash'] = _digest([f'rows={count}'] + [f'{col}={value}' for col, value in columns.items()])
+        partition['columns'] = columns
+        partitions.append(partition)
+    return partitions
+
+
+def build_manifest(data_dir: str, partition_rows: int = 10000, previous: Dict = None,
+                   datasets: List[str] = None) -> Dict:
+    """
+    Fingerprint every dataset in data_dir as a Merkle tree.
+
+    Each file is split into partitions of partition_rows rows. A partition
+    stores its byte range and one hash per column; its own hash covers its
+    column hashes. A dataset's hash covers its partition hashes (and each
+    column has a dataset-level hash over its partition hashes), and the root
+    hash covers the datasets. Files unchanged since the previous manifest
+    (same size and modification time) reuse their partitions.
+
+    Args:
+        data_dir: Directory with generated outputs
+        partition_rows: Rows per partition
+        previous: Earlier manifest of the same directory (e.g. before an incremental run)
+        datasets: Dataset names to include (default: DATASETS)
+
+    Returns:
+        Manifest dictionary (see save_manifest)
+    """
+    reusable = {}
+    if previous and previous.get('partition_rows') == partition_rows:
+        for entry in previous['datasets'].values():
+            for file_entry in entry['files']:
+                reusable[file_entry['file']] = file_entry
+
+    manifest_datasets = {}
+    for dataset in datasets or DATASETS:
+        files, partitions = [], []
+        for path in dataset_files(data_dir, dataset):
+            relative = os.path.relpath(path, data_dir).replace(os.sep, '/')
+            stat = os.stat(path)
+            cached = reusable.get(relative)
+            if cached and cached['bytes'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+                file_partitions = cached['partitions']
+            else:
+                file_partitions = _fingerprint_file(path, partition_rows)
+            files.append({'file': relative, 'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                          'partitions': file_partitions})
+            partitions.extend(file_partitions)
+        if not files:
+            continue
+        column_names = list(dict.fromkeys(col for partition in partitions for col in partition['columns']))
+        manifest_datasets[dataset] = {
+            'hash': _digest(partition['hash'] for partition in partitions),
+            'rows': sum(partition['rows'] for partition in partitions),
+            'columns': {
+                col: _digest(partition['columns'].get(col, '-') for partition in partitions)
+                for col in column_names
+            },
+            'files': files
+        }
+
+    return {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'partition_rows': partition_rows,
+        'root': _digest(f'{name}={entry["hash"]}' for name, entry in manifest_datasets.items()),
+        'datasets': manifest_datasets
+    }
+
+
+def save_manifest(manifest: Dict, data_dir: str) -> str:
+    """Write the manifest to <data_dir>/manifest.json and return its path."""
+    filepath = os.path.join(data_dir, MANIFEST_FILE)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return filepath
+
+
+def load_manifest(data_dir: str) -> Optional[Dict]:
+    """Manifest of a run directory, or None if it has none."""
+    filepath = os.path.join(data_dir, MANIFEST_FILE)
+    if not os.path.exists(filepath):
+        return None
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _partitions(entry: Dict) -> List[Tuple[str, Dict]]:
+    """(file, partition) pairs of a dataset in row order."""
+    return [(file_entry['file'], partition) for file_entry in entry['files'] for partition in file_entry['partitions']]
+
+
+def _sample_rows(left_dir: str, right_dir: str, left: Tuple[str, Dict], right: Tuple[str, Dict],
+                 row_start: int, columns: List[str], limit: int) -> Tuple[List[Dict], int]:
+    """Rows of a mismatching partition pair whose differing columns disagree, plus the bytes read."""
+    left_frame = read_partition(os.path.join(left_dir, left[0]), left[1])
+    right_frame = read_partition(os.path.join(right_dir, right[0]), right[1])
+    bytes_read = left[1]['byte_length'] + right[1]['byte_length']
+    length = max(len(left_frame), len(right_frame))
+    # Rows are labelled by their first column (the dataset's ID or date), from whichever side has them
+    keys = left_frame.iloc[:, 0].reindex(range(length)).fillna(right_frame.iloc[:, 0])
+    # Rows or columns missing on one side read as None, so they differ from any value
+    left_frame = left_frame.reindex(columns=columns, index=range(length))
+    right_frame = right_frame.reindex(columns=columns, index=range(length))
+    left_frame = left_frame.astype(object).where(left_frame.notna(), None)
+    right_frame = right_frame.astype(object).where(right_frame.notna(), None)
+    mismatch = (left_frame.values != right_frame.values).any(axis=1) if columns else []
+    samples = []
+    for i in [i for i, differs in enumerate(mismatch) if differs][:limit]:
+        values = {col: [left_frame.at[i, col], right_frame.at[i, col]] for col in columns
+                  if left_frame.at[i, col] != right_frame.at[i, col]}
+        samples.append({'row': row_start + i, 'key': keys.get(i), 'values': values})
+    return samples, bytes_read
+
+
+def diff_runs(left_dir: str, right_dir: str, left: Dict, right: Dict,
+              sample_rows: int = 5, sample_partitions: int = 3) -> Dict:
+    """
+    Compare two runs' manifests top-down.
+
+    Matching roots end the comparison at once; otherwise only datasets with
+    different hashes are descended into, and within them only partitions
+    with different hashes. Sample rows are read from the byte ranges of the
+    first sample_partitions mismatching partitions, so the rest of the data
+    is never read.
+
+    Args:
+        left_dir, right_dir: Run directories (for reading sample rows)
+        left, right: Their manifests
+        sample_rows: Differing rows to report per dataset
+        sample_partitions: Mismatching partitions to read rows from per dataset
+
+    Returns:
+        Report with 'identical', per-dataset differences and 'bytes_read'
+    """
+    report = {'identical': left['root'] == right['root'], 'datasets': {}, 'bytes_read': 0}
+    if report['identical']:
+        return report
+    if left.get('partition_rows') != right.get('partition_rows'):
+        raise ValueError(f"Manifests use different partition sizes ({left.get('partition_rows')} vs "
+                         f"{right.get('partition_rows')} rows); rebuild one of them")
+
+    for dataset in dict.fromkeys(list(left['datasets']) + list(right['datasets'])):
+        left_entry, right_entry = left['datasets'].get(dataset), right['datasets'].get(dataset)
+        if left_entry is None or right_entry is None:
+            report['datasets'][dataset] = {'status': 'only_left' if right_entry is None else 'only_right'}
+            continue
+        if left_entry['hash'] == right_entry['hash']:
+            continue
+
+        left_columns, right_columns = left_entry['columns'], right_entry['columns']
+        differing = {
+            'rows': [left_entry['rows'], right_entry['rows']],
+            'columns': [col for col in left_columns if col in right_columns and left_columns[col] != right_columns[col]],
+            'columns_only_left': [col for col in left_columns if col not in right_columns],
+            'columns_only_right': [col for col in right_columns if col not in left_columns],
+            'partitions': [],
+            'samples': []
+        }
+        left_parts, right_parts = _partitions(left_entry), _partitions(right_entry)
+        row_start = 0
+        for index in range(max(len(left_parts), len(right_parts))):
+            left_part = left_parts[index] if index < len(left_parts) else None
+            right_part = right_parts[index] if index < len(right_parts) else None
+            rows = (left_part or right_part)[1]['rows']
+            if left_part and right_part and left_part[1]['hash'] == right_part[1]['hash']:
+                row_start += rows
+                continue
+            left_hashes = left_part[1]['columns'] if left_part else {}
+            right_hashes = right_part[1]['columns'] if right_part else {}
+            columns = [col for col in dict.fromkeys(list(left_hashes) + list(right_hashes))
+                       if left_hashes.get(col) != right_hashes.get(col)]
+            differing['partitions'].append({
+                'index': index,
+                'rows': [row_start, row_start + rows],
+                'file': [left_part[0] if left_part else None, right_part[0] if right_part else None],
+                'columns': columns
+            })
+            if left_part and right_part and len(differing['partitions']) <= sample_partitions \
+                    and len(differing['samples']) < sample_rows:
+                samples, bytes_read = _sample_rows(left_dir, right_dir, left_part, right_part, row_start,
+                                                   columns, sample_rows - len(differing['samples']))
+                differing['samples'].extend(samples)
+                report['bytes_read'] += bytes_read
+            row_start += rows
+        differing['partition_count'] = [len(left_parts), len(right_parts)]
+        report['datasets'][dataset] = dict(differing, status='different')
+    return report
+
+
+def format_diff(report: Dict, left_dir: str, right_dir: str) -> List[str]:
+    """Human-readable lines of a diff report."""
+    if report['identical']:
+        return [f"{left_dir} and {right_dir} are identical (same root hash)"]
+    lines = []
+    for dataset, entry in report['datasets'].items():
+        if entry['status'] != 'different':
+            side = left_dir if entry['status'] == 'only_left' else right_dir
+            lines.append(f"{dataset}: only in {side}")
+            continue
+        left_rows, right_rows = entry['rows']
+        lines.append(f"{dataset}: {len(entry['partitions'])} of {max(entry['partition_count'])} partitions differ "
+                     f"({left_rows:,} vs {right_rows:,} rows)")
+        if entry['columns']:
+            lines.append(f"  columns: {', '.join(entry['columns'])}")
+        for key, side in (('columns_only_left', left_dir), ('columns_only_right', right_dir)):
+            if entry[key]:
+                lines.append(f"  columns only in {side}: {', '.join(entry[key])}")
+        for partition in entry['partitions'][:10]:
+            start, end = partition['rows']
+            lines.append(f"  partition {partition['index']} (rows {start:,}-{end - 1:,}): "
+                         f"{', '.join(partition['columns'])}")
+        if len(entry['partitions']) > 10:
+            lines.append(f"  ... {len(entry['partitions']) - 10} more partitions")
+        for sample in entry['samples']:
+            values = '; '.join(f"{col}: {left!r} -> {right!r}" for col, (left, right) in sample['values'].items())
+            lines.append(f"    row {sample['row']:,} [{sample['key']}] {values}")
+    return lines
@@ -0,0 +1,294 @@
+"""
+Dry-run planner: expected rows, bytes, runtime and memory of a run from its config.
+"""
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from generators.product_generator import ProductGenerator
+from generators.sales_generator import SalesGenerator
+from generators.transaction_generator import TransactionGenerator
+from generators.campaign_generator import CampaignGenerator
+from generators.social_generator import SocialGenerator
+from generators.review_generator import ReviewGenerator
+from utils.random_utils import RandomGenerator
+from utils.date_utils import parse_date, Calendar
+from utils.shard_utils import ShardPlan
+from utils.state_utils import derive_seed
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'benchmarks', 'baselines', 'baseline.json')
+
+# Dataset -> output format and the generator/writer benchmarks its runtime is calibrated on
+DATASETS = {
+    'dim_products': {'format': 'csv', 'generator': 'generator.products', 'writer': 'writer.csv_sales'},
+    'dim_date': {'format': 'csv', 'generator': None, 'writer': 'writer.csv_sales'},
+    'fact_daily_sales': {'format': 'csv', 'generator': 'generator.sales', 'writer': 'writer.csv_sales'},
+    'fact_transactions': {'format': 'csv', 'generator': 'generator.transactions', 'writer': 'writer.csv_sales'},
+    'fact_campaign_performance': {'format': 'csv', 'generator': 'generator.campaigns', 'writer': 'writer.csv_sales'},
+    'social_media_posts': {'format': 'json', 'generator': 'generator.social_posts', 'writer': 'writer.json_posts'},
+    'product_reviews': {'format': 'json', 'generator': 'generator.reviews', 'writer': 'writer.json_posts'}
+}
+
+# Size of the generated sample that bytes per record are measured on
+SAMPLE_DAYS = 3
+SAMPLE_RECORDS = 100
+SAMPLE_POSTS_PER_MONTH = 20
+
+
+def expected_rows(config: Dict, products_df: pd.DataFrame, calendar: Calendar) -> Dict:
+    """
+    Expected record counts of a full run, computed from the generators' rules.
+
+    Sales rows follow each product's lifecycle curve and the calendar's
+    seasonality for every region/channel cell: a cell with pre-noise units u
+    sells floor(u * U(0.8, 1.2)) and is dropped at zero. Maturity-stage days
+    average over their randint(80, 120) draw. Transactions, campaigns,
+    posts and reviews are the counts the run's ShardPlan draws before
+    generating any data.
+
+    Returns:
+        Dictionary with 'rows' (expected records by dataset) and 'daily_sales_rows'
+        (expected sales rows per calendar day)
+    """
+    days = np.arange(len(calendar))
+    launch = np.array([calendar.index_of(parse_date(date)) for date in products_df['launch_date']], dtype=int)
+    discontinue = np.array([
+        calendar.index_of(parse_date(date)) if pd.notna(date) else len(calendar) - 1
+        for date in products_df['discontinue_date']
+    ], dtype=int)
+    days_since = days[None, :] - launch[:, None]
+    active = (days_since >= 0) & (days[None, :] <= discontinue[:, None])
+
+    # Region weight and channel weight of every cell, multiplied in the generator's order
+    region_weights = np.array([weight for weight in SalesGenerator.REGIONS.values() for _ in SalesGenerator.CHANNELS])
+    channel_weights = np.array([channel['weight'] for _ in SalesGenerator.REGIONS for channel in SalesGenerator.CHANNELS.values()])
+    seasonal = calendar.seasonal_multiplier
+    lifecycle = SalesGenerator.lifecycle_units(days_since)
+    units = np.floor(np.floor(np.maximum(lifecycle, 0) * seasonal)[:, :, None] * region_weights * channel_weights).astype(int)
+    maturity = np.arange(80, 121)
+    maturity_units = np.floor(np.floor(maturity[:, None] * seasonal)[:, :, None] * region_weights * channel_weights).astype(int)
+
+    def cell_rows(cell_units):
+        return ((cell_units >= 2) + 0.5 * (cell_units == 1)).sum(axis=-1)
+
+    is_maturity = lifecycle < 0
+    rows = np.where(is_maturity, cell_rows(maturity_units).mean(axis=0), cell_rows(units)) * active
+
+    planned = ShardPlan(config, products_df, config.get('sharding', {}).get('window_days', 7)).totals()
+    return {
+        'rows': {
+            'dim_products': float(len(products_df)),
+            'dim_date': float(len(calendar)),
+            'fact_daily_sales': float(rows.sum()),
+            'fact_transactions': float(planned['fact_transactions']),
+            'fact_campaign_performance': float(planned['fact_campaign_performance']),
+            'social_media_posts': float(planned['social_media_posts']),
+            'product_reviews': float(planned['product_reviews'])
+        },
+        'daily_sales_rows': rows.sum(axis=0)
+    }
+
+
+def sample_records(config: Dict, products_df: pd.DataFrame, calendar: Calendar, peak_day: int) -> Dict[str, pd.DataFrame]:
+    """
+    Generate a small sample of every dataset around the busiest sales day.
+
+    The sample only serves to measure record sizes; products and the
+    calendar are complete.
+    """
+    rng = RandomGenerator(seed=derive_seed(config['random_seed'], 'plan'))
+    first = max(0, min(peak_day - SAMPLE_DAYS // 2, len(calendar) - SAMPLE_DAYS))
+    window = {'start_date': calendar.dates[first], 'end_date': calendar.dates[min(first + SAMPLE_DAYS, len(calendar)) - 1]}
+    window_config = dict(config, date_range=window)
+
+    sales_df = SalesGenerator(products_df, window_config, rng).generate_daily_sales()
+    transactions_df = TransactionGenerator(products_df, sales_df, window_config, rng).generate_transactions_for_count(
+        SAMPLE_RECORDS if len(sales_df) else 0
+    )
+    post_config = dict(config, social_posts=dict(config['social_posts'], posts_per_product_per_month=SAMPLE_POSTS_PER_MONTH))
+    posts = SocialGenerator(products_df.head(1), post_config, rng).generate_posts()
+    reviews = ReviewGenerator(products_df, transactions_df, config, rng).generate_reviews_for_count(SAMPLE_RECORDS) \
+        if len(transactions_df) else []
+
+    return {
+        'dim_products': products_df,
+        'dim_date': calendar.frame(),
+        'fact_daily_sales': sales_df,
+        'fact_transactions': transactions_df,
+        'fact_campaign_performance': CampaignGenerator(products_df, config, rng).generate_campaigns(),
+        'social_media_posts': posts,
+        'product_reviews': reviews
+    }
+
+
+def bytes_per_record(sample, csv_encoding: str = 'utf-8', json_indent: int = 2) -> Dict[str, Optional[float]]:
+    """
+    Average serialized size of a sample in each output format.
+
+    Args:
+        sample: DataFrame (flat tables) or list of records (nested JSON datasets)
+
+    Returns:
+        Bytes per record by format ('csv' only for DataFrames); None for an empty sample
+    """
+    records = sample.to_dict('records') if isinstance(sample, pd.DataFrame) else sample
+    if not len(records):
+        return {'csv': None, 'json': None, 'jsonl': None}
+    sizes = {
+        # write_json dumps the whole list with the configured indent
+        'json': len(json.dumps(records, indent=json_indent, ensure_ascii=False, default=str).encode('utf-8')),
+        'jsonl': sum(len(json.dumps(record, ensure_ascii=False, default=str).encode('utf-8')) + 1 for record in records)
+    }
+    if isinstance(sample, pd.DataFrame):
+        sizes['csv'] = len(sample.to_csv(index=False).encode(csv_encoding))
+    return {fmt: sizes[fmt] / len(records) if fmt in sizes else None for fmt in ('csv', 'json', 'jsonl')}
+
+
+def load_calibration(path: str = BASELINE_PATH) -> Dict[str, Dict]:
+    """
+    Benchmark results to calibrate runtime and memory on, by benchmark name.
+
+    The largest-scale result of each benchmark is used, as it is least
+    affected by fixed per-call overhead.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    calibration = {}
+    for result in baseline.get('results', []):
+        current = calibration.get(result['benchmark'])
+        if current is None or result['scale'] > current['scale']:
+            calibration[result['benchmark']] = dict(result, environment=baseline.get('environment', {}))
+    return calibration
+
+
+def detect_budgets(data_dir: str, memory_budget_mb: float = 0, disk_budget_mb: float = 0) -> Dict[str, Optional[float]]:
+    """
+    Memory and disk budgets in MB; a budget of 0 means physical memory and free space at data_dir.
+    """
+    if not memory_budget_mb:
+        try:
+            memory_budget_mb = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1048576
+        except (AttributeError, ValueError, OSError):
+            memory_budget_mb = None
+    if not disk_budget_mb:
+        path = os.path.abspath(data_dir)
+        while not os.path.exists(path):
+            path = os.path.dirname(path)
+        disk_budget_mb = shutil.disk_usage(path).free / 1048576
+    return {'memory_mb': memory_budget_mb, 'disk_mb': disk_budget_mb}
+
+
+def plan_run(config: Dict, baseline_path: str = BASELINE_PATH) -> Dict:
+    """
+    Predict the size and cost of a full run without generating it.
+
+    Args:
+        config: Configuration dictionary
+        baseline_path: Benchmark results (benchmarks/run_benchmarks.py) used for runtime and memory
+
+    Returns:
+        Plan with per-dataset rows, bytes per format, seconds and memory,
+        their totals, the budgets and any budget warnings
+    """
+    started = time.perf_counter()
+    date_range = config['date_range']
+    products_df = ProductGenerator(config, RandomGenerator(seed=config['random_seed'])).generate_products()
+    calendar = Calendar(date_range['start_date'], date_range['end_date'])
+    expected = expected_rows(config, products_df, calendar)
+    samples = sample_records(config, products_df, calendar, int(np.argmax(expected['daily_sales_rows'])))
+    calibration = load_calibration(baseline_path)
+    output_config = config['output']
+
+    datasets = {}
+    for dataset, spec in DATASETS.items():
+        rows = expected['rows'][dataset]
+        sizes = bytes_per_record(samples[dataset], output_config.get('csv_encoding', 'utf-8'),
+                                 output_config.get('json_indent', 2))
+        generator = calibration.get(spec['generator'])
+        writer = calibration.get(spec['writer'])
+        datasets[dataset] = {
+            'rows': int(round(rows)),
+            'format': spec['format'],
+            'bytes': {fmt: int(rows * size) for fmt, size in sizes.items() if size is not None},
+            'generate_sec': rows / generator['rows_per_sec'] if generator else 0.0,
+            'write_sec': rows / writer['rows_per_sec'] if writer else 0.0,
+            'memory_mb': rows * generator['peak_mb'] / generator['rows'] if generator and generator['rows'] else 0.0
+        }
+        datasets[dataset]['output_bytes'] = datasets[dataset]['bytes'].get(spec['format'], 0)
+
+    # Generated datasets stay in memory until the run's final stages
+    totals = {
+        'rows': sum(info['rows'] for info in datasets.values()),
+        'output_bytes': sum(info['output_bytes'] for info in datasets.values()),
+        'seconds': sum(info['generate_sec'] + info['write_sec'] for info in datasets.values()),
+        'memory_mb': sum(info['memory_mb'] for info in datasets.values())
+    }
+    plan_config = config.get('plan', {})
+    budgets = detect_budgets(output_config['data_dir'], plan_config.get('memory_budget_mb', 0),
+                             plan_config.get('disk_budget_mb', 0))
+    warnings = []
+    if budgets['memory_mb'] and calibration and totals['memory_mb'] > budgets['memory_mb']:
+        warnings.append(f"estimated memory {totals['memory_mb']:,.0f} MB exceeds the budget of {budgets['memory_mb']:,.0f} MB")
+    if budgets['disk_mb'] and totals['output_bytes'] / 1048576 > budgets['disk_mb']:
+        warnings.append(f"estimated output {totals['output_bytes'] / 1048576:,.0f} MB exceeds the disk budget "
+                        f"of {budgets['disk_mb']:,.0f} MB")
+
+    return {
+        'date_range': dict(date_range),
+        'days': len(calendar),
+        'products': len(products_df),
+        'random_seed': config['random_seed'],
+        'datasets': datasets,
+        'totals': totals,
+        'budgets': budgets,
+        'calibration': {
+            'file': baseline_path if calibration else None,
+            'environment': next(iter(calibration.values()))['environment'] if calibration else None
+        },
+        'warnings': warnings,
+        'plan_sec': round(time.perf_counter() - started, 3)
+    }
+
+
+def format_plan(plan: Dict) -> List[str]:
+    """Plan as printable table lines."""
+    mb = 1048576
+    lines = [
+        f"Plan for {plan['date_range']['start_date']} to {plan['date_range']['end_date']} "
+        f"({plan['days']} days, {plan['products']} products, seed {plan['random_seed']})",
+        "",
+        f"{'Dataset':<27}{'Rows':>12}{'Output MB':>11}{'CSV MB':>9}{'JSON MB':>9}{'JSONL MB':>10}{'Gen s':>8}{'Write s':>9}{'Mem MB':>8}"
+    ]
+
+    def size(info, fmt):
+        return f"{info['bytes'][fmt] / mb:.1f}" if fmt in info['bytes'] else '-'
+
+    for dataset, info in plan['datasets'].items():
+        lines.append(
+            f"{dataset:<27}{info['rows']:>12,}{info['output_bytes'] / mb:>11.1f}{size(info, 'csv'):>9}{size(info, 'json'):>9}"
+            f"{size(info, 'jsonl'):>10}{info['generate_sec']:>8.1f}{info['write_sec']:>9.1f}{info['memory_mb']:>8.0f}"
+        )
+    totals = plan['totals']
+    lines.append(f"{'Total':<27}{totals['rows']:>12,}{totals['output_bytes'] / mb:>11.1f}{'':>28}"
+                 f"{totals['seconds']:>17.1f}{totals['memory_mb']:>8.0f}")
+    lines.append("")
+    if plan['calibration']['file']:
+        environment = plan['calibration']['environment'] or {}
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        lines.append(f"Runtime and memory calibrated on {os.path.relpath(plan['calibration']['file'], project_dir)} "
+                     f"({environment.get('platform', 'unknown platform')}, {environment.get('cpu_count', '?')} CPU)")
+    else:
+        lines.append("No benchmark baseline found; runtime and memory are not estimated "
+                     "(run benchmarks/run_benchmarks.py --save-baseline)")
+    budgets = plan['budgets']
+    lines.append("Budgets: memory " + (f"{budgets['memory_mb']:,.0f} MB" if budgets['memory_mb'] else "unknown") +
+                 f", disk {budgets['disk_mb']:,.0f} MB")
+    return lines
@@ -0,0 +1,205 @@
+"""
+Profiling utilities for per-step timing, throughput and memory metrics.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import resource
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+# Step currently being measured (phases opened inside generators attach here)
+_active_step = None
+
+
+def _read_peak_rss_kb() -> int:
+    """Read the process peak resident set size in kilobytes."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if os.uname().sysname == 'Darwin' else peak
+
+
+def _reset_peak_rss():
+    """Reset the peak RSS watermark so it can be measured per step (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _slugify(name: str) -> str:
+    """Convert a dataset name to a file-name friendly slug."""
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+
+class StepMetrics:
+    """Metrics collected for a single pipeline step."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.record_count = 0
+        self.bytes_written = 0
+        self.output_files = []
+        self.phases = {}
+        self.seconds = 0.0
+        self.peak_rss_mb = 0.0
+        self.profile_path = None
+        self._phase_stack = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a sub-phase of this step.
+
+        Nested phases are subtracted from their parent so each phase
+        reports exclusive time (e.g. 'generate' excludes 'build_frame').
+        """
+        frame = {'name': name, 'child_seconds': 0.0}
+        self.phases.setdefault(name, 0.0)
+        self._phase_stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._phase_stack.pop()
+            if self._phase_stack:
+                self._phase_stack[-1]['child_seconds'] += elapsed
+            exclusive = elapsed - frame['child_seconds']
+            self.phases[name] += exclusive
+
+    def record_output(self, record_count: int, filepath: Optional[str] = None,
+                      bytes_written: Optional[int] = None):
+        """
+        Record the number of rows produced and the size of the written file.
+
+        Args:
+            record_count: Number of rows produced by the step
+            filepath: Written file (its size counts as bytes written)
+            bytes_written: Explicit byte count, e.g. for rows appended to an existing file
+        """
+        self.record_count = record_count
+        if filepath and os.path.exists(filepath):
+            self.output_files.append(filepath)
+            self.bytes_written += bytes_written if bytes_written is not None else os.path.getsize(filepath)
+
+    @property
+    def rows_per_sec(self) -> float:
+        """Overall step throughput in rows per second."""
+        return self.record_count / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        """Convert metrics to a JSON-serializable dictionary."""
+        return {
+            'dataset': self.name,
+            'record_count': self.record_count,
+            'seconds': round(self.seconds, 4),
+            'phases': {k: round(v, 4) for k, v in self.phases.items()},
+            'rows_per_sec': round(self.rows_per_sec, 1),
+            'bytes_written': self.bytes_written,
+            'output_files': [os.path.basename(p) for p in self.output_files],
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+            'profile_path': self.profile_path
+        }
+
+
+class StageProfiler:
+    """Collect metrics for every step of a generation run."""
+
+    def __init__(self, profile_dir: str = None):
+        """
+        Initialize profiler.
+
+        Args:
+            profile_dir: Directory for per-step cProfile dumps (None disables profiling)
+        """
+        self.profile_dir = profile_dir
+        self.steps: List[StepMetrics] = []
+        self.run_id = datetime.now().strftime('%Y%m%dT%H%M%S') + f'-{os.getpid()}'
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def step(self, name: str):
+        """
+        Measure a pipeline step.
+
+        Args:
+            name: Dataset name of the step (e.g. 'Daily Sales')
+
+        Yields:
+            StepMetrics for recording phases and outputs
+        """
+        global _active_step
+        metrics = StepMetrics(name)
+        profiler = cProfile.Profile() if self.profile_dir else None
+
+        _reset_peak_rss()
+        previous_step = _active_step
+        _active_step = metrics
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield metrics
+        finally:
+            if profiler:
+                profiler.disable()
+            metrics.seconds = time.perf_counter() - start
+            metrics.peak_rss_mb = _read_peak_rss_kb() / 1024
+            _active_step = previous_step
+            if profiler:
+                metrics.profile_path = self._dump_profile(profiler, name)
+            self.steps.append(metrics)
+
+    def _dump_profile(self, profiler: cProfile.Profile, name: str) -> str:
+        """Write a cProfile dump and a top-functions text summary for a step."""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir, _slugify(name))
+        profiler.dump_stats(f'{base}.prof')
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats('cumulative').print_stats(30)
+        with open(f'{base}.txt', 'w', encoding='utf-8') as f:
+            f.write(summary.getvalue())
+
+        return f'{base}.prof'
+
+    def to_dict(self) -> Dict:
+        """Convert run metrics to a JSON-serializable dictionary."""
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'total_seconds': round(time.perf_counter() - self._start, 4),
+            'steps': [step.to_dict() for step in self.steps]
+        }
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Time a sub-phase of the currently active step.
+
+    No-op when called outside a profiled step, so generators can use it
+    unconditionally.
+    """
+    if _active_step is None:
+        yield
+    else:
+        with _active_step.phase(name):
+            yield
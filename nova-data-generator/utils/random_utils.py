@@ -20,6 +20,15 @@ class RandomGenerator:
         random.seed(seed)
         np.random.seed(seed)
     
+    def get_state(self) -> tuple:
+        """Capture the state of the underlying random generators."""
+        return (random.getstate(), np.random.get_state())
+    
+    def set_state(self, state: tuple):
+        """Restore a state captured with get_state()."""
+        random.setstate(state[0])
+        np.random.set_state(state[1])
+    
     def randint(self, min_val: int, max_val: int) -> int:
         """Generate random integer between min_val and max_val (inclusive)."""
         return random.randint(min_val, max_val)
@@ -0,0 +1,289 @@
+"""
+Event-time replay of generated datasets as one chronological stream.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Tuple
+
+import pandas as pd
+
+from utils.emitter_utils import encode_event
+from utils.stream_utils import iter_json_array, dataset_files, iter_chunks
+from utils.zonemap_utils import ZoneMap
+
+logger = logging.getLogger(__name__)
+
+# Replayed datasets: event type and the column holding each record's event time
+REPLAY_SOURCES = {
+    'fact_daily_sales': {'event_type': 'daily_sales', 'time_column': 'date'},
+    'fact_transactions': {'event_type': 'transaction', 'time_column': 'transaction_datetime'},
+    'social_media_posts': {'event_type': 'social_post', 'time_column': 'timestamp'},
+    'product_reviews': {'event_type': 'review', 'time_column': 'review_datetime'}
+}
+
+# Daily sales rows are complete when the day closes
+_DAY_CLOSE = 'T23:59:59'
+
+# Most run files merged at once; more runs are first merged into longer runs
+MAX_MERGE_RUNS = 128
+
+# Pairs per pickled block in a run file (the read buffer of each open run)
+RUN_BLOCK = 256
+
+Event = Tuple[str, str, Dict]
+
+
+def event_time(value: str) -> str:
+    """Normalize a date, datetime or UTC timestamp to 'YYYY-MM-DDTHH:MM:SS' (sortable as a string)."""
+    value = str(value)
+    return value + _DAY_CLOSE if len(value) == 10 else value[:19]
+
+
+def _epoch_seconds(key: str) -> float:
+    """Seconds since the epoch of an event time key, read as UTC (independent of the host timezone and DST)."""
+    return datetime.fromisoformat(key).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _iter_records(path: str, chunk_size: int) -> Iterator[List[Dict]]:
+    """Read a data file as lists of records, keeping empty CSV fields as '' and nested JSON fields as objects."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        for chunk in pd.read_csv(path, chunksize=chunk_size, keep_default_na=False):
+            yield chunk.to_dict('records')
+    elif ext == '.json':
+        yield from iter_json_array(path, chunk_size)
+    elif ext == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            records = []
+            for line in f:
+                records.append(json.loads(line))
+                if len(records) >= chunk_size:
+                    yield records
+                    records = []
+            if records:
+                yield records
+    else:
+        for chunk in iter_chunks(path, chunk_size):
+            yield chunk.astype(object).where(chunk.notna(), None).to_dict('records')
+
+
+def is_time_sorted(path: str, time_column: str) -> bool:
+    """Whether a file was written clustered on its event time (per its zone map sidecar)."""
+    zone_map = ZoneMap.load(path)
+    return zone_map is not None and zone_map.sort_keys[:1] == [time_column]
+
+
+def _read_run(path: str) -> Iterator[Tuple[str, Dict]]:
+    """Stream (time, record) pairs back from a spilled run, one block at a time."""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+
+def _write_run(pairs, path: str):
+    """Spill sorted (time, record) pairs to a run file as pickled blocks of RUN_BLOCK pairs."""
+    with open(path, 'wb') as f:
+        block = []
+        for pair in pairs:
+            block.append(pair)
+            if len(block) >= RUN_BLOCK:
+                pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+                block = []
+        if block:
+            pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _merge_runs(runs: List[str]) -> Iterator[Tuple[str, Dict]]:
+    return heapq.merge(*[_read_run(run) for run in runs], key=lambda pair: pair[0])
+
+
+class ReplaySource:
+    """
+    One data file as a lazily read stream of (time, record) pairs in event-time order.
+
+    Files written clustered on their time column are read in place, chunk
+    by chunk. Other files are sorted externally: each chunk is sorted and
+    spilled to a run file, and the runs are merged on read, so memory is
+    bounded by the chunk size rather than the file size.
+    """
+
+    def __init__(self, path: str, time_column: str, chunk_size: int = 10000, spill_dir: str = None):
+        self.path = path
+        self.time_column = time_column
+        self.chunk_size = chunk_size
+        self.spill_dir = spill_dir
+        self.sorted = is_time_sorted(path, time_column)
+
+    def _keyed(self, records: List[Dict]) -> List[Tuple[str, Dict]]:
+        column = self.time_column
+        return [(event_time(record[column]), record) for record in records]
+
+    def _spill(self) -> List[str]:
+        """Sort the file chunk by chunk into at most MAX_MERGE_RUNS run files."""
+        runs = []
+        base = os.path.join(self.spill_dir, os.path.basename(self.path))
+        for records in _iter_records(self.path, self.chunk_size):
+            keyed = self._keyed(records)
+            keyed.sort(key=lambda pair: pair[0])
+            runs.append(f'{base}.run{len(runs):05d}')
+            _write_run(keyed, runs[-1])
+
+        # Bound open files (and per-run read buffers) for very long histories
+        level = 0
+        while len(runs) > MAX_MERGE_RUNS:
+            level += 1
+            merged = []
+            for start in range(0, len(runs), MAX_MERGE_RUNS):
+                group = runs[start:start + MAX_MERGE_RUNS]
+                merged.append(f'{base}.merge{level}.{len(merged):05d}')
+                _write_run(_merge_runs(group), merged[-1])
+                for run in group:
+                    os.remove(run)
+            runs = merged
+        return runs
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict]]:
+        if self.sorted:
+            for records in _iter_records(self.path, self.chunk_size):
+                yield from self._keyed(records)
+            return
+        yield from _merge_runs(self._spill())
+
+
+def _tagged(source: ReplaySource, event_type: str) -> Iterator[Event]:
+    for key, record in source:
+        yield key, event_type, record
+
+
+def merged_events(data_dir: str, datasets: List[str] = None, chunk_size: int = 10000,
+                  spill_dir: str = None) -> Iterator[Event]:
+    """
+    K-way merge of the generated datasets in event-time order.
+
+    Every file of every dataset (including incremental part files) is one
+    sorted source; a heap holds one pending record per source. Ties keep
+    dataset order (sales, transactions, posts, reviews).
+
+    Args:
+        data_dir: Directory with generated outputs
+        datasets: Datasets to replay (default: all of REPLAY_SOURCES that exist)
+        chunk_size: Records read per chunk from each file
+        spill_dir: Directory for sorted runs of unclustered files (a temp dir by default)
+
+    Yields:
+        (event_time, event_type, record) tuples
+    """
+    work_dir = tempfile.mkdtemp(prefix='nova-replay-', dir=spill_dir)
+    try:
+        streams = []
+        for dataset in datasets or list(REPLAY_SOURCES):
+            source = REPLAY_SOURCES[dataset]
+            for path in dataset_files(data_dir, dataset):
+                replay_source = ReplaySource(path, source['time_column'], chunk_size, work_dir)
+                if not replay_source.sorted:
+                    logger.info(f"  {os.path.basename(path)} is not clustered on {source['time_column']}; "
+                                f"sorting it in {chunk_size:,}-record runs")
+                streams.append(_tagged(replay_source, source['event_type']))
+        yield from heapq.merge(*streams, key=lambda event: event[0])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+async def replay(events: Iterator[Event], sink, speed: float = 60.0, batch_size: int = 1000,
+                 report_interval_sec: float = 5.0) -> Dict:
+    """
+    Write merged events to a sink, paced by their event times.
+
+    Event time advances `speed` times faster than wall time from the first
+    event (speed 0 replays as fast as the sink accepts). Events due at the
+    same moment are written together, up to batch_size per write.
+
+    Args:
+        events: (event_time, event_type, record) tuples in time order
+        sink: Sink from output.stream_sinks.open_sink()
+        speed: Event-time seconds per wall-clock second (0 = unpaced)
+        batch_size: Maximum events per sink write
+        report_interval_sec: Interval between progress log lines
+
+    Returns:
+        Summary with event counts, event-time span and achieved speed-up
+    """
+    loop = asyncio.get_running_loop()
+    await sink.open()
+    started = loop.time()
+    last_report = started
+    first = last = None
+    first_seconds = 0.0
+    written = 0
+    total_bytes = 0
+    max_lag = 0.0
+    by_type = {}
+    batch = []
+
+    async def flush():
+        nonlocal written, total_bytes
+        payload = ''.join([encode_event(event_type, f'{key}Z', record) for key, event_type, record in batch]).encode('utf-8')
+        await sink.write(payload)
+        written += len(batch)
+        total_bytes += len(payload)
+        batch.clear()
+
+    try:
+        for key, event_type, record in events:
+            if key != last:
+                seconds = _epoch_seconds(key)
+                if first is None:
+                    first, first_seconds = key, seconds
+                last = key
+                if speed:
+                    due = started + (seconds - first_seconds) / speed
+                    wait = due - loop.time()
+                    if wait > 0:
+                        if batch:
+                            await flush()
+                        await asyncio.sleep(due - loop.time())
+                    else:
+                        max_lag = max(max_lag, -wait)
+
+            batch.append((key, event_type, record))
+            by_type[event_type] = by_type.get(event_type, 0) + 1
+            if len(batch) >= batch_size:
+                await flush()
+
+            now = loop.time()
+            if now - last_report >= report_interval_sec:
+                achieved = (_epoch_seconds(key) - first_seconds) / (now - started)
+                logger.info(f"  replay: {written:,} events, event time {key} ({achieved:,.0f}x)")
+                last_report = now
+        if batch:
+            await flush()
+    finally:
+        await sink.close()
+
+    wall = loop.time() - started
+    span = _epoch_seconds(last) - first_seconds if first else 0.0
+    return {
+        'sink': sink.describe(),
+        'events': written,
+        'events_by_type': by_type,
+        'bytes': total_bytes,
+        'first_event_time': first,
+        'last_event_time': last,
+        'event_span_sec': span,
+        'seconds': round(wall, 3),
+        'speed': speed,
+        'achieved_speed': round(span / wall, 1) if wall > 0 else 0.0,
+        'events_per_sec': round(written / wall, 1) if wall > 0 else 0.0,
+        'max_lag_sec': round(max_lag, 3)
+    }
@@ -0,0 +1,296 @@
+"""
+Pre-aggregated rollup tables for persona dashboards.
+"""
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _month(values: pd.Series) -> pd.Series:
+    """Month ('YYYY-MM') of ISO date or datetime strings, without parsing."""
+    return values.str[:7]
+
+
+def _week_start(values: pd.Series) -> pd.Series:
+    """
+    Monday of the ISO week of ISO date or datetime strings.
+
+    Only the distinct days are parsed, then mapped back to the rows.
+    """
+    codes, days = pd.factorize(values.str[:10])
+    days = pd.to_datetime(days)
+    starts = (days - pd.to_timedelta(days.weekday, unit='D')).strftime('%Y-%m-%d')
+    return pd.Series(np.asarray(starts)[codes], index=values.index)
+
+
+def _product_lines(product_ids: pd.Series, products_df: pd.DataFrame) -> pd.Series:
+    return product_ids.map(products_df.set_index('product_id')['product_line'])
+
+
+def _ratio(numerator: pd.Series, denominator: pd.Series, decimals: int = 4) -> pd.Series:
+    """Ratio rounded for output; 0 where the denominator is 0."""
+    return (numerator / denominator.where(denominator != 0)).fillna(0).round(decimals)
+
+
+class Rollup:
+    """
+    Definition of one rollup table.
+
+    A rollup is stored as additive measures (sums and counts) grouped by
+    its keys, plus ratios derived from those sums. Because the stored
+    measures are additive, rollups of new data can be merged into an
+    existing rollup by summing per key and re-deriving the ratios.
+    """
+
+    def __init__(self, name: str, description: str, sources: List[str], keys: List[str],
+                 build: Callable[[Dict[str, pd.DataFrame]], pd.DataFrame],
+                 derive: Optional[Callable[[pd.DataFrame], Dict[str, pd.Series]]] = None):
+        """
+        Initialize rollup definition.
+
+        Args:
+            name: Rollup name (output file name without extension)
+            description: What the rollup answers
+            sources: Dataset names the rollup is computed from
+            keys: Grouping columns (the grain)
+            build: Callable computing keys and additive measures from source frames
+            derive: Callable returning ratio columns computed from the measures
+        """
+        self.name = name
+        self.description = description
+        self.sources = sources
+        self.keys = keys
+        self.build = build
+        self.derive = derive
+
+    def finalize(self, measures: pd.DataFrame) -> pd.DataFrame:
+        """Sort by the grain and add derived ratio columns."""
+        df = measures.sort_values(self.keys, kind='mergesort').reset_index(drop=True)
+        # Drop float noise accumulated by the sums
+        floats = df.select_dtypes('float').columns
+        df[floats] = df[floats].round(4)
+        if self.derive:
+            for column, values in self.derive(df).items():
+                df[column] = values
+        return df
+
+    def derived_columns(self, df: pd.DataFrame) -> List[str]:
+        return list(self.derive(df.head(0)).keys()) if self.derive else []
+
+    def compute(self, frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Compute the rollup from source frames."""
+        return self.finalize(self.build(frames))
+
+    def merge(self, existing: pd.DataFrame, frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Merge new source rows into an existing rollup.
+
+        Args:
+            existing: Previously written rollup
+            frames: Source frames holding only the new rows
+
+        Returns:
+            Rollup covering both
+        """
+        measures = existing.drop(columns=self.derived_columns(existing))
+        combined = pd.concat([measures, self.build(frames)], ignore_index=True)
+        summed = combined.groupby(self.keys, sort=False, dropna=False).sum(numeric_only=True).reset_index()
+        return self.finalize(summed)
+
+
+def _monthly_sales(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    sales = frames['fact_daily_sales']
+    df = pd.DataFrame({
+        'month': _month(sales['date']),
+        'product_id': sales['product_id'],
+        'product_line': _product_lines(sales['product_id'], frames['dim_products']),
+        'region': sales['region'],
+        'channel': sales['channel'],
+        'units_sold': sales['units_sold'],
+        'revenue_usd': sales['revenue_usd'],
+        'units_returned': sales['units_returned']
+    })
+    keys = ['month', 'product_id', 'product_line', 'region', 'channel']
+    return df.groupby(keys, sort=False).sum().reset_index()
+
+
+def _weekly_sentiment(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    posts = frames['social_media_posts']
+    sentiment = posts['sentiment']
+    df = pd.DataFrame({
+        'week_start': _week_start(posts['timestamp']),
+        'product_id': posts['product_mentioned'],
+        'platform': posts['platform'],
+        'post_count': 1,
+        'positive_posts': (sentiment == 'positive').astype(int),
+        'neutral_posts': (sentiment == 'neutral').astype(int),
+        'negative_posts': (sentiment == 'negative').astype(int),
+        'sentiment_score_sum': posts['sentiment_score'],
+        'likes': posts['engagement'].str['likes'],
+        'comments': posts['engagement'].str['comments'],
+        'shares': posts['engagement'].str['shares']
+    })
+    return df.groupby(['week_start', 'product_id', 'platform'], sort=False).sum().reset_index()
+
+
+def _segment_product_line(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    transactions = frames['fact_transactions']
+    df = pd.DataFrame({
+        'customer_segment': transactions['customer_segment'],
+        'product_line': _product_lines(transactions['product_id'], frames['dim_products']),
+        'transactions': 1,
+        'repeat_transactions': transactions['is_repeat_customer'].astype(bool).astype(int),
+        'revenue_usd': transactions['price_paid'],
+        'discount_usd': transactions['discount_amount']
+    })
+    return df.groupby(['customer_segment', 'product_line'], sort=False).sum().reset_index()
+
+
+def _campaign_roi(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    campaigns = frames['fact_campaign_performance']
+    df = pd.DataFrame({
+        'month': _month(campaigns['start_date']),
+        'product_line': _product_lines(campaigns['product_id'], frames['dim_products']),
+        'channel': campaigns['channel'],
+        'region': campaigns['region'],
+        'campaigns': 1,
+        'budget_usd': campaigns['budget_usd'],
+        'impressions': campaigns['impressions'],
+        'clicks': campaigns['clicks'],
+        'conversions': campaigns['conversions'],
+        'revenue_usd': campaigns['revenue_usd']
+    })
+    return df.groupby(['month', 'product_line', 'channel', 'region'], sort=False).sum().reset_index()
+
+
+def _review_ratings(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    reviews = frames['product_reviews']
+    rating = reviews['rating']
+    df = pd.DataFrame({
+        'month': _month(reviews['review_datetime']),
+        'product_id': reviews['product_id'],
+        'reviews': 1,
+        'verified_reviews': reviews['verified_purchase'].astype(int),
+        'rating_sum': rating,
+        'helpful_votes': reviews['helpful_votes'],
+        'total_votes': reviews['total_votes'],
+        **{f'rating_{stars}': (rating == stars).astype(int) for stars in range(1, 6)}
+    })
+    return df.groupby(['month', 'product_id'], sort=False).sum().reset_index()
+
+
+def _monthly_kpis(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    sales = frames['fact_daily_sales']
+    transactions = frames['fact_transactions']
+    sales_kpis = pd.DataFrame({
+        'month': _month(sales['date']),
+        'units_sold': sales['units_sold'],
+        'revenue_usd': sales['revenue_usd'],
+        'units_returned': sales['units_returned']
+    }).groupby('month', sort=False).sum()
+    transaction_kpis = pd.DataFrame({
+        'month': _month(transactions['transaction_datetime']),
+        'transactions': 1,
+        'repeat_transactions': transactions['is_repeat_customer'].astype(bool).astype(int),
+        'transaction_revenue_usd': transactions['price_paid']
+    }).groupby('month', sort=False).sum()
+    return sales_kpis.join(transaction_kpis, how='outer').fillna(0).reset_index()
+
+
+ROLLUPS = {
+    rollup.name: rollup for rollup in [
+        Rollup(
+            'monthly_sales', 'Monthly units, revenue and returns by product, region and channel',
+            ['fact_daily_sales', 'dim_products'], ['month', 'product_id', 'product_line', 'region', 'channel'],
+            _monthly_sales,
+            lambda df: {'return_rate': _ratio(df['units_returned'], df['units_sold'])}
+        ),
+        Rollup(
+            'weekly_sentiment', 'Weekly post volume, sentiment mix and engagement by product and platform',
+            ['social_media_posts'], ['week_start', 'product_id', 'platform'],
+            _weekly_sentiment,
+            lambda df: {
+                'avg_sentiment_score': _ratio(df['sentiment_score_sum'], df['post_count']),
+                'positive_share': _ratio(df['positive_posts'], df['post_count']),
+                'negative_share': _ratio(df['negative_posts'], df['post_count'])
+            }
+        ),
+        Rollup(
+            'segment_product_line', 'Purchase matrix of customer segment by product line',
+            ['fact_transactions', 'dim_products'], ['customer_segment', 'product_line'],
+            _segment_product_line,
+            lambda df: {
+                'avg_price_usd': _ratio(df['revenue_usd'], df['transactions'], 2),
+                'repeat_rate': _ratio(df['repeat_transactions'], df['transactions'])
+            }
+        ),
+        Rollup(
+            'campaign_roi', 'Campaign spend, funnel and return by launch month, product line, channel and region',
+            ['fact_campaign_performance', 'dim_products'], ['month', 'product_line', 'channel', 'region'],
+            _campaign_roi,
+            lambda df: {
+                'ctr': _ratio(df['clicks'], df['impressions']),
+                'conversion_rate': _ratio(df['conversions'], df['clicks']),
+                'roi': _ratio(df['revenue_usd'] - df['budget_usd'], df['budget_usd'], 2)
+            }
+        ),
+        Rollup(
+            'review_ratings', 'Monthly review volume and rating distribution by product',
+            ['product_reviews'], ['month', 'product_id'],
+            _review_ratings,
+            lambda df: {
+                'avg_rating': _ratio(df['rating_sum'], df['reviews'], 2),
+                'helpful_rate': _ratio(df['helpful_votes'], df['total_votes'])
+            }
+        ),
+        Rollup(
+            'monthly_kpis', 'Company-wide monthly KPIs for the executive dashboard',
+            ['fact_daily_sales', 'fact_transactions'], ['month'],
+            _monthly_kpis,
+            lambda df: {
+                'avg_order_value_usd': _ratio(df['transaction_revenue_usd'], df['transactions'], 2),
+                'repeat_rate': _ratio(df['repeat_transactions'], df['transactions']),
+                'return_rate': _ratio(df['units_returned'], df['units_sold'])
+            }
+        ),
+    ]
+}
+
+
+def lineage_record(rollup: Rollup, df: pd.DataFrame, sources: Dict[str, Dict], run: Dict) -> Dict:
+    """
+    Build the lineage record tying a rollup to the run and inputs it came from.
+
+    Args:
+        rollup: Rollup definition
+        df: Computed rollup
+        sources: Per source dataset: file, record_count and step_key (stage cache key, if any)
+        run: Run identity (run_id, random_seed, date_range)
+
+    Returns:
+        Lineage dictionary
+    """
+    return {
+        'rollup': rollup.name,
+        'description': rollup.description,
+        'grain': rollup.keys,
+        'measures': [col for col in df.columns if col not in rollup.keys],
+        'row_count': len(df),
+        'run_id': run['run_id'],
+        'random_seed': run['random_seed'],
+        'date_range': run['date_range'],
+        'sources': [dict(dataset=name, **sources[name]) for name in rollup.sources if name in sources],
+        'increments': []
+    }
+
+
+def load_lineage(rollup_dir: str) -> Dict[str, Dict]:
+    """Load lineage records written by a previous run (empty if none)."""
+    filepath = os.path.join(rollup_dir, 'lineage.json')
+    if not os.path.exists(filepath):
+        return {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)['rollups']
@@ -0,0 +1,137 @@
+"""
+Multi-scenario runs: config overlays and inputs shared between scenarios.
+"""
+import copy
+import json
+import os
+import re
+from typing import Dict, List, Tuple
+
+import pandas as pd
+import yaml
+
+from generators.product_generator import ProductGenerator
+from utils.date_utils import Calendar
+from utils.random_utils import RandomGenerator
+
+SUMMARY_FILE = 'scenarios.json'
+
+_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+
+def deep_merge(base: Dict, overlay: Dict) -> Dict:
+    """Copy of base with overlay applied; nested dictionaries are merged, other values replaced."""
+    merged = copy.deepcopy(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def load_scenarios(path: str) -> List[Dict]:
+    """
+    Read a scenario file: a 'scenarios' list (or a bare list) of {name, overrides}.
+
+    Raises:
+        ValueError: If a scenario has no valid name or names repeat
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        document = yaml.safe_load(f) or []
+    scenarios = document.get('scenarios', []) if isinstance(document, dict) else document
+    names = set()
+    for scenario in scenarios:
+        name = str(scenario.get('name', ''))
+        if not _NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid scenario name '{name}' (letters, digits, '_', '-', '.')")
+        if name in names:
+            raise ValueError(f"Duplicate scenario name '{name}'")
+        names.add(name)
+    if not scenarios:
+        raise ValueError(f"No scenarios in {path}")
+    return scenarios
+
+
+def scenario_configs(config: Dict, scenarios: List[Dict], root_dir: str) -> List[Tuple[str, Dict]]:
+    """
+    Full config of each scenario: the base config with its overrides applied.
+
+    Output, checkpoint journal and publish prefix default to per-scenario
+    locations (<root_dir>/<name>, <checkpoint.dir>/<name>, <prefix>/<name>)
+    so concurrent scenarios never write to the same place; a scenario can
+    still set them explicitly.
+    """
+    configs = []
+    for scenario in scenarios:
+        name = str(scenario['name'])
+        overrides = scenario.get('overrides') or {}
+        scenario_config = deep_merge(config, overrides)
+        if 'data_dir' not in overrides.get('output', {}):
+            scenario_config['output']['data_dir'] = os.path.join(root_dir, name)
+        checkpoint_config = scenario_config.setdefault('checkpoint', {})
+        if 'dir' not in overrides.get('checkpoint', {}):
+            checkpoint_config['dir'] = os.path.join(checkpoint_config.get('dir', '.cache/checkpoints'), name)
+        if 'publish' in scenario_config and 'prefix' not in overrides.get('publish', {}):
+            prefix = scenario_config['publish'].get('prefix', '').strip('/')
+            scenario_config['publish']['prefix'] = f"{prefix}/{name}" if prefix else name
+        configs.append((name, scenario_config))
+
+    data_dirs = [scenario_config['output']['data_dir'] for _, scenario_config in configs]
+    if len(set(map(os.path.abspath, data_dirs))) != len(data_dirs):
+        raise ValueError("Scenarios must write to different output.data_dir directories")
+    return configs
+
+
+def _products_key(config: Dict) -> str:
+    return json.dumps([config['random_seed'], config['products'], config['date_range']], sort_keys=True)
+
+
+def _calendar_key(config: Dict) -> str:
+    return json.dumps([config['date_range'], config.get('calendar', {}).get('holidays')], sort_keys=True)
+
+
+def precompute_inputs(configs: List[Dict]) -> Dict:
+    """
+    Build the products and calendar of every distinct seed/catalog/date range once.
+
+    Products are stored with the random state they leave behind, so a run
+    that takes them continues its random stream exactly as if it had
+    generated them itself.
+
+    Returns:
+        Shared inputs for generate_products() and calendar_for()
+    """
+    shared = {'products': {}, 'calendars': {}}
+    for config in configs:
+        key = _products_key(config)
+        if key not in shared['products']:
+            rng = RandomGenerator(seed=config['random_seed'])
+            products_df = ProductGenerator(config, rng).generate_products()
+            shared['products'][key] = (products_df, rng.get_state())
+        key = _calendar_key(config)
+        if key not in shared['calendars']:
+            date_range = config['date_range']
+            shared['calendars'][key] = Calendar(date_range['start_date'], date_range['end_date'],
+                                                config.get('calendar', {}).get('holidays'))
+    return shared
+
+
+def generate_products(config: Dict, rng: RandomGenerator, shared: Dict = None) -> pd.DataFrame:
+    """Products of a run, taken from the shared inputs when precomputed (advancing rng the same way)."""
+    entry = shared['products'].get(_products_key(config)) if shared else None
+    if entry is None:
+        return ProductGenerator(config, rng).generate_products()
+    products_df, state = entry
+    rng.set_state(state)
+    return products_df.copy()
+
+
+def calendar_for(config: Dict, shared: Dict = None) -> Calendar:
+    """Calendar of a run's date range, taken from the shared inputs when precomputed."""
+    calendar = shared['calendars'].get(_calendar_key(config)) if shared else None
+    if calendar is None:
+        date_range = config['date_range']
+        calendar = Calendar(date_range['start_date'], date_range['end_date'],
+                            config.get('calendar', {}).get('holidays'))
+    return calendar
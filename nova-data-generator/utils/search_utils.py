@@ -0,0 +1,429 @@
+"""
+Inverted text index over product reviews and social media posts.
+"""
+import json
+import os
+import re
+import shutil
+from array import array
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+# Lowercased words; hashtags keep their '#' so '#NovaPrime' and 'novaprime' are different terms
+TOKEN_PATTERN = re.compile(r'#?\w+')
+
+# Indexed text fields per dataset, with the record id and the columns used by filters
+CORPORA = {
+    'product_reviews': {
+        'id_field': 'review_id',
+        'fields': ['review_title', 'review_text'],
+        'product_field': 'product_id',
+        'date_field': 'review_datetime'
+    },
+    'social_media_posts': {
+        'id_field': 'post_id',
+        'fields': ['text', 'hashtags'],
+        'product_field': 'product_mentioned',
+        'date_field': 'timestamp'
+    }
+}
+
+# Positions are packed below this many bits in phrase matching keys
+_POSITION_BITS = 20
+
+_ARRAYS = ['doc_bytes', 'freq_bytes', 'pos_bytes', 'doc_offsets', 'freq_offsets', 'pos_offsets',
+           'doc_freqs', 'doc_product', 'doc_day']
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercased index terms."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _encode_chunk(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    lengths = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest = rest >> np.uint64(7)
+
+    starts = np.cumsum(lengths) - lengths
+    encoded = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max()) if len(values) else 0):
+        selected = lengths > k
+        chunk = (values[selected] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        chunk |= np.where(lengths[selected] > k + 1, np.uint64(0x80), np.uint64(0))
+        encoded[starts[selected] + k] = chunk.astype(np.uint8)
+    return encoded, lengths.astype(np.uint8)
+
+
+def encode_varint(values: np.ndarray, chunk_size: int = 1 << 22) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Variable-byte encode non-negative integers (7 bits per byte, high bit = more bytes follow).
+
+    Values are encoded chunk by chunk to bound temporary memory.
+
+    Returns:
+        Tuple of (encoded bytes, byte length of each value)
+    """
+    pieces = [
+        _encode_chunk(np.asarray(values[start:start + chunk_size], dtype=np.uint64))
+        for start in range(0, len(values), chunk_size)
+    ]
+    if not pieces:
+        return np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.uint8)
+    return np.concatenate([piece[0] for piece in pieces]), np.concatenate([piece[1] for piece in pieces])
+
+
+def decode_varint(data: np.ndarray) -> np.ndarray:
+    """Decode a byte array written by encode_varint()."""
+    data = np.asarray(data, dtype=np.uint8)
+    if len(data) == 0:
+        return np.empty(0, dtype=np.int64)
+    last = (data & 0x80) == 0
+    if last.all():
+        # Every value fits in one byte (the common case for small deltas)
+        return data.astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(last)[:-1] + 1))
+    value_index = np.cumsum(last) - last
+    shifts = (np.arange(len(data)) - starts[value_index]) * 7
+    return np.add.reduceat((data & 0x7F).astype(np.int64) << shifts, starts)
+
+
+def _byte_offsets(lengths: np.ndarray, firsts: np.ndarray) -> np.ndarray:
+    """Byte offset of each group of encoded values starting at firsts, plus the end offset."""
+    totals = np.add.reduceat(lengths, firsts, dtype=np.int64) if len(firsts) else np.empty(0, dtype=np.int64)
+    return np.concatenate(([0], np.cumsum(totals))).astype(np.int64)
+
+
+def _intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Intersection of two sorted arrays of unique values."""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return a
+    index = np.searchsorted(b, a)
+    index[index == len(b)] = 0
+    return a[b[index] == a]
+
+
+def _in_sorted(values: np.ndarray, sorted_values: np.ndarray) -> np.ndarray:
+    """Mask of values present in a sorted array."""
+    if len(sorted_values) == 0:
+        return np.zeros(len(values), dtype=bool)
+    index = np.searchsorted(sorted_values, values)
+    index[index == len(sorted_values)] = 0
+    return sorted_values[index] == values
+
+
+def _split_id(record_id: str) -> Tuple[str, int]:
+    match = re.match(r'^(.*?)(\d+)$', record_id)
+    if match is None:
+        raise ValueError(f"Record id '{record_id}' does not end in a number")
+    return match.group(1), len(match.group(2))
+
+
+def build_segment(records: Iterable[Dict], corpus: str, output_dir: str) -> Dict:
+    """
+    Build an index segment for a batch of records and write it to output_dir.
+
+    Records are numbered by the numeric part of their id and read in a
+    single pass, so they can be streamed. Identical text (templated
+    reviews and posts repeat a lot) is tokenized once, then postings are
+    assembled with array operations: entries are sorted by term, and for
+    each term the doc numbers, the term frequency per doc and the
+    positions within each doc are delta-encoded and variable-byte packed
+    into three byte streams with per-term offsets. Fields are separated by
+    a position gap so phrases never span two fields.
+
+    Args:
+        records: Review or post dictionaries as generated
+        corpus: Dataset name (key of CORPORA)
+        output_dir: Segment directory (replaced if it exists)
+
+    Returns:
+        Segment metadata
+    """
+    spec = CORPORA[corpus]
+    prefix, width = '', 0
+    numbers = array('q')
+    content_ids = array('q')
+    product_codes = array('h')
+    days = array('i')
+    products: Dict[str, int] = {}
+    day_numbers: Dict[str, int] = {}
+
+    # Tokenize each distinct content once
+    vocabulary: Dict[str, int] = {}
+    contents: Dict[Tuple, int] = {}
+    content_terms = array('i')
+    content_positions = array('i')
+    content_lengths = array('q')
+    for record in records:
+        record_id = record[spec['id_field']]
+        if not numbers:
+            prefix, width = _split_id(record_id)
+        numbers.append(int(record_id[len(prefix):]))
+
+        key = tuple(
+            tuple(value) if isinstance(value, list) else (value or '')
+            for value in (record.get(field) for field in spec['fields'])
+        )
+        content_id = contents.get(key)
+        if content_id is None:
+            content_id = contents[key] = len(contents)
+            position = 0
+            count = 0
+            for value in key:
+                for token in tokenize(' '.join(value) if isinstance(value, tuple) else value):
+                    content_terms.append(vocabulary.setdefault(token, len(vocabulary)))
+                    content_positions.append(position)
+                    position += 1
+                    count += 1
+                position += 1
+            content_lengths.append(count)
+        content_ids.append(content_id)
+
+        product = record.get(spec['product_field'])
+        product_codes.append(-1 if product is None else products.setdefault(product, len(products)))
+        date = record[spec['date_field']][:10]
+        day = day_numbers.get(date)
+        if day is None:
+            day = day_numbers[date] = int(np.datetime64(date, 'D').astype(np.int64))
+        days.append(day)
+
+    numbers = np.frombuffer(numbers, dtype=np.int64)
+    content_ids = np.frombuffer(content_ids, dtype=np.int64)
+    doc_base = int(numbers.min()) if len(numbers) else 0
+    size = int(numbers.max()) - doc_base + 1 if len(numbers) else 0
+
+    # Expand contents to (term, doc, position) entries in doc order
+    if np.any(numbers[1:] < numbers[:-1]):
+        order = np.argsort(numbers, kind='stable')
+        doc_numbers, doc_contents = numbers[order], content_ids[order]
+    else:
+        doc_numbers, doc_contents = numbers, content_ids
+    lengths = np.frombuffer(content_lengths, dtype=np.int64)
+    doc_lengths = lengths[doc_contents]
+    total = int(doc_lengths.sum())
+    source = np.arange(total, dtype=np.int64)
+    source += np.repeat((np.cumsum(lengths) - lengths)[doc_contents] - (np.cumsum(doc_lengths) - doc_lengths), doc_lengths)
+    positions = np.frombuffer(content_positions, dtype=np.int32)[source]
+
+    # Term ids in sorted vocabulary order; 16-bit ids sort with a radix sort
+    terms = sorted(vocabulary)
+    rank = np.empty(len(terms), dtype=np.uint16 if len(terms) <= 1 << 16 else np.int32)
+    rank[[vocabulary[term] for term in terms]] = np.arange(len(terms))
+    term_ids = rank[np.frombuffer(content_terms, dtype=np.int32)[source]]
+    del source
+    docs = np.repeat((doc_numbers - doc_base).astype(np.int32), doc_lengths)
+
+    # Entries are already in (doc, position) order, so a stable sort by term finishes the job
+    perm = np.argsort(term_ids, kind='stable')
+    term_ids, docs, positions = term_ids[perm], docs[perm], positions[perm]
+    del perm
+
+    term_start = np.ones(total, dtype=bool)
+    term_start[1:] = term_ids[1:] != term_ids[:-1]
+    del term_ids
+    posting_start = term_start.copy()
+    posting_start[1:] |= docs[1:] != docs[:-1]
+
+    posting_index = np.flatnonzero(posting_start)
+    posting_first = term_start[posting_index]
+    freqs = np.diff(np.append(posting_index, total))
+    posting_docs = docs[posting_index]
+    del docs
+    doc_deltas = posting_docs.astype(np.int64)
+    doc_deltas[1:] -= posting_docs[:-1]
+    doc_deltas[posting_first] = posting_docs[posting_first]
+    pos_deltas = positions.copy()
+    pos_deltas[1:] -= positions[:-1]
+    pos_deltas[posting_start] = positions[posting_start]
+    del positions
+
+    doc_bytes, doc_lengths = encode_varint(doc_deltas)
+    freq_bytes, freq_lengths = encode_varint(freqs)
+    pos_bytes, pos_lengths = encode_varint(pos_deltas)
+    first_postings = np.flatnonzero(posting_first)
+    arrays = {
+        'doc_bytes': doc_bytes,
+        'freq_bytes': freq_bytes,
+        'pos_bytes': pos_bytes,
+        'doc_offsets': _byte_offsets(doc_lengths, first_postings),
+        'freq_offsets': _byte_offsets(freq_lengths, first_postings),
+        'pos_offsets': _byte_offsets(pos_lengths, np.flatnonzero(term_start)),
+        'doc_freqs': np.diff(np.append(first_postings, len(posting_index))).astype(np.int64)
+    }
+
+    # Filter attributes, indexed by doc number - doc_base
+    arrays['doc_product'] = np.full(size, -1, dtype=np.int16)
+    arrays['doc_product'][numbers - doc_base] = np.frombuffer(product_codes, dtype=np.int16)
+    arrays['doc_day'] = np.full(size, -1, dtype=np.int32)
+    arrays['doc_day'][numbers - doc_base] = np.frombuffer(days, dtype=np.int32)
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+    for name, values in arrays.items():
+        np.save(os.path.join(output_dir, f'{name}.npy'), values)
+    meta = {
+        'corpus': corpus,
+        'fields': spec['fields'],
+        'id_prefix': prefix,
+        'id_width': width,
+        'doc_base': doc_base,
+        'doc_count': len(numbers),
+        'distinct_contents': len(contents),
+        'token_count': total,
+        'posting_count': len(posting_index),
+        'index_bytes': int(sum(values.nbytes for values in arrays.values())),
+        'products': list(products),
+        'terms': terms
+    }
+    with open(os.path.join(output_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return meta
+
+
+class IndexSegment:
+    """One memory-mapped index segment written by build_segment()."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        for name in _ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+        self.doc_base = self.meta['doc_base']
+        self.term_ids = {term: i for i, term in enumerate(self.meta['terms'])}
+        self.product_codes = {product: code for code, product in enumerate(self.meta['products'])}
+
+    def postings(self, term_id: int) -> np.ndarray:
+        """Sorted doc numbers containing a term."""
+        start, end = self.doc_offsets[term_id], self.doc_offsets[term_id + 1]
+        return np.cumsum(decode_varint(self.doc_bytes[start:end])) + self.doc_base
+
+    def positions(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(doc number, position) of every occurrence of a term."""
+        docs = self.postings(term_id)
+        freqs = decode_varint(self.freq_bytes[self.freq_offsets[term_id]:self.freq_offsets[term_id + 1]])
+        totals = np.cumsum(decode_varint(self.pos_bytes[self.pos_offsets[term_id]:self.pos_offsets[term_id + 1]]))
+        starts = np.cumsum(freqs) - freqs
+        # Positions are delta-encoded within each doc; remove the running total of earlier docs
+        base = np.where(starts > 0, totals[np.maximum(starts - 1, 0)], 0)
+        return np.repeat(docs, freqs), totals - np.repeat(base, freqs)
+
+    def filter(self, docs: np.ndarray, products: List[str] = None, days: Tuple[int, int] = None) -> np.ndarray:
+        """Docs matching product and day filters."""
+        if products is not None:
+            codes = [self.product_codes[product] for product in products if product in self.product_codes]
+            docs = docs[np.isin(self.doc_product[docs - self.doc_base], codes)]
+        if days is not None:
+            day = self.doc_day[docs - self.doc_base]
+            docs = docs[(day >= days[0]) & (day <= days[1])]
+        return docs
+
+    def match(self, terms: List[str], phrases: List[List[str]], products: List[str] = None,
+              days: Tuple[int, int] = None) -> np.ndarray:
+        """Docs containing every term and every phrase."""
+        wanted = terms + [term for phrase in phrases for term in phrase]
+        if any(term not in self.term_ids for term in wanted):
+            return np.empty(0, dtype=np.int64)
+        # Intersect from the rarest term up
+        ids = sorted({self.term_ids[term] for term in wanted}, key=lambda term_id: self.doc_freqs[term_id])
+        docs = self.postings(ids[0])
+        for term_id in ids[1:]:
+            if len(docs) == 0:
+                break
+            docs = _intersect_sorted(docs, self.postings(term_id))
+        docs = self.filter(docs, products, days)
+
+        for phrase in phrases:
+            if len(phrase) < 2 or len(docs) == 0:
+                continue
+            keys = None
+            for offset, term in sorted(enumerate(phrase), key=lambda item: self.doc_freqs[self.term_ids[item[1]]]):
+                term_docs, term_positions = self.positions(self.term_ids[term])
+                keep = _in_sorted(term_docs, docs) & (term_positions >= offset)
+                # Occurrences of a phrase share (doc, start position); keys come out sorted
+                start_keys = ((term_docs[keep] - self.doc_base) << _POSITION_BITS) | (term_positions[keep] - offset)
+                keys = start_keys if keys is None else _intersect_sorted(keys, start_keys)
+                if len(keys) == 0:
+                    break
+            matched = keys >> _POSITION_BITS
+            docs = matched[np.concatenate(([True], matched[1:] != matched[:-1]))[:len(matched)]] + self.doc_base
+        return docs
+
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """Split a query into terms and "quoted phrases"."""
+    phrases = [tokenize(phrase) for phrase in re.findall(r'"([^"]*)"', query)]
+    terms = tokenize(re.sub(r'"[^"]*"', ' ', query))
+    return terms, [phrase for phrase in phrases if phrase]
+
+
+class SearchIndex:
+    """
+    Query API over the index segments of one dataset.
+
+    Usage:
+        index = SearchIndex('data/search', 'product_reviews')
+        index.search('"battery life" charging', products=['PRIME-24'], date_range=('2023-01-01', '2023-03-31'))
+    """
+
+    def __init__(self, index_dir: str, corpus: str):
+        """
+        Open the segments of a dataset.
+
+        Args:
+            index_dir: Search index directory (data_dir/search)
+            corpus: Dataset name, 'product_reviews' or 'social_media_posts'
+        """
+        corpus_dir = os.path.join(index_dir, corpus)
+        if not os.path.isdir(corpus_dir):
+            raise FileNotFoundError(f"No search index for '{corpus}' in {index_dir}")
+        self.segments = sorted(
+            (IndexSegment(os.path.join(corpus_dir, name)) for name in os.listdir(corpus_dir)),
+            key=lambda segment: segment.doc_base
+        )
+        self.id_prefix = self.segments[0].meta['id_prefix'] if self.segments else ''
+        self.id_width = self.segments[0].meta['id_width'] if self.segments else 0
+
+    def find(self, query: str, products: Union[str, List[str]] = None,
+             date_range: Tuple[str, str] = None) -> np.ndarray:
+        """
+        Doc numbers of the records matching a query.
+
+        Args:
+            query: Terms and "quoted phrases"; a record must contain all of them
+            products: Product id or ids the record is about
+            date_range: Inclusive (start_date, end_date) on the record date
+
+        Returns:
+            Sorted doc numbers (the numeric part of the record ids)
+        """
+        terms, phrases = parse_query(query)
+        if not terms and not phrases:
+            return np.empty(0, dtype=np.int64)
+        if isinstance(products, str):
+            products = [products]
+        days = None
+        if date_range is not None:
+            days = tuple(int(np.datetime64(value, 'D').astype(np.int64)) for value in date_range)
+        results = [segment.match(terms, phrases, products, days) for segment in self.segments]
+        return np.concatenate(results) if results else np.empty(0, dtype=np.int64)
+
+    def record_ids(self, docs: np.ndarray) -> List[str]:
+        """Record ids of doc numbers."""
+        return [f'{self.id_prefix}{doc:0{self.id_width}d}' for doc in docs.tolist()]
+
+    def search(self, query: str, products: Union[str, List[str]] = None, date_range: Tuple[str, str] = None,
+               limit: int = None) -> List[str]:
+        """Record ids matching a query (see find()), in id order."""
+        docs = self.find(query, products, date_range)
+        return self.record_ids(docs[:limit] if limit else docs)
+
+    def count(self, query: str, products: Union[str, List[str]] = None, date_range: Tuple[str, str] = None) -> int:
+        """Number of records matching a query."""
+        return len(self.find(query, products, date_range))
@@ -0,0 +1,641 @@
+"""
+Deterministic planned generation: work plan, windowed generators, shard assignment and merging.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from generators.sales_generator import SalesGenerator
+from generators.transaction_generator import TransactionGenerator
+from generators.campaign_generator import CampaignGenerator
+from generators.social_generator import SocialGenerator
+from generators.review_generator import ReviewGenerator
+from utils.random_utils import RandomGenerator
+from utils.date_utils import parse_date, format_date, Calendar
+from utils.merkle_utils import DATASETS as FINGERPRINTED_DATASETS
+from utils.state_utils import derive_seed
+from utils.stream_utils import dataset_files
+
+logger = logging.getLogger(__name__)
+
+# Files of a shard in merge order; dim_products is replicated on every shard
+SHARD_FILES = {
+    'dim_products': 'dim_products.csv',
+    'fact_daily_sales': 'fact_daily_sales.csv',
+    'fact_transactions': 'fact_transactions.csv',
+    'fact_campaign_performance': 'fact_campaign_performance.csv',
+    'social_media_posts': 'social_media_posts.json',
+    'product_reviews': 'product_reviews.json'
+}
+
+# Datasets whose ID ranges are assigned by the plan
+ID_DATASETS = ['fact_transactions', 'fact_campaign_performance', 'social_media_posts', 'product_reviews']
+
+MANIFEST_FILE = 'shard.json'
+MERGE_MANIFEST_FILE = 'merged_shards.json'
+SHARD_DIR_PATTERN = re.compile(r'shard-\d{4}-of-\d{4}$')
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard spec 'I/N' (zero-based shard I of N).
+
+    Raises:
+        ValueError: If the spec is malformed or I is not in [0, N)
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard spec '{spec}' (expected I/N, e.g. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard spec '{spec}' (need 0 <= I < N)")
+    return index, count
+
+
+def shard_dir(data_dir: str, index: int, count: int) -> str:
+    """Output directory of one shard under data_dir."""
+    return os.path.join(data_dir, f'shard-{index:04d}-of-{count:04d}')
+
+
+def transactions_per_row(max_units: int) -> np.ndarray:
+    """
+    Expected transactions of a sales row by its pre-noise units (index 0..max_units).
+
+    Sales rows sell floor(units * U(0.8, 1.2)) and are dropped at zero;
+    generate_transactions() turns a row into max(1, 10% of units) purchases.
+    """
+    table = np.zeros(max_units + 1)
+    for units in range(1, max_units + 1):
+        low, high = 0.8 * units, 1.2 * units
+        for sold in range(max(1, int(low)), int(high) + 1):
+            share = (min(sold + 1, high) - max(sold, low)) / (high - low)
+            table[units] += share * max(1, int(sold * 0.1))
+    return table
+
+
+def _split(weights: np.ndarray, count: int) -> List[int]:
+    """Boundaries cutting units into count contiguous blocks of about equal total weight."""
+    cumulative = np.cumsum(weights, dtype=float)
+    bounds = [0]
+    for k in range(1, count):
+        cut = int(np.searchsorted(cumulative, cumulative[-1] * k / count)) + 1 if len(cumulative) else 0
+        bounds.append(min(max(cut, bounds[-1]), len(weights)))
+    bounds.append(len(weights))
+    return bounds
+
+
+class ShardPlan:
+    """
+    Record counts and ID ranges of every unit of work, drawn before any data.
+
+    Fact tables are cut into date windows of window_days and campaigns into
+    products. Each unit's counts come from its own seeded stream, so every
+    node computes the same plan in a fraction of a second and knows where
+    its ID ranges start without talking to the others. A normal run
+    generates every unit of the plan (the generate_window_* functions), and
+    --shard I/N generates a contiguous block of them, so concatenating the
+    shards in order gives the normal run's records.
+    """
+
+    def __init__(self, config: Dict, products_df: pd.DataFrame, window_days: int = 7):
+        """
+        Args:
+            config: Full configuration dictionary
+            products_df: Product dimension (identical on every node)
+            window_days: Days per fact-table window
+        """
+        self.seed = config['random_seed']
+        self.window_days = window_days
+        start = parse_date(config['date_range']['start_date'])
+        end = parse_date(config['date_range']['end_date'])
+
+        self.windows = []
+        window_start = start
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=window_days - 1), end)
+            self.windows.append((window_start, window_end))
+            window_start = window_end + timedelta(days=1)
+
+        launch = pd.to_datetime(products_df['launch_date']).values.astype('datetime64[D]')
+        discontinue = pd.to_datetime(products_df['discontinue_date']).fillna(pd.Timestamp(end)).values.astype('datetime64[D]')
+        calendar = Calendar(format_date(start), format_date(end))
+        unit_weights = np.array([
+            region_weight * channel['weight']
+            for region_weight in SalesGenerator.REGIONS.values()
+            for channel in SalesGenerator.CHANNELS.values()
+        ])
+        posts_per_month = config['social_posts']['posts_per_product_per_month']
+        per_row = transactions_per_row(200)
+
+        # Expected transactions and post rates per window; generate_transactions()
+        # samples 30% of the sales rows
+        expected = []
+        post_rates = []
+        for window_start, window_end in self.windows:
+            dates = np.arange(np.datetime64(format_date(window_start)), np.datetime64(format_date(window_end)) + 1)
+            days_since = (dates[None, :] - launch[:, None]).astype(int)
+            seasonal = calendar.seasonal_multiplier[calendar.index_of(window_start):calendar.index_of(window_end) + 1]
+            # Maturity-stage units are drawn per day; plan with their mean
+            base = np.floor(SalesGenerator.lifecycle_units(days_since, maturity_units=100) * seasonal[None, :])
+            units = np.floor(np.maximum(base, 0)[:, :, None] * unit_weights).astype(int)
+            if units.size and units.max() >= len(per_row):
+                per_row = transactions_per_row(int(units.max()))
+            rows = per_row[units].sum(axis=2)
+            active = (dates[None, :] >= launch[:, None]) & (dates[None, :] <= discontinue[:, None])
+            expected.append(0.3 * float((rows * active).sum()))
+
+            monthly = np.where(days_since < 30, int(posts_per_month * 1.5), posts_per_month)
+            post_rates.append(np.where((days_since >= 0) & (days_since < 180), monthly / 30, 0.0))
+
+        # Review volume matches the configured reviews per product over the whole range
+        reviews_per_product = (config['reviews']['min_per_product'] + config['reviews']['max_per_product']) / 2
+        total_expected = sum(expected)
+        self.review_rate = min(1.0, reviews_per_product * len(products_df) / total_expected) if total_expected else 0.0
+
+        self.post_counts = []
+        counts = {'fact_transactions': [], 'social_media_posts': [], 'product_reviews': []}
+        for (window_start, _), expected_transactions, rates in zip(self.windows, expected, post_rates):
+            draws = np.random.default_rng(derive_seed(self.seed, 'plan', format_date(window_start)))
+            transactions = int(draws.poisson(expected_transactions))
+            self.post_counts.append(draws.poisson(rates).astype(np.int32))
+            counts['fact_transactions'].append(transactions)
+            counts['social_media_posts'].append(int(self.post_counts[-1].sum()))
+            counts['product_reviews'].append(int(draws.binomial(transactions, self.review_rate)))
+
+        campaign_draws = np.random.default_rng(derive_seed(self.seed, 'plan', 'campaigns'))
+        counts['fact_campaign_performance'] = campaign_draws.integers(2, 4, size=len(products_df)).tolist()
+
+        self.counts = {dataset: np.array(values, dtype=np.int64) for dataset, values in counts.items()}
+        self.first_ids = {dataset: np.concatenate([[1], 1 + np.cumsum(values)]) for dataset, values in self.counts.items()}
+
+        # Balance shards on planned records rather than on calendar length
+        self._window_work = (self.counts['fact_transactions'] + self.counts['social_media_posts']
+                             + self.counts['product_reviews'] + 1)
+        self._product_work = self.counts['fact_campaign_performance']
+
+    def assignment(self, index: int, count: int) -> Dict:
+        """
+        Units of shard index out of count.
+
+        Returns:
+            Dict with half-open 'windows' and 'products' index ranges
+        """
+        window_bounds = _split(self._window_work, count)
+        product_bounds = _split(self._product_work, count)
+        return {
+            'windows': [window_bounds[index], window_bounds[index + 1]],
+            'products': [product_bounds[index], product_bounds[index + 1]]
+        }
+
+    def planned(self, dataset: str, start: int, stop: int) -> Tuple[int, int]:
+        """First ID and planned record count of units [start, stop) of a dataset."""
+        first_ids = self.first_ids[dataset]
+        return int(first_ids[start]), int(first_ids[stop] - first_ids[start])
+
+    def totals(self) -> Dict[str, int]:
+        """Planned records of each ID dataset over all units."""
+        return {dataset: int(values.sum()) for dataset, values in self.counts.items()}
+
+
+def _window_config(config: Dict, plan: ShardPlan, window: int) -> Dict:
+    start_date, end_date = plan.windows[window]
+    return dict(config, date_range={'start_date': format_date(start_date), 'end_date': format_date(end_date)})
+
+
+def _window_rng(plan: ShardPlan, dataset: str, window: int) -> RandomGenerator:
+    """Random stream of one dataset in one window, independent of every other unit."""
+    return RandomGenerator(seed=derive_seed(plan.seed, dataset, format_date(plan.windows[window][0])))
+
+
+def _split_windows(df: pd.DataFrame, column: str, plan: ShardPlan, windows: range) -> Dict[int, pd.DataFrame]:
+    """Rows of df by the plan window their date (the first 10 characters of column) falls in, in row order."""
+    starts = [format_date(start_date) for start_date, _ in plan.windows]
+    day = df[column].astype(str).str[:10].to_numpy() if len(df) else np.array([], dtype=object)
+    window_of = np.searchsorted(starts, day, side='right') - 1
+    order = np.argsort(window_of, kind='stable')
+    bounds = np.searchsorted(window_of[order], [windows.start, *[window + 1 for window in windows]])
+    return {
+        window: df.iloc[order[bounds[position]:bounds[position + 1]]].reset_index(drop=True)
+        for position, window in enumerate(windows)
+    }
+
+
+def _run_windows(windows: range, checkpoint, generate) -> List:
+    """Records of each window in order, committing every window as one checkpoint chunk."""
+    records, first_chunk = checkpoint.resume() if checkpoint else ([], 0)
+    for chunk, window in enumerate(windows):
+        if chunk < first_chunk:
+            continue
+        window_records = generate(window)
+        records.extend(window_records)
+        if checkpoint:
+            checkpoint.commit(chunk, window_records)
+    return records
+
+
+def generate_window_sales(plan: ShardPlan, products_df: pd.DataFrame, config: Dict, windows: range,
+                          calendar: Calendar = None, checkpoint=None) -> pd.DataFrame:
+    """
+    Daily sales of a range of plan windows, each from its own random stream.
+
+    Args:
+        plan: Work plan of the run
+        products_df: Product dimension
+        config: Full configuration dictionary
+        windows: Window indices to generate
+        calendar: Calendar covering the plan's date range (built if omitted)
+        checkpoint: Optional StepCheckpoint; each window is committed as one chunk
+
+    Returns:
+        DataFrame with the windows' sales in window order
+    """
+    date_range = config['date_range']
+    calendar = calendar or Calendar(date_range['start_date'], date_range['end_date'],
+                                    config.get('calendar', {}).get('holidays'))
+
+    def generate(window):
+        generator = SalesGenerator(products_df, _window_config(config, plan, window),
+                                   _window_rng(plan, 'fact_daily_sales', window), calendar)
+        generator.generate_daily_sales()
+        return generator.sales_data
+
+    return typed_frame(_run_windows(windows, checkpoint, generate), SalesGenerator.OUTPUT_SCHEMA)
+
+
+def generate_window_transactions(plan: ShardPlan, products_df: pd.DataFrame, sales_df: pd.DataFrame, config: Dict,
+                                 windows: range, checkpoint=None) -> pd.DataFrame:
+    """
+    The planned transactions of a range of windows, drawn from each window's sales.
+
+    Repeat customers are drawn from the customers of the same window, and
+    transaction IDs start where the plan assigns them.
+
+    Args:
+        sales_df: Daily sales of (at least) the windows, as returned by generate_window_sales()
+        checkpoint: Optional StepCheckpoint; each window is committed as one chunk
+
+    Returns:
+        DataFrame with the windows' transactions in window order
+    """
+    sales = _split_windows(sales_df, 'date', plan, windows)
+
+    def generate(window):
+        first_id, planned = plan.planned('fact_transactions', window, window + 1)
+        generator = TransactionGenerator(products_df, sales[window], _window_config(config, plan, window),
+                                         _window_rng(plan, 'fact_transactions', window))
+        generator.generate_transactions_for_count(planned, start_id=first_id)
+        return generator.transactions
+
+    return typed_frame(_run_windows(windows, checkpoint, generate), TransactionGenerator.OUTPUT_SCHEMA)
+
+
+def generate_window_posts(plan: ShardPlan, products_df: pd.DataFrame, config: Dict, windows: range,
+                          checkpoint=None) -> List[Dict]:
+    """The planned social posts of a range of windows (see generate_window_sales())."""
+    def generate(window):
+        start_date, end_date = plan.windows[window]
+        first_id, _ = plan.planned('social_media_posts', window, window + 1)
+        return SocialGenerator(products_df, _window_config(config, plan, window),
+                               _window_rng(plan, 'social_media_posts', window)).generate_posts_for_window(
+            start_date, end_date, start_id=first_id, daily_counts=plan.post_counts[window]
+        )
+
+    return _run_windows(windows, checkpoint, generate)
+
+
+def generate_window_reviews(plan: ShardPlan, products_df: pd.DataFrame, transactions_df: pd.DataFrame, config: Dict,
+                            windows: range, checkpoint=None) -> List[Dict]:
+    """
+    The planned reviews of a range of windows, each of a transaction in the same window.
+
+    Args:
+        transactions_df: Transactions of (at least) the windows, as returned by generate_window_transactions()
+        checkpoint: Optional StepCheckpoint; each window is committed as one chunk
+    """
+    transactions = _split_windows(transactions_df, 'transaction_datetime', plan, windows)
+
+    def generate(window):
+        first_id, planned = plan.planned('product_reviews', window, window + 1)
+        return ReviewGenerator(products_df, transactions[window], _window_config(config, plan, window),
+                               _window_rng(plan, 'product_reviews', window)).generate_reviews_for_count(
+            planned, start_id=first_id
+        )
+
+    return _run_windows(windows, checkpoint, generate)
+
+
+def generate_product_campaigns(plan: ShardPlan, products_df: pd.DataFrame, config: Dict,
+                               products: range) -> pd.DataFrame:
+    """The planned campaigns of a range of products (by position), each product from its own random stream."""
+    campaigns = []
+    for position in products:
+        product = products_df.iloc[position]
+        rng = RandomGenerator(seed=derive_seed(plan.seed, 'campaigns', product['product_id']))
+        first_id, planned = plan.planned('fact_campaign_performance', position, position + 1)
+        campaigns.extend(CampaignGenerator(products_df, config, rng).generate_product_campaigns(
+            product, planned, start_id=first_id
+        ))
+    return typed_frame(campaigns, CampaignGenerator.OUTPUT_SCHEMA)
+
+
+def typed_frame(records, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    DataFrame of records with the schema's columns and float columns as floats.
+
+    Shards hold different subsets of rows, so a column that happens to
+    contain only whole numbers in one shard (e.g. ctr of TV campaigns) must
+    still be written as it would be in the full output.
+    """
+    df = pd.DataFrame(records) if len(records) else pd.DataFrame(columns=list(schema))
+    floats = {column: float for column, kind in schema.items() if kind == 'float' and column in df.columns}
+    return df.astype(floats) if floats else df
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(manifest: Dict, output_dir: str) -> str:
+    """Write a shard manifest with file sizes and hashes of the shard's datasets."""
+    for dataset, info in manifest['datasets'].items():
+        path = os.path.join(output_dir, info['file'])
+        info['bytes'] = os.path.getsize(path)
+        info['sha256'] = file_digest(path)
+    filepath = os.path.join(output_dir, MANIFEST_FILE)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return filepath
+
+
+def _load_manifests(shard_dirs: List[str]) -> List[Tuple[str, Dict]]:
+    """Load and cross-check shard manifests; returns (dir, manifest) pairs in shard order."""
+    shards = []
+    for directory in shard_dirs:
+        path = os.path.join(directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            raise ValueError(f"{directory} has no {MANIFEST_FILE}; is it a finished shard?")
+        with open(path, 'r', encoding='utf-8') as f:
+            shards.append((directory, json.load(f)))
+    shards.sort(key=lambda shard: shard[1]['shard'])
+
+    first = shards[0][1]
+    for directory, manifest in shards:
+        for key in ('shards', 'random_seed', 'fingerprint'):
+            if manifest[key] != first[key]:
+                raise ValueError(f"{directory} has {key}={manifest[key]!r}, other shards have {first[key]!r}")
+    indices = [manifest['shard'] for _, manifest in shards]
+    if indices != list(range(first['shards'])):
+        missing = sorted(set(range(first['shards'])) - set(indices))
+        duplicated = sorted({index for index in indices if indices.count(index) > 1})
+        raise ValueError(f"Expected shards 0..{first['shards'] - 1} once each "
+                         f"(missing {missing}, duplicated {duplicated})")
+
+    # Units must tile the plan, and ID ranges must follow each other
+    for unit in ('windows', 'products'):
+        position = 0
+        for directory, manifest in shards:
+            start, stop = manifest[unit]
+            if start != position:
+                raise ValueError(f"{directory} covers {unit} [{start}, {stop}) but the previous shard ended at {position}")
+            position = stop
+        if position != first['plan'][unit]:
+            raise ValueError(f"Shards cover {position} of {first['plan'][unit]} {unit}")
+    for dataset in ID_DATASETS:
+        next_id = 1
+        for directory, manifest in shards:
+            info = manifest['datasets'][dataset]
+            if info['first_id'] != next_id:
+                raise ValueError(f"{directory}: {dataset} IDs start at {info['first_id']}, expected {next_id}")
+            if info['records'] != info['planned_records']:
+                logger.warning(f"{directory}: {dataset} has {info['records']:,} of {info['planned_records']:,} "
+                               f"planned records; its unused IDs are skipped")
+            next_id += info['planned_records']
+    for directory, manifest in shards[1:]:
+        if manifest['datasets']['dim_products']['sha256'] != first['datasets']['dim_products']['sha256']:
+            raise ValueError(f"{directory} has a different dim_products.csv")
+    return shards
+
+
+def _copy_range(src, dst, digest, start: int, stop: int, block_size: int = 1 << 20):
+    """Copy bytes [start, stop) of an open file to dst, hashing everything read."""
+    src.seek(start)
+    remaining = stop - start
+    while remaining > 0:
+        block = src.read(min(block_size, remaining))
+        digest.update(block)
+        dst.write(block)
+        remaining -= len(block)
+
+
+class _NullWriter:
+    """Sink for bytes that are hashed but not copied."""
+
+    def write(self, data: bytes):
+        pass
+
+
+def _merge_file(paths: List[str], output_path: str, replicated: bool = False) -> List[str]:
+    """
+    Concatenate one dataset's shard files into output_path.
+
+    CSV files keep the first header; JSON arrays are joined element-wise
+    with the separators json.dump uses. A replicated file is copied from
+    the first shard only. Returns the SHA-256 of each input file.
+    """
+    digests = []
+    skip = _NullWriter()
+    is_json = output_path.endswith('.json')
+    closing = b']'
+    wrote_body = False
+    with open(output_path, 'wb') as out:
+        for number, path in enumerate(paths):
+            digest = hashlib.sha256()
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                if replicated and number > 0:
+                    _copy_range(f, skip, digest, 0, size)
+                elif is_json:
+                    indented = f.read(2) == b'[\n'
+                    start, stop = (2, size - 2) if indented else (1, size - 1)
+                    _copy_range(f, skip, digest, 0, start)
+                    if stop > start:
+                        if not wrote_body:
+                            out.write(b'[\n' if indented else b'[')
+                            closing = b'\n]' if indented else b']'
+                        else:
+                            out.write(b',\n' if indented else b', ')
+                        wrote_body = True
+                    _copy_range(f, out, digest, start, max(start, stop))
+                    _copy_range(f, skip, digest, max(start, stop), size)
+                else:
+                    header = f.readline()
+                    digest.update(header)
+                    if number == 0:
+                        out.write(header)
+                    _copy_range(f, out, digest, len(header), size)
+            digests.append(digest.hexdigest())
+        if is_json:
+            # json.dump writes an empty list as [] whatever the indent
+            out.write(closing if wrote_body else b'[]')
+    return digests
+
+
+def _check_merge_target(output_dir: str, shard_dirs: List[str]):
+    """
+    Refuse to merge into a directory holding the outputs of another run.
+
+    Zone maps, rollups, flat tables, search indexes and run state describe
+    the rows of the run that wrote them; left next to the merged files they
+    would be applied to different data. Only shard directories and the
+    outputs of an earlier merge (which are rewritten) may be present.
+    """
+    if not os.path.isdir(output_dir):
+        return
+    shard_paths = {os.path.abspath(directory) for directory in shard_dirs}
+    merge_outputs = set(SHARD_FILES.values()) | {MERGE_MANIFEST_FILE}
+    previous = os.path.join(output_dir, MERGE_MANIFEST_FILE)
+    if os.path.exists(previous):
+        with open(previous, 'r', encoding='utf-8') as f:
+            merge_outputs |= set(json.load(f).get('outputs', []))
+    foreign = sorted(
+        name for name in os.listdir(output_dir)
+        if name not in merge_outputs and not SHARD_DIR_PATTERN.match(name)
+        and os.path.abspath(os.path.join(output_dir, name)) not in shard_paths
+    )
+    if foreign:
+        raise ValueError(f"{output_dir} holds outputs of another run ({', '.join(foreign[:5])}"
+                         f"{', ...' if len(foreign) > 5 else ''}); merge into an empty directory")
+
+
+def merge_shards(shard_dirs: List[str], output_dir: str) -> Dict:
+    """
+    Check a complete set of shards and concatenate them into output_dir.
+
+    Manifests must come from the same config, seed and code, cover every
+    unit of the plan exactly once with consecutive ID ranges, and every file
+    must still match the hash recorded when its shard was written.
+    output_dir must be empty apart from shard directories and an earlier
+    merge (see _check_merge_target). The merged files hold the records of
+    a normal run; load_merged() reads them back so the normal run's writers
+    and derived stages can finish the output.
+
+    Args:
+        shard_dirs: Directories written by --shard I/N runs (any order)
+        output_dir: Directory for the merged datasets
+
+    Returns:
+        Merge manifest with record counts and hashes of the merged files
+
+    Raises:
+        ValueError: If the shards are incomplete, inconsistent or corrupted, or
+            output_dir holds the outputs of another run
+    """
+    _check_merge_target(output_dir, shard_dirs)
+    shards = _load_manifests(shard_dirs)
+    os.makedirs(output_dir, exist_ok=True)
+    datasets = {}
+    for dataset, filename in SHARD_FILES.items():
+        output_path = os.path.join(output_dir, filename)
+        paths = [os.path.join(directory, manifest['datasets'][dataset]['file']) for directory, manifest in shards]
+        digests = _merge_file(paths, output_path, replicated=dataset == 'dim_products')
+        for (directory, manifest), digest in zip(shards, digests):
+            if digest != manifest['datasets'][dataset]['sha256']:
+                raise ValueError(f"{os.path.join(directory, filename)} does not match its manifest hash")
+        records = [manifest['datasets'][dataset]['records'] for _, manifest in shards]
+        datasets[dataset] = {
+            'file': filename,
+            'records': records[0] if dataset == 'dim_products' else sum(records),
+            'bytes': os.path.getsize(output_path),
+            'sha256': file_digest(output_path)
+        }
+        logger.info(f"  {filename}: {datasets[dataset]['records']:,} records from {len(shards)} shards")
+
+    first = shards[0][1]
+    merge_manifest = {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'shards': first['shards'],
+        'random_seed': first['random_seed'],
+        'fingerprint': first['fingerprint'],
+        'date_range': first['plan']['date_range'],
+        'sources': [os.path.abspath(directory) for directory, _ in shards],
+        'datasets': datasets
+    }
+    with open(os.path.join(output_dir, MERGE_MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(merge_manifest, f, indent=2)
+    return merge_manifest
+
+
+def load_merged(output_dir: str) -> Dict:
+    """
+    Read the merged datasets back as the tables the generation steps return.
+
+    CSV floats are parsed with round-trip precision and empty fields stay
+    missing, so writing the tables again reproduces the merged bytes.
+
+    Returns:
+        Dataset -> DataFrame (CSV datasets) or list of records (JSON datasets)
+    """
+    tables = {}
+    for dataset, filename in SHARD_FILES.items():
+        path = os.path.join(output_dir, filename)
+        if filename.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                tables[dataset] = json.load(f)
+        else:
+            tables[dataset] = pd.read_csv(path, float_precision='round_trip')
+    return tables
+
+
+def record_merge_outputs(output_dir: str):
+    """List the entries of output_dir written by the merge, so a later merge may replace them."""
+    path = os.path.join(output_dir, MERGE_MANIFEST_FILE)
+    with open(path, 'r', encoding='utf-8') as f:
+        merge_manifest = json.load(f)
+    merge_manifest['outputs'] = sorted(
+        name for name in os.listdir(output_dir)
+        if name != MERGE_MANIFEST_FILE and not SHARD_DIR_PATTERN.match(name)
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(merge_manifest, f, indent=2)
+
+
+def verify_against(output_dir: str, reference_dir: str) -> Dict[str, bool]:
+    """
+    Compare the datasets of a merged run byte for byte with a reference run.
+
+    The reference is a normal run (python main.py) with the same config and
+    seed, or another merge; both generate the same plan, so every dataset
+    fingerprinted by the manifest (base, attribution and flat tables) must
+    be identical, file by file.
+
+    Returns:
+        Dataset -> whether its files are identical (datasets absent from both are skipped)
+
+    Raises:
+        ValueError: If reference_dir holds none of the datasets
+    """
+    results = {}
+    for dataset in FINGERPRINTED_DATASETS:
+        paths, references = dataset_files(output_dir, dataset), dataset_files(reference_dir, dataset)
+        if not paths and not references:
+            continue
+        results[dataset] = (
+            [os.path.basename(path) for path in paths] == [os.path.basename(path) for path in references]
+            and all(os.path.getsize(path) == os.path.getsize(reference) and file_digest(path) == file_digest(reference)
+                    for path, reference in zip(paths, references))
+        )
+    if not any(dataset_files(reference_dir, dataset) for dataset in SHARD_FILES):
+        raise ValueError(f"{reference_dir} holds no generated datasets")
+    return results
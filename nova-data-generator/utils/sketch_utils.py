@@ -0,0 +1,314 @@
+"""
+Mergeable streaming sketches for per-column statistics.
+"""
+import math
+import re
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.integrity_utils import hash_keys
+
+QUANTILES = [0.01, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_TIMESTAMP_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
+
+
+class HyperLogLog:
+    """Approximate distinct counter (standard error about 1.04 / sqrt(2^precision))."""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        """Add uint64 value hashes."""
+        if len(hashes) == 0:
+            return
+        rest_bits = 64 - self.precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        # Rank = position of the leftmost 1-bit in the remaining bits
+        # (rest < 2^50, so the float log2 is exact)
+        rank = np.full(len(hashes), rest_bits + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        rank[nonzero] = rest_bits - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog'):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            # Linear counting for small cardinalities
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class TopK:
+    """
+    Heavy-hitter counter.
+
+    Keeps at most `capacity` candidate values between updates; counts for
+    values that were evicted and later reappear are underestimated by at
+    most the smallest retained count (as in Misra-Gries).
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='float64')
+
+    def update(self, chunk_counts: pd.Series):
+        """Fold in counts of a chunk (value -> count)."""
+        if len(chunk_counts) > self.capacity:
+            chunk_counts = chunk_counts.nlargest(self.capacity)
+        self.counts = self.counts.add(chunk_counts, fill_value=0)
+        if len(self.counts) > self.capacity:
+            self.counts = self.counts.nlargest(self.capacity)
+
+    def merge(self, other: 'TopK'):
+        self.counts = self.counts.add(other.counts, fill_value=0).nlargest(self.capacity)
+
+    def top(self, k: int = 5) -> List[Dict]:
+        return [
+            {'value': _native(value), 'count': int(count)}
+            for value, count in self.counts.nlargest(k).items()
+        ]
+
+
+class TDigest:
+    """
+    Merging t-digest for approximate quantiles.
+
+    Centroids are re-clustered with the k1 scale function after every
+    update, fully vectorized: values are sorted with the existing
+    centroids, each point is assigned to a bucket by the scale function of
+    its cumulative weight, and buckets are reduced to (mean, weight).
+    Tail buckets are small, so extreme quantiles stay accurate.
+    """
+
+    def __init__(self, compression: int = 200):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.mins = np.empty(0, dtype=np.float64)
+        self.maxs = np.empty(0, dtype=np.float64)
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray, mins: np.ndarray, maxs: np.ndarray):
+        order = np.argsort(means, kind='mergesort')
+        means, weights, mins, maxs = means[order], weights[order], mins[order], maxs[order]
+        total = weights.sum()
+        # Scale function at the midpoint of each point's weight
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+        bucket = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        bucket_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / bucket_weights
+        self.weights = bucket_weights
+        self.mins = np.minimum.reduceat(mins, starts)
+        self.maxs = np.maximum.reduceat(maxs, starts)
+
+    def update(self, values: np.ndarray, weights: np.ndarray = None):
+        """Add values (optionally weighted, e.g. distinct values with their counts)."""
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)
+        present = ~np.isnan(values)
+        if not present.any():
+            return
+        values = values[present]
+        self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, weights[present]]),
+                       np.concatenate([self.mins, values]), np.concatenate([self.maxs, values]))
+
+    def merge(self, other: 'TDigest'):
+        if len(other.means):
+            self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]),
+                           np.concatenate([self.mins, other.mins]), np.concatenate([self.maxs, other.maxs]))
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile.
+
+        A centroid holding a single distinct value (common for discrete
+        columns) returns that value exactly; otherwise the estimate is
+        interpolated between centroid midpoints.
+        """
+        if len(self.means) == 0:
+            return None
+        cumulative = np.cumsum(self.weights)
+        i = min(int(np.searchsorted(cumulative, q * cumulative[-1])), len(self.means) - 1)
+        if self.mins[i] == self.maxs[i] or len(self.means) == 1:
+            return float(self.means[i])
+        positions = (cumulative - self.weights / 2) / cumulative[-1]
+        return float(np.clip(np.interp(q, positions, self.means), self.mins[0], self.maxs[-1]))
+
+
+def _native(value):
+    """Convert numpy scalars to JSON-serializable Python values."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _infer_type(values: pd.Series) -> str:
+    """Infer a logical column type from a non-null sample."""
+    if pd.api.types.is_bool_dtype(values):
+        return 'boolean'
+    if pd.api.types.is_integer_dtype(values):
+        return 'integer'
+    if pd.api.types.is_float_dtype(values):
+        return 'float'
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return 'timestamp'
+    sample = values.dropna()
+    if len(sample) == 0:
+        return 'string'
+    first = sample.iloc[0]
+    if isinstance(first, (list, tuple, dict)):
+        return 'array' if isinstance(first, (list, tuple)) else 'object'
+    if isinstance(first, bool):
+        return 'boolean'
+    if isinstance(first, str):
+        if _DATE_PATTERN.match(first):
+            return 'date'
+        if _TIMESTAMP_PATTERN.match(first):
+            return 'timestamp'
+    return 'string'
+
+
+class ColumnProfile:
+    """Running statistics for one column."""
+
+    def __init__(self, name: str, top_k_capacity: int = 100):
+        self.name = name
+        self.type = None
+        self.count = 0
+        self.null_count = 0
+        self.min = None
+        self.max = None
+        self.sum = 0.0
+        self.distinct = HyperLogLog()
+        self.top_values = TopK(top_k_capacity)
+        self.digest = TDigest()
+
+    @property
+    def numeric(self) -> bool:
+        return self.type in ('integer', 'float')
+
+    def update(self, values: pd.Series):
+        """
+        Fold a chunk of column values into the statistics.
+
+        One factorize pass yields the null count and the distinct values with
+        their counts; min/max, distinct hashing, top-k and quantiles then
+        work on the distinct values only, which is far cheaper than
+        scanning every row for each statistic.
+        """
+        if self.type is None or (self.type == 'integer' and pd.api.types.is_float_dtype(values)):
+            self.type = _infer_type(values)
+        if self.type in ('array', 'object'):
+            # Nested values are profiled by their text form
+            values = values.map(str, na_action='ignore')
+
+        codes, uniques = pd.factorize(values)
+        self.count += len(values)
+        nulls = codes < 0
+        null_count = int(nulls.sum())
+        self.null_count += null_count
+        if len(uniques) == 0:
+            return
+        counts = np.bincount(codes[~nulls] if null_count else codes, minlength=len(uniques))
+        uniques = pd.Series(uniques, name=self.name)
+
+        if self.type not in ('array', 'object'):
+            chunk_min, chunk_max = _native(uniques.min()), _native(uniques.max())
+            self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+            self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+        self.distinct.add_hashes(hash_keys(uniques.to_frame(), [self.name]))
+        if self.numeric:
+            numbers = uniques.to_numpy(dtype=np.float64)
+            self.sum += float(np.dot(numbers, counts))
+            self.digest.update(numbers, counts.astype(np.float64))
+        if self.type != 'float':
+            self.top_values.update(pd.Series(counts, index=uniques))
+
+    def merge(self, other: 'ColumnProfile'):
+        """Fold in the profile of the same column from another batch."""
+        self.type = self.type or other.type
+        self.count += other.count
+        self.null_count += other.null_count
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.sum += other.sum
+        self.distinct.merge(other.distinct)
+        self.top_values.merge(other.top_values)
+        self.digest.merge(other.digest)
+
+    def to_dict(self, top_k: int = 5) -> Dict:
+        non_null = self.count - self.null_count
+        profile = {
+            'name': self.name,
+            'type': self.type,
+            'count': self.count,
+            'null_count': self.null_count,
+            'approx_distinct': min(self.distinct.estimate(), non_null),
+            'min': self.min,
+            'max': self.max
+        }
+        if self.numeric and non_null:
+            profile['mean'] = round(self.sum / non_null, 4)
+            profile['quantiles'] = {
+                f'p{int(q * 100):02d}': round(self.digest.quantile(q), 4) for q in QUANTILES
+            }
+        # Top values are only informative when values repeat
+        top_values = self.top_values.top(top_k) if self.type != 'float' else []
+        if top_values and top_values[0]['count'] > 1:
+            profile['top_values'] = top_values
+        return profile
+
+
+class DatasetProfile:
+    """
+    Column profiles for a dataset, updated chunk by chunk as it is written.
+
+    Nested JSON objects are flattened into dotted columns
+    (e.g. engagement.likes) so every leaf field gets its own profile.
+    """
+
+    def __init__(self, top_k_capacity: int = 100):
+        self.top_k_capacity = top_k_capacity
+        self.columns: Dict[str, ColumnProfile] = {}
+        self.record_count = 0
+
+    def update(self, chunk: pd.DataFrame):
+        """Fold a DataFrame chunk into the profiles."""
+        self.record_count += len(chunk)
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col, self.top_k_capacity)
+            self.columns[col].update(chunk[col])
+
+    def update_records(self, records: List[Dict]):
+        """Fold a batch of JSON records into the profiles."""
+        self.update(pd.json_normalize(records))
+
+    def merge(self, other: 'DatasetProfile'):
+        """Fold in the profile of another batch of the same dataset."""
+        self.record_count += other.record_count
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+
+    def to_dict(self, top_k: int = 5) -> Dict:
+        return {
+            'record_count': self.record_count,
+            'columns': [column.to_dict(top_k) for column in self.columns.values()]
+        }
@@ -0,0 +1,206 @@
+"""
+Run state (high-water marks) for incremental generation.
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+STATE_DIR = '.state'
+JOURNAL_DIR = 'increment'
+
+
+def _state_path(output_dir: str, filename: str) -> str:
+    return os.path.join(output_dir, STATE_DIR, filename)
+
+
+def load_run_state(output_dir: str = 'data') -> Optional[Dict]:
+    """
+    Load the high-water mark of the previous run.
+    
+    Args:
+        output_dir: Output directory of the previous run
+    
+    Returns:
+        State dictionary, or None if no run has been recorded
+    """
+    filepath = _state_path(output_dir, 'run_state.json')
+    if not os.path.exists(filepath):
+        return None
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_run_state(state: Dict, output_dir: str = 'data'):
+    """
+    Save the high-water mark of the current run.
+    
+    Args:
+        state: State dictionary (end date, next ID sequence numbers, increments)
+        output_dir: Output directory
+    """
+    filepath = _state_path(output_dir, 'run_state.json')
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    return filepath
+
+
+def load_customer_history(output_dir: str = 'data') -> Dict[str, str]:
+    """
+    Load customer purchase history (customer_id -> last product_id).
+    
+    Insertion order is preserved so repeat-customer selection draws from
+    the same ordering as the run that produced it.
+    """
+    filepath = _state_path(output_dir, 'customer_history.json')
+    if not os.path.exists(filepath):
+        return {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return dict(json.load(f))
+
+
+def save_customer_history(history: Dict[str, str], output_dir: str = 'data'):
+    """Save customer purchase history as ordered [customer_id, product_id] pairs."""
+    filepath = _state_path(output_dir, 'customer_history.json')
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(list(history.items()), f)
+    return filepath
+
+
+def load_dataset_profiles(output_dir: str = 'data') -> Optional[Tuple[Dict, Dict]]:
+    """
+    Load dataset info and column sketches of the previous run.
+    
+    Returns:
+        Tuple of (datasets_info, DatasetProfile by dataset name), or None
+    """
+    filepath = _state_path(output_dir, 'dataset_profiles.pkl')
+    if not os.path.exists(filepath):
+        return None
+    with open(filepath, 'rb') as f:
+        state = pickle.load(f)
+    return state['datasets_info'], state['profiles']
+
+
+def save_dataset_profiles(datasets_info: Dict, profiles: Dict, output_dir: str = 'data'):
+    """
+    Save dataset info and column sketches so incremental runs can merge into them.
+    
+    Args:
+        datasets_info: Dataset information used for the data dictionary
+        profiles: DatasetProfile by dataset name
+        output_dir: Output directory
+    """
+    filepath = _state_path(output_dir, 'dataset_profiles.pkl')
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'wb') as f:
+        pickle.dump({'datasets_info': datasets_info, 'profiles': profiles}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return filepath
+
+
+def derive_seed(seed: int, *parts) -> int:
+    """
+    Derive a deterministic 32-bit seed from a base seed and extra parts.
+    
+    Args:
+        seed: Base random seed
+        parts: Values identifying the sub-run (e.g. window start and end dates)
+    
+    Returns:
+        Seed usable with RandomGenerator
+    """
+    key = ':'.join(str(part) for part in (seed,) + parts)
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:4], 'big')
+
+
+class IncrementJournal:
+    """
+    Undo journal of an incremental run.
+    
+    Before the run writes anything, the journal records every file in the
+    output directory: the size of each file the run appends to, a copy of
+    each file it may rewrite (zone maps, rollups, metadata, run state), and
+    nothing more for files it leaves alone. Removing the journal commits
+    the run. A run that fails is rolled back from the journal; one that is
+    killed leaves the journal behind and is rolled back by the next
+    incremental run, so a retried window is never appended twice.
+    """
+    
+    def __init__(self, output_dir: str = 'data'):
+        self.output_dir = output_dir
+        self.path = _state_path(output_dir, JOURNAL_DIR)
+    
+    def _walk(self):
+        """Relative paths of the output files and directories, outside the journal."""
+        files, dirs = [], []
+        for root, subdirs, names in os.walk(self.output_dir):
+            subdirs[:] = [name for name in subdirs if os.path.join(root, name) != self.path]
+            dirs.extend(os.path.relpath(os.path.join(root, name), self.output_dir) for name in subdirs)
+            files.extend(os.path.relpath(os.path.join(root, name), self.output_dir) for name in names)
+        return files, dirs
+    
+    def pending(self) -> bool:
+        """True if an earlier incremental run neither committed nor rolled back."""
+        return os.path.exists(os.path.join(self.path, 'journal.json'))
+    
+    def begin(self, appended: List[str], unchanged: List[str]):
+        """
+        Record the output directory before the run writes to it.
+        
+        Args:
+            appended: Files the run only appends to (restored by truncation)
+            unchanged: Files and directories the run does not modify; new
+                files inside them are still removed on rollback
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+        files, dirs = self._walk()
+        entries = {}
+        for rel in files:
+            if rel in appended:
+                entries[rel] = {'mode': 'append', 'size': os.path.getsize(os.path.join(self.output_dir, rel))}
+            elif any(rel == keep or rel.startswith(keep.rstrip(os.sep) + os.sep) for keep in unchanged):
+                entries[rel] = {'mode': 'keep'}
+            else:
+                backup = os.path.join(self.path, 'files', rel)
+                os.makedirs(os.path.dirname(backup), exist_ok=True)
+                shutil.copy2(os.path.join(self.output_dir, rel), backup)
+                entries[rel] = {'mode': 'copy'}
+        
+        # The journal is valid once journal.json exists, so it is written last
+        temp_path = os.path.join(self.path, 'journal.json.tmp')
+        os.makedirs(self.path, exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': entries, 'dirs': dirs}, f)
+        os.replace(temp_path, os.path.join(self.path, 'journal.json'))
+    
+    def rollback(self):
+        """Restore the output directory recorded by begin() and drop the journal."""
+        with open(os.path.join(self.path, 'journal.json'), 'r', encoding='utf-8') as f:
+            journal = json.load(f)
+        entries, dirs = journal['files'], set(journal['dirs'])
+        
+        files, current_dirs = self._walk()
+        for rel in files:
+            if rel not in entries:
+                os.remove(os.path.join(self.output_dir, rel))
+        for rel in sorted(current_dirs, key=len, reverse=True):
+            if rel not in dirs and not os.listdir(os.path.join(self.output_dir, rel)):
+                os.rmdir(os.path.join(self.output_dir, rel))
+        
+        for rel, entry in entries.items():
+            path = os.path.join(self.output_dir, rel)
+            if entry['mode'] == 'copy':
+                # Copied rather than moved, so an interrupted rollback can simply be repeated
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                shutil.copy2(os.path.join(self.path, 'files', rel), path)
+            elif entry['mode'] == 'append' and os.path.exists(path) and os.path.getsize(path) > entry['size']:
+                os.truncate(path, entry['size'])
+        shutil.rmtree(self.path)
+    
+    def commit(self):
+        """Keep the run's writes and drop the journal."""
+        shutil.rmtree(self.path, ignore_errors=True)
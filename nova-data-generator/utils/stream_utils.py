@@ -0,0 +1,125 @@
+"""
+Chunked readers for generated output files.
+"""
+import glob
+import json
+import os
+from typing import Dict, Iterator, List
+
+import pandas as pd
+
+# Extensions searched for a dataset, in order of preference
+DATASET_EXTENSIONS = ['.csv', '.jsonl', '.json', '.parquet']
+
+
+def dataset_files(data_dir: str, dataset: str) -> List[str]:
+    """
+    Find the files holding a dataset, including incremental part files.
+
+    Args:
+        data_dir: Directory with generated outputs
+        dataset: Dataset name (file name without extension)
+
+    Returns:
+        Sorted list of file paths (empty if the dataset was not written)
+    """
+    for ext in DATASET_EXTENSIONS:
+        base = os.path.join(data_dir, f'{dataset}{ext}')
+        if os.path.exists(base):
+            # Part files are named <dataset>.<start>_<end><ext>; zone map sidecars are not data
+            parts = sorted(glob.glob(os.path.join(data_dir, f'{glob.escape(dataset)}.*{ext}')))
+            return [base] + [path for path in parts if not path.endswith('.zonemap.json')]
+    return []
+
+
+def iter_json_array(path: str, chunk_size: int, buffer_size: int = 1 << 20) -> Iterator[List[Dict]]:
+    """
+    Stream records from a file holding one JSON array of objects.
+
+    The file is read in fixed-size buffers and objects are decoded one at a
+    time, so memory is bounded by the buffer and chunk size rather than the
+    file size.
+
+    Args:
+        path: JSON file path (as written by write_json)
+        chunk_size: Records per chunk
+        buffer_size: Characters read from the file at a time
+
+    Yields:
+        Lists of up to chunk_size records
+    """
+    decoder = json.JSONDecoder()
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        buf, pos = f.read(buffer_size), 0
+        while True:
+            # Skip whitespace and array punctuation between objects
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] in '[,'):
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                break
+
+            try:
+                if pos >= len(buf):
+                    raise json.JSONDecodeError('Buffer exhausted', buf, pos)
+                record, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                more = f.read(buffer_size)
+                if not more:
+                    if buf[pos:].strip():
+                        raise
+                    break
+                buf, pos = buf[pos:] + more, 0
+                continue
+
+            records.append(record)
+            if len(records) >= chunk_size:
+                yield records
+                records = []
+
+    if records:
+        yield records
+
+
+def iter_chunks(path: str, chunk_size: int = 100000, columns: List[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read an output file as a sequence of DataFrame chunks.
+
+    Supports CSV, JSON Lines, JSON arrays (as written by write_json) and
+    Parquet (requires pyarrow).
+
+    Args:
+        path: File path
+        chunk_size: Rows per chunk
+        columns: Only read these columns (None reads all)
+
+    Yields:
+        DataFrame chunks
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == '.csv':
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+    elif ext == '.jsonl':
+        for chunk in pd.read_json(path, lines=True, chunksize=chunk_size):
+            yield chunk[columns] if columns else chunk
+    elif ext == '.json':
+        for records in iter_json_array(path, chunk_size):
+            chunk = pd.DataFrame(records)
+            yield chunk[columns] if columns else chunk
+    elif ext == '.parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet files requires the optional pyarrow package (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported file format: {path}")
+
+
+def iter_dataset(data_dir: str, dataset: str, chunk_size: int = 100000,
+                 columns: List[str] = None) -> Iterator[pd.DataFrame]:
+    """Read all files of a dataset as a sequence of DataFrame chunks."""
+    for path in dataset_files(data_dir, dataset):
+        yield from iter_chunks(path, chunk_size, columns)
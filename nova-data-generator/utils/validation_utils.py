@@ -1,10 +1,15 @@
 """
 Data validation utilities.
 """
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Any
 import logging
 
+from utils.integrity_utils import SortedKeyIndex, hash_keys
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,14 +27,14 @@ def validate_foreign_keys(df: pd.DataFrame, fk_column: str,
     Returns:
         True if all foreign keys are valid, False otherwise
     """
-    fk_values = set(df[fk_column].dropna().unique())
-    pk_values = set(reference_df[pk_column].unique())
-    
-    invalid_fks = fk_values - pk_values
+    # Binary search over sorted key hashes instead of diffing Python sets
+    fk_values = df[[fk_column]].dropna()
+    index = SortedKeyIndex(hash_keys(reference_df, [pk_column]))
+    invalid = fk_values[~index.contains(hash_keys(fk_values, [fk_column]))][fk_column].unique()
     
-    if invalid_fks:
-        logger.warning(f"Found {len(invalid_fks)} invalid foreign key values in {fk_column}")
-        logger.warning(f"Invalid values: {list(invalid_fks)[:10]}")  # Show first 10
+    if len(invalid) > 0:
+        logger.warning(f"Found {len(invalid)} invalid foreign key values in {fk_column}")
+        logger.warning(f"Invalid values: {list(invalid)[:10]}")  # Show first 10
         return False
     
     logger.info(f"Foreign key validation passed for {fk_column}")
@@ -50,18 +55,19 @@ def validate_date_range(df: pd.DataFrame, date_column: str,
     Returns:
         True if all dates are valid, False otherwise
     """
-    df[date_column] = pd.to_datetime(df[date_column])
+    # Parse into a local Series so the caller's column is left untouched
+    dates = pd.to_datetime(df[date_column])
     
     if min_date:
         min_date = pd.to_datetime(min_date)
-        invalid_count = (df[date_column] < min_date).sum()
+        invalid_count = (dates < min_date).sum()
         if invalid_count > 0:
             logger.warning(f"Found {invalid_count} dates before {min_date} in {date_column}")
             return False
     
     if max_date:
         max_date = pd.to_datetime(max_date)
-        invalid_count = (df[date_column] > max_date).sum()
+        invalid_count = (dates > max_date).sum()
         if invalid_count > 0:
             logger.warning(f"Found {invalid_count} dates after {max_date} in {date_column}")
             return False
@@ -208,3 +214,540 @@ def validate_record_count(df: pd.DataFrame, min_count: int = None,
     
     logger.info(f"Record count validation passed: {actual_count} records")
     return True
+
+
+# ----------------------------------------------------------------------------
+# Declarative rule engine
+# ----------------------------------------------------------------------------
+
+def _resolve_bound(value: Any, context: Dict[str, Any]) -> Any:
+    """Replace a named bound (e.g. 'start_date') with its value from context."""
+    if isinstance(value, str) and value in context:
+        return context[value]
+    return value
+
+
+def _violation(df: pd.DataFrame, rule: str, column: str, mask, sample_rows: int,
+               detail: Dict = None) -> Dict:
+    """Build a violation record with its count and a few offending rows."""
+    return {
+        'rule': rule,
+        'column': column,
+        'violation_count': int(mask.sum()),
+        'detail': detail or {},
+        'sample_rows': df.loc[mask].head(sample_rows).to_dict('records')
+    }
+
+
+def _column_missing(rule: str, column: str, record_count: int) -> Dict:
+    """Violation for a rule whose column is not in the table."""
+    return {
+        'rule': rule, 'column': column, 'violation_count': record_count,
+        'detail': {'error': 'column missing'}, 'sample_rows': []
+    }
+
+
+def _check_distribution(column: str, spec: Dict, actual: pd.Series, record_count: int) -> Dict:
+    """
+    Compare observed value proportions with the expected ones.
+    
+    The tolerance is widened to three standard errors of a proportion when
+    that is larger, so small tables (e.g. the rows of one incremental
+    window) are not failed for sampling noise.
+    
+    Returns:
+        Violation record, or None if every proportion is within tolerance
+    """
+    tolerance = spec.get('tolerance', 0.05)
+    mismatches = {}
+    for value, expected in spec['expected'].items():
+        allowed = max(tolerance, 3 * np.sqrt(expected * (1 - expected) / record_count))
+        if abs(actual.get(value, 0) - expected) > allowed:
+            mismatches[str(value)] = {
+                'expected': expected, 'actual': round(float(actual.get(value, 0)), 4),
+                'tolerance': round(float(allowed), 4)
+            }
+    if not mismatches:
+        return None
+    return {
+        'rule': 'distribution', 'column': column, 'violation_count': len(mismatches),
+        'detail': {'tolerance': tolerance, 'mismatches': mismatches}, 'sample_rows': []
+    }
+
+
+def _check_bounds(df: pd.DataFrame, rule: str, column: str, values: pd.Series,
+                  min_val: Any, max_val: Any, sample_rows: int, reported: tuple = None) -> List[Dict]:
+    """
+    Check min/max bounds of a column.
+    
+    The column's min and max are reduced first; a per-row mask is only
+    built when a bound is actually crossed, so clean columns cost one
+    reduction instead of a comparison plus a copy.
+    
+    Args:
+        reported: (min, max) shown in violation details when the compared
+            values differ from the configured bounds (see _date_values)
+    """
+    violations = []
+    non_null = values.dropna() if values.hasnans else values
+    if len(non_null) == 0:
+        return violations
+    report_min, report_max = reported or (min_val, max_val)
+    
+    if min_val is not None and non_null.min() < min_val:
+        mask = values < min_val
+        violations.append(_violation(df, rule, column, mask, sample_rows, {'min': report_min}))
+    if max_val is not None and non_null.max() > max_val:
+        mask = values > max_val
+        violations.append(_violation(df, rule, column, mask, sample_rows, {'max': report_max}))
+    return violations
+
+
+def _date_values(values: pd.Series, bound: str, upper: bool):
+    """
+    Prepare a date column and a bound for comparison without parsing strings.
+    
+    ISO 8601 strings sort chronologically, so string columns are compared
+    directly. The bound is a day; for the upper bound, any time on that day
+    is allowed, so '~' (which sorts after every digit and 'T') is appended.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        bound = pd.Timestamp(bound)
+        return bound + pd.Timedelta(days=1) - pd.Timedelta(1) if upper else bound
+    return f"{bound}~" if upper else bound
+
+
+def validate_table(df: pd.DataFrame, rules: Dict, tables: Dict[str, pd.DataFrame] = None,
+                   context: Dict[str, Any] = None, sample_rows: int = 5, partial: bool = False) -> Dict:
+    """
+    Evaluate all declarative rules for one table in a single vectorized pass.
+    
+    The DataFrame is never modified. Columns named by a rule but missing
+    from the table are reported as violations; an empty table has no
+    values to check, so only its record count is validated. Supported rules:
+        record_count: {min, max}
+        not_null: [columns]
+        ranges: {column: {min, max}}
+        dates: {column: {min, max}}  (bounds may be 'start_date' / 'end_date')
+        foreign_keys: {column: 'table.column'}
+        dtypes: {column: 'int' | 'float' | 'str' | 'bool'}
+        distributions: {column: {expected: {value: proportion}, tolerance}}
+    
+    Args:
+        df: DataFrame to validate
+        rules: Rule dictionary for this table
+        tables: All tables by name (for foreign key lookups)
+        context: Named values usable as bounds (e.g. start_date, end_date)
+        sample_rows: Number of offending rows to include per violation
+        partial: The table holds only some rows of its dataset (an incremental
+            window), so record_count rules, which apply to whole datasets, are skipped
+    
+    Returns:
+        Dictionary with record count, pass flag and list of violations
+    """
+    tables = tables or {}
+    context = context or {}
+    violations = []
+    
+    # Record count
+    count_rule = {} if partial else rules.get('record_count', {})
+    min_count, max_count = count_rule.get('min'), count_rule.get('max')
+    if (min_count is not None and len(df) < min_count) or (max_count is not None and len(df) > max_count):
+        violations.append({
+            'rule': 'record_count', 'column': None, 'violation_count': 1,
+            'detail': {'actual': len(df), 'min': min_count, 'max': max_count}, 'sample_rows': []
+        })
+    if len(df) == 0:
+        return {'record_count': 0, 'passed': not violations, 'violations': violations}
+    
+    def present(rule: str, col: str) -> bool:
+        if col not in df.columns:
+            violations.append(_column_missing(rule, col, len(df)))
+            return False
+        return True
+    
+    # Nulls: one isna() reduction over all required columns
+    required = [col for col in rules.get('not_null', []) if present('not_null', col)]
+    if required:
+        null_counts = df[required].isna().sum()
+        for col in null_counts[null_counts > 0].index:
+            violations.append(_violation(df, 'not_null', col, df[col].isna(), sample_rows))
+    
+    # Numeric ranges
+    for col, bounds in rules.get('ranges', {}).items():
+        if present('range', col):
+            violations.extend(_check_bounds(
+                df, 'range', col, df[col], bounds.get('min'), bounds.get('max'), sample_rows
+            ))
+    
+    # Date ranges
+    for col, bounds in rules.get('dates', {}).items():
+        if not present('date_range', col):
+            continue
+        values = df[col]
+        min_date = _resolve_bound(bounds.get('min'), context)
+        max_date = _resolve_bound(bounds.get('max'), context)
+        violations.extend(_check_bounds(
+            df, 'date_range', col, values,
+            _date_values(values, min_date, upper=False) if min_date else None,
+            _date_values(values, max_date, upper=True) if max_date else None,
+            sample_rows, reported=(min_date, max_date)
+        ))
+    
+    # Foreign keys: hash the distinct values once, mask only invalid ones
+    for col, reference in rules.get('foreign_keys', {}).items():
+        ref_table, ref_col = reference.split('.')
+        if ref_table not in tables or not present('foreign_key', col):
+            continue
+        values = df[col]
+        distinct = pd.Series(values.dropna().unique())
+        invalid = distinct[~distinct.isin(tables[ref_table][ref_col])]
+        if len(invalid) > 0:
+            violations.append(_violation(
+                df, 'foreign_key', col, values.isin(invalid), sample_rows,
+                {'reference': reference, 'invalid_values': invalid.head(10).tolist()}
+            ))
+    
+    # Data types
+    type_checks = {
+        'int': pd.api.types.is_integer_dtype,
+        'float': pd.api.types.is_float_dtype,
+        'str': pd.api.types.is_object_dtype,
+        'bool': pd.api.types.is_bool_dtype
+    }
+    for col, expected_type in rules.get('dtypes', {}).items():
+        if present('dtype', col) and not type_checks[expected_type](df[col]):
+            violations.append({
+                'rule': 'dtype', 'column': col, 'violation_count': len(df),
+                'detail': {'expected': expected_type, 'actual': str(df[col].dtype)}, 'sample_rows': []
+            })
+    
+    # Value distributions
+    for col, spec in rules.get('distributions', {}).items():
+        if present('distribution', col):
+            violation = _check_distribution(col, spec, df[col].value_counts(normalize=True), len(df))
+            if violation:
+                violations.append(violation)
+    
+    return {
+        'record_count': len(df),
+        'passed': not violations,
+        'violations': violations
+    }
+
+
+def run_validation(tables: Dict[str, pd.DataFrame], dataset_rules: Dict[str, Dict],
+                   context: Dict[str, Any] = None, max_workers: int = 4,
+                   sample_rows: int = 5, partial: bool = False) -> Dict[str, Dict]:
+    """
+    Validate several tables in parallel.
+    
+    Args:
+        tables: DataFrames by dataset name
+        dataset_rules: Rule dictionaries by dataset name
+        context: Named values usable as bounds
+        max_workers: Number of tables validated concurrently
+        sample_rows: Number of offending rows to include per violation
+        partial: The tables hold one incremental window (see validate_table())
+    
+    Returns:
+        Validation result per dataset
+    """
+    def validate(name):
+        start = time.perf_counter()
+        result = validate_table(tables[name], dataset_rules[name], tables, context, sample_rows, partial)
+        result['seconds'] = round(time.perf_counter() - start, 4)
+        return name, result
+    
+    names = [name for name in dataset_rules if name in tables]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(executor.map(validate, names))
+    
+    for name, result in results.items():
+        if result['passed']:
+            logger.info(f"Validation passed for {name} ({result['record_count']} records)")
+        for violation in result['violations']:
+            logger.warning(
+                f"Validation failed for {name}: {violation['rule']} on {violation['column']} "
+                f"({violation['violation_count']} violations)"
+            )
+    return results
+
+
+# ----------------------------------------------------------------------------
+# Streaming (out-of-core) validation
+# ----------------------------------------------------------------------------
+
+class KeyIndex(SortedKeyIndex):
+    """
+    Compact membership index for foreign key lookups.
+    
+    Distinct reference keys are kept as one sorted array of 64-bit key
+    hashes, so memory is 8 bytes per distinct key regardless of how many
+    rows reference it.
+    """
+    
+    def __init__(self, keys):
+        keys = pd.Series(keys).dropna()
+        super().__init__(hash_keys(keys.to_frame('key'), ['key']))
+    
+    @classmethod
+    def from_chunks(cls, chunks, column: str) -> 'KeyIndex':
+        """Build an index from the distinct values of a column across chunks."""
+        index = cls([])
+        hashes = [index.keys] + [
+            np.unique(hash_keys(chunk[[column]].dropna(), [column])) for chunk in chunks
+        ]
+        index.keys = np.unique(np.concatenate(hashes))
+        return index
+    
+    def contains(self, values) -> np.ndarray:
+        """Boolean array marking values present in the index."""
+        return super().contains(hash_keys(pd.Series(values).to_frame('key'), ['key']))
+
+
+def _combine_dtypes(current, dtype):
+    """Dtype a column would have if its chunks were read as one table."""
+    if current is None or current == dtype:
+        return dtype
+    numeric = pd.api.types.is_numeric_dtype
+    if numeric(current) and numeric(dtype) and not pd.api.types.is_bool_dtype(current) \
+            and not pd.api.types.is_bool_dtype(dtype):
+        return np.result_type(current, dtype)
+    return np.dtype(object)
+
+
+class StreamingValidator:
+    """
+    Validate a table chunk by chunk with bounded memory.
+    
+    Accepts the same rule dictionary as validate_table() and keeps only
+    running aggregates (violation counts, min/max, category counts, a few
+    sample rows) between chunks, so the result matches validate_table()
+    on the concatenated table.
+    """
+    
+    def __init__(self, rules: Dict, references: Dict[str, KeyIndex] = None,
+                 context: Dict[str, Any] = None, sample_rows: int = 5):
+        """
+        Initialize streaming validator.
+        
+        Args:
+            rules: Rule dictionary for this table (see validate_table())
+            references: KeyIndex per 'table.column' foreign key reference
+            context: Named values usable as bounds (e.g. start_date, end_date)
+            sample_rows: Number of offending rows to include per violation
+        """
+        self.rules = rules
+        self.references = references or {}
+        self.context = context or {}
+        self.sample_rows = sample_rows
+        self.record_count = 0
+        self.columns = None
+        self.violations = {}
+        self.dtypes = {}
+        self.category_counts = {col: pd.Series(dtype='int64') for col in rules.get('distributions', {})}
+        self.invalid_keys = {}
+    
+    def _add(self, key: tuple, chunk: pd.DataFrame, mask, detail: Dict = None):
+        """Accumulate violations of one check in a chunk."""
+        count = int(mask.sum())
+        if count == 0:
+            return
+        rule, column = key[0], key[1]
+        violation = self.violations.setdefault(key, {
+            'rule': rule, 'column': column, 'violation_count': 0,
+            'detail': detail or {}, 'sample_rows': []
+        })
+        violation['violation_count'] += count
+        needed = self.sample_rows - len(violation['sample_rows'])
+        if needed > 0:
+            violation['sample_rows'].extend(chunk.loc[mask].head(needed).to_dict('records'))
+    
+    def _check_bounds(self, chunk: pd.DataFrame, rule: str, column: str, values: pd.Series,
+                      min_val: Any, max_val: Any, reported: tuple = None):
+        non_null = values.dropna() if values.hasnans else values
+        if len(non_null) == 0:
+            return
+        report_min, report_max = reported or (min_val, max_val)
+        if min_val is not None and non_null.min() < min_val:
+            self._add((rule, column, 'min'), chunk, values < min_val, {'min': report_min})
+        if max_val is not None and non_null.max() > max_val:
+            self._add((rule, column, 'max'), chunk, values > max_val, {'max': report_max})
+    
+    def update(self, chunk: pd.DataFrame):
+        """Validate one chunk and fold it into the running aggregates."""
+        rules = self.rules
+        self.record_count += len(chunk)
+        if self.columns is None:
+            self.columns = set(chunk.columns)
+        
+        required = [col for col in rules.get('not_null', []) if col in chunk.columns]
+        if required:
+            null_counts = chunk[required].isna().sum()
+            for col in null_counts[null_counts > 0].index:
+                self._add(('not_null', col), chunk, chunk[col].isna())
+        
+        # Missing columns are reported once by result()
+        for col, bounds in rules.get('ranges', {}).items():
+            if col in chunk.columns:
+                self._check_bounds(chunk, 'range', col, chunk[col], bounds.get('min'), bounds.get('max'))
+        
+        for col, bounds in rules.get('dates', {}).items():
+            if col not in chunk.columns:
+                continue
+            values = chunk[col]
+            min_date = _resolve_bound(bounds.get('min'), self.context)
+            max_date = _resolve_bound(bounds.get('max'), self.context)
+            self._check_bounds(
+                chunk, 'date_range', col, values,
+                _date_values(values, min_date, upper=False) if min_date else None,
+                _date_values(values, max_date, upper=True) if max_date else None,
+                reported=(min_date, max_date)
+            )
+        
+        for col, reference in rules.get('foreign_keys', {}).items():
+            if reference not in self.references or col not in chunk.columns:
+                continue
+            values = chunk[col]
+            distinct = values.dropna().unique()
+            invalid = distinct[~self.references[reference].contains(distinct)]
+            if len(invalid) > 0:
+                seen = self.invalid_keys.setdefault(col, [])
+                seen.extend(value for value in invalid.tolist() if value not in seen and len(seen) < 10)
+                self._add(('foreign_key', col), chunk, values.isin(invalid), {'reference': reference})
+        
+        for col in rules.get('dtypes', {}):
+            if col in chunk.columns:
+                self.dtypes[col] = _combine_dtypes(self.dtypes.get(col), chunk[col].dtype)
+        
+        for col, counts in self.category_counts.items():
+            if col in chunk.columns:
+                self.category_counts[col] = counts.add(chunk[col].value_counts(), fill_value=0)
+    
+    def result(self) -> Dict:
+        """
+        Finish validation.
+        
+        Returns:
+            Dictionary with record count, pass flag and list of violations,
+            in the same format as validate_table()
+        """
+        rules = self.rules
+        columns = self.columns or set()
+        violations = []
+        
+        count_rule = rules.get('record_count', {})
+        min_count, max_count = count_rule.get('min'), count_rule.get('max')
+        if (min_count is not None and self.record_count < min_count) or \
+                (max_count is not None and self.record_count > max_count):
+            violations.append({
+                'rule': 'record_count', 'column': None, 'violation_count': 1,
+                'detail': {'actual': self.record_count, 'min': min_count, 'max': max_count}, 'sample_rows': []
+            })
+        if self.record_count == 0:
+            return {'record_count': 0, 'passed': not violations, 'violations': violations}
+        
+        def present(rule: str, col: str) -> bool:
+            if col not in columns:
+                violations.append(_column_missing(rule, col, self.record_count))
+                return False
+            return True
+        
+        def accumulated(*key):
+            if key in self.violations:
+                violation = self.violations[key]
+                if key[0] == 'foreign_key':
+                    violation['detail']['invalid_values'] = self.invalid_keys.get(key[1], [])
+                violations.append(violation)
+        
+        # Accumulated checks in the same order validate_table() reports them
+        for col in [col for col in rules.get('not_null', []) if present('not_null', col)]:
+            accumulated('not_null', col)
+        for rule, section in [('range', 'ranges'), ('date_range', 'dates')]:
+            for col in rules.get(section, {}):
+                if present(rule, col):
+                    accumulated(rule, col, 'min')
+                    accumulated(rule, col, 'max')
+        for col, reference in rules.get('foreign_keys', {}).items():
+            if reference in self.references and present('foreign_key', col):
+                accumulated('foreign_key', col)
+        
+        type_checks = {
+            'int': pd.api.types.is_integer_dtype,
+            'float': pd.api.types.is_float_dtype,
+            'str': pd.api.types.is_object_dtype,
+            'bool': pd.api.types.is_bool_dtype
+        }
+        for col, expected_type in rules.get('dtypes', {}).items():
+            dtype = self.dtypes.get(col, np.dtype(object))
+            if present('dtype', col) and not type_checks[expected_type](dtype):
+                violations.append({
+                    'rule': 'dtype', 'column': col, 'violation_count': self.record_count,
+                    'detail': {'expected': expected_type, 'actual': str(dtype)}, 'sample_rows': []
+                })
+        
+        for col, spec in rules.get('distributions', {}).items():
+            if not present('distribution', col):
+                continue
+            counts = self.category_counts[col]
+            actual = counts / counts.sum() if counts.sum() > 0 else counts
+            violation = _check_distribution(col, spec, actual, self.record_count)
+            if violation:
+                violations.append(violation)
+        
+        return {
+            'record_count': self.record_count,
+            'passed': not violations,
+            'violations': violations
+        }
+
+
+def validate_files(data_dir: str, dataset_rules: Dict[str, Dict], context: Dict[str, Any] = None,
+                   chunk_size: int = 100000, sample_rows: int = 5) -> Dict[str, Dict]:
+    """
+    Validate written output files without loading whole tables.
+    
+    Foreign key references are indexed first (one pass over the referenced
+    column only), then each dataset is streamed once in chunks.
+    
+    Args:
+        data_dir: Directory with generated outputs (CSV, JSON, JSONL or Parquet)
+        dataset_rules: Rule dictionaries by dataset name
+        context: Named values usable as bounds
+        chunk_size: Rows per chunk
+        sample_rows: Number of offending rows to include per violation
+    
+    Returns:
+        Validation result per dataset, in the same format as run_validation()
+    """
+    from utils.stream_utils import dataset_files, iter_dataset
+    
+    references = {}
+    for rules in dataset_rules.values():
+        for reference in rules.get('foreign_keys', {}).values():
+            ref_table, ref_col = reference.split('.')
+            if reference not in references and dataset_files(data_dir, ref_table):
+                references[reference] = KeyIndex.from_chunks(
+                    iter_dataset(data_dir, ref_table, chunk_size, columns=[ref_col]), ref_col
+                )
+    
+    results = {}
+    for name, rules in dataset_rules.items():
+        if not dataset_files(data_dir, name):
+            continue
+        start = time.perf_counter()
+        validator = StreamingValidator(rules, references, context, sample_rows)
+        for chunk in iter_dataset(data_dir, name, chunk_size):
+            validator.update(chunk)
+        results[name] = validator.result()
+        results[name]['seconds'] = round(time.perf_counter() - start, 4)
+        
+        if results[name]['passed']:
+            logger.info(f"Validation passed for {name} ({validator.record_count} records)")
+        for violation in results[name]['violations']:
+            logger.warning(
+                f"Validation failed for {name}: {violation['rule']} on {violation['column']} "
+                f"({violation['violation_count']} violations)"
+            )
+    return results
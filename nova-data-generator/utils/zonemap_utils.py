@@ -0,0 +1,181 @@
+"""
+Zone-map sidecar indexes for block-pruned reads of CSV outputs.
+"""
+import io
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.sketch_utils import _native
+
+
+def sidecar_path(filepath: str) -> str:
+    """Path of the zone map written next to a data file."""
+    return f'{filepath}.zonemap.json'
+
+
+class ZoneMap:
+    """
+    Per-block min/max of key columns with the byte range of each block.
+
+    A CSV file is written as a header followed by blocks of `block_rows`
+    rows (a JSON array file is a single block). For each block the zone map records where its bytes start and
+    how long they are, plus the min and max of every indexed column, so a
+    reader can seek straight to the blocks that may hold matching rows and
+    skip the rest. Pruning works best when the file is clustered (sorted)
+    on the indexed columns.
+    """
+
+    def __init__(self, columns: List[str], block_rows: int = 10000, sort_keys: List[str] = None):
+        """
+        Initialize zone map.
+
+        Args:
+            columns: Indexed columns
+            block_rows: Rows per block
+            sort_keys: Columns the file is clustered on (informational)
+        """
+        self.columns = columns
+        self.block_rows = block_rows
+        self.sort_keys = sort_keys or []
+        self.header_bytes = 0
+        self.row_count = 0
+        self.blocks: List[Dict] = []
+
+    def add_block(self, block: pd.DataFrame, byte_offset: int, byte_length: int):
+        """Record a block that was written at byte_offset."""
+        zones = {}
+        for col in self.columns:
+            values = block[col].dropna()
+            zones[col] = [_native(values.min()), _native(values.max())] if len(values) else [None, None]
+        self.blocks.append({
+            'row_start': self.row_count,
+            'row_count': len(block),
+            'byte_offset': byte_offset,
+            'byte_length': byte_length,
+            'zones': zones
+        })
+        self.row_count += len(block)
+
+    def select(self, filters: Dict[str, Tuple]) -> List[Dict]:
+        """
+        Blocks that may hold rows matching all filters.
+
+        Args:
+            filters: Column -> (low, high) inclusive bounds; None leaves a side open.
+                Filters on columns that are not indexed cannot prune.
+
+        Returns:
+            Block entries in file order
+        """
+        selected = []
+        for block in self.blocks:
+            for col, (low, high) in filters.items():
+                zone = block['zones'].get(col)
+                if zone is None:
+                    continue
+                zone_min, zone_max = zone
+                if zone_min is None:
+                    # Block holds only nulls in this column
+                    break
+                if (low is not None and zone_max < low) or (high is not None and zone_min > high):
+                    break
+            else:
+                selected.append(block)
+        return selected
+
+    def to_dict(self) -> Dict:
+        return {
+            'sort_keys': self.sort_keys,
+            'columns': self.columns,
+            'block_rows': self.block_rows,
+            'header_bytes': self.header_bytes,
+            'row_count': self.row_count,
+            'blocks': self.blocks
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ZoneMap':
+        zone_map = cls(data['columns'], data['block_rows'], data.get('sort_keys'))
+        zone_map.header_bytes = data['header_bytes']
+        zone_map.row_count = data['row_count']
+        zone_map.blocks = data['blocks']
+        return zone_map
+
+    def save(self, filepath: str):
+        """Write the zone map as the sidecar of filepath."""
+        with open(sidecar_path(filepath), 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, filepath: str) -> Optional['ZoneMap']:
+        """Load the sidecar of filepath (None if there is none)."""
+        path = sidecar_path(filepath)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def in_range(values: pd.Series, low, high) -> pd.Series:
+    """Mask of non-null values within inclusive bounds (None leaves a side open)."""
+    mask = values.notna()
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+def iter_blocks(filepath: str, filters: Dict[str, Tuple], chunk_size: int = 100000,
+                **read_options) -> Iterator[pd.DataFrame]:
+    """
+    Parse the blocks of a CSV output that may hold rows matching range filters.
+
+    Blocks are selected with the zone map sidecar; without one the whole
+    file is read in chunks. Rows are not filtered.
+
+    Args:
+        filepath: CSV file written by write_csv()
+        filters: Column -> (low, high) inclusive bounds
+        chunk_size: Rows per chunk when there is no zone map
+        **read_options: Passed to pd.read_csv (e.g. usecols, dtype)
+
+    Yields:
+        DataFrame per selected block or chunk
+    """
+    zone_map = ZoneMap.load(filepath)
+    if zone_map is None:
+        yield from pd.read_csv(filepath, chunksize=chunk_size, **read_options)
+        return
+
+    with open(filepath, 'rb') as f:
+        header = f.read(zone_map.header_bytes)
+        for block in zone_map.select(filters):
+            f.seek(block['byte_offset'])
+            data = f.read(block['byte_length'])
+            yield pd.read_csv(io.BytesIO(header + data), **read_options)
+
+
+def read_range(filepath: str, filters: Dict[str, Tuple], columns: List[str] = None,
+               encoding: str = 'utf-8') -> Iterator[pd.DataFrame]:
+    """
+    Read the rows of a CSV output matching range filters, skipping blocks via its zone map.
+
+    Args:
+        filepath: CSV file written by write_csv()
+        filters: Column -> (low, high) inclusive bounds, e.g. {'date': ('2023-01-01', '2023-01-31')}
+        columns: Only return these columns (None returns all)
+        encoding: File encoding
+
+    Yields:
+        DataFrame per selected block, holding only matching rows
+    """
+    for chunk in iter_blocks(filepath, filters, encoding=encoding):
+        mask = pd.Series(True, index=chunk.index)
+        for col, (low, high) in filters.items():
+            mask &= in_range(chunk[col], low, high)
+        if mask.any():
+            yield chunk.loc[mask, columns] if columns else chunk[mask]